@@ -36,6 +36,8 @@ class KeycloakExtension(ProxiedDockerContainerExtension):
     name = "keycloak"
     HOST = "keycloak.<domain>"
     DOCKER_IMAGE = "quay.io/keycloak/keycloak"
+    # Log line of Keycloak, once the HTTP server is started (triggers an immediate health check)
+    health_check_log_patterns = ["Listening on: http"]
 
     def __init__(self):
         self.realm = get_env(ENV_KEYCLOAK_REALM, DEFAULT_REALM)
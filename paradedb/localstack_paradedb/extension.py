@@ -3,6 +3,7 @@ import socket
 
 from localstack import config
 from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+from localstack_extensions.utils.tcp_protocol_router import TcpSignature
 
 # Environment variables for configuration
 ENV_POSTGRES_USER = "PARADEDB_POSTGRES_USER"
@@ -22,6 +23,18 @@ class ParadeDbExtension(ProxiedDockerContainerExtension):
     # Name of the Docker image to spin up
     DOCKER_IMAGE = "paradedb/paradedb"
 
+    # Identify PostgreSQL/ParadeDB connections by protocol handshake. Both the SSL request and
+    # the startup message consist of a 4-byte message length, followed by a 4-byte protocol code:
+    tcp_connection_signatures = [
+        # SSL request: protocol code 80877103 (0x04D2162F)
+        TcpSignature(b"\x04\xd2\x16\x2f", offset=4),
+        # Startup message: protocol version 3.0 (0x00030000)
+        TcpSignature(b"\x00\x03\x00\x00", offset=4),
+    ]
+
+    # Log line of Postgres, once it accepts connections (triggers an immediate health check)
+    health_check_log_patterns = ["database system is ready to accept connections"]
+
     def __init__(self):
         # Get configuration from environment variables
         postgres_user = os.environ.get(ENV_POSTGRES_USER, DEFAULT_POSTGRES_USER)
@@ -58,28 +71,13 @@ class ParadeDbExtension(ProxiedDockerContainerExtension):
 
     def tcp_connection_matcher(self, data: bytes) -> bool:
         """
-        Identify PostgreSQL/ParadeDB connections by protocol handshake.
-
-        PostgreSQL can start with either:
-        1. SSL request: protocol code 80877103 (0x04D2162F)
-        2. Startup message: protocol version 3.0 (0x00030000)
-
-        Both use the same format:
-        - 4 bytes: message length
-        - 4 bytes: protocol version/code
+        Identify PostgreSQL/ParadeDB connections by protocol handshake, i.e., whether the given
+        data matches any of the `tcp_connection_signatures`. Kept for API compatibility only - the
+        gateway routes connections via the signatures, and does not register this matcher.
         """
-        if len(data) < 8:
-            return False
-
-        # Check for SSL request (80877103 = 0x04D2162F)
-        if data[4:8] == b"\x04\xd2\x16\x2f":
-            return True
-
-        # Check for protocol version 3.0 (0x00030000)
-        if data[4:8] == b"\x00\x03\x00\x00":
-            return True
-
-        return False
+        return any(
+            signature.matches(data) for signature in self.tcp_connection_signatures
+        )
 
     def _check_tcp_port(self, host: str, port: int, timeout: float = 2.0) -> None:
         """Check if a TCP port is accepting connections."""
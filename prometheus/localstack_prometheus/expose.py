@@ -1,9 +1,58 @@
+import gzip
+import os
+import threading
+import time
+
+from localstack.config import is_env_true
 from localstack.extensions.api import http
 from prometheus_client.exposition import choose_encoder
 
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
+
+# Time in seconds for which an encoded scrape result is served to subsequent scrapes (0 disables)
+PROMETHEUS_METRICS_CACHE_TTL = float(os.environ.get("PROMETHEUS_METRICS_CACHE_TTL") or 0)
+# Whether to compress the scrape result, if the scraper accepts gzip encoding
+PROMETHEUS_METRICS_GZIP = is_env_true("PROMETHEUS_METRICS_GZIP")
+
+# Encoded scrape results as tuples (expiry time, payload), by content type and content encoding
+_scrape_cache: dict[tuple[str, str | None], tuple[float, bytes]] = {}
+_scrape_lock = threading.Lock()
+
 
 def retrieve_metrics(request: http.Request):
     """Expose the Prometheus metrics"""
     _generate_latest_metrics, content_type = choose_encoder(request.headers.get("Content-Type", ""))
-    data = _generate_latest_metrics()
-    return http.Response(response=data, status=200, mimetype=content_type)
+    content_encoding = None
+    if PROMETHEUS_METRICS_GZIP and "gzip" in request.headers.get("Accept-Encoding", ""):
+        content_encoding = "gzip"
+
+    data = _get_scrape_result(_generate_latest_metrics, content_type, content_encoding)
+    response = http.Response(response=data, status=200, mimetype=content_type)
+    if content_encoding:
+        response.headers["Content-Encoding"] = content_encoding
+    if PROMETHEUS_METRICS_GZIP:
+        # the encoding of the response depends on the request, which caches have to consider
+        response.headers["Vary"] = "Accept-Encoding"
+    return response
+
+
+def _get_scrape_result(generate_latest, content_type: str, content_encoding: str | None) -> bytes:
+    """
+    Return the encoded metrics, served from the cache if they were encoded within the cache TTL.
+    Concurrent scrapes wait for a single encoding of the metrics, instead of each walking the
+    registry (and evaluating all function gauges).
+    """
+    key = (content_type, content_encoding)
+    with _scrape_lock:
+        cached = _scrape_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
+
+        # merge the metric updates accumulated by the instrumented threads since the last scrape
+        METRICS_ACCUMULATOR.merge()
+        data = generate_latest()
+        if content_encoding == "gzip":
+            data = gzip.compress(data)
+        if PROMETHEUS_METRICS_CACHE_TTL > 0:
+            _scrape_cache[key] = (time.monotonic() + PROMETHEUS_METRICS_CACHE_TTL, data)
+        return data
@@ -5,13 +5,19 @@ from localstack.aws.api import RequestContext
 from localstack.aws.chain import Handler, HandlerChain
 from localstack.http import Response
 
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
 from localstack_prometheus.metrics.core import (
     LOCALSTACK_IN_FLIGHT_REQUESTS,
     LOCALSTACK_REQUEST_PROCESSING_DURATION_SECONDS,
 )
+from localstack_prometheus.metrics.util import LabelChildCache
 
 LOG = logging.getLogger(__name__)
 
+# Metric children by label values, resolved once for each service operation (and status)
+_in_flight_requests = LabelChildCache(LOCALSTACK_IN_FLIGHT_REQUESTS)
+_request_processing_duration = LabelChildCache(LOCALSTACK_REQUEST_PROCESSING_DURATION_SECONDS)
+
 
 class TimedRequestContext(RequestContext):
     start_time: float | None
@@ -31,7 +37,7 @@ class RequestMetricsHandler(Handler):
             return
 
         service, operation = context.service_operation
-        LOCALSTACK_IN_FLIGHT_REQUESTS.labels(service=service, operation=operation).inc()
+        _in_flight_requests.labels(service, operation).inc()
 
 
 class ResponseMetricsHandler(Handler):
@@ -45,7 +51,7 @@ class ResponseMetricsHandler(Handler):
             return
 
         service, operation = context.service_operation
-        LOCALSTACK_IN_FLIGHT_REQUESTS.labels(service=service, operation=operation).dec()
+        _in_flight_requests.labels(service, operation).dec()
 
         # Do not record if response is None
         if response is None:
@@ -64,9 +70,6 @@ class ResponseMetricsHandler(Handler):
 
         status_code = str(response.status_code)
 
-        LOCALSTACK_REQUEST_PROCESSING_DURATION_SECONDS.labels(
-            service=service,
-            operation=operation,
-            status=status,
-            status_code=status_code,
-        ).observe(duration)
+        METRICS_ACCUMULATOR.observe(
+            _request_processing_duration.labels(service, operation, status, status_code), duration
+        )
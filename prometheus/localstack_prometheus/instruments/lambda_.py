@@ -1,29 +1,220 @@
-import contextlib
-from typing import ContextManager
+from __future__ import annotations
 
-from localstack.pro.core.services.lambda_.invocation.assignment import AssignmentService
-from localstack.pro.core.services.lambda_.invocation.docker_runtime_executor import (
-    DockerRuntimeExecutor,
-)
-from localstack.pro.core.services.lambda_.invocation.execution_environment import (
-    ExecutionEnvironment,
-)
-from localstack.pro.core.services.lambda_.invocation.lambda_models import (
-    FunctionVersion,
-    InitializationType,
-)
+import contextlib
+import threading
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, ContextManager
 
 from localstack_prometheus.metrics.lambda_ import (
+    LOCALSTACK_LAMBDA_COLD_START_PHASE_DURATION_SECONDS,
     LOCALSTACK_LAMBDA_ENVIRONMENT_ACTIVE,
     LOCALSTACK_LAMBDA_ENVIRONMENT_CONTAINERS_RUNNING,
     LOCALSTACK_LAMBDA_ENVIRONMENT_START_TOTAL,
 )
 
+if TYPE_CHECKING:
+    from localstack.pro.core.services.lambda_.invocation.assignment import AssignmentService
+    from localstack.pro.core.services.lambda_.invocation.docker_runtime_executor import (
+        DockerRuntimeExecutor,
+    )
+    from localstack.pro.core.services.lambda_.invocation.execution_environment import (
+        ExecutionEnvironment,
+    )
+    from localstack.pro.core.services.lambda_.invocation.executor_endpoint import (
+        ExecutorEndpoint,
+    )
+    from localstack.pro.core.services.lambda_.invocation.lambda_models import (
+        FunctionVersion,
+        InitializationType,
+        Invocation,
+    )
+
+
+def _provisioning_type_key(prov_type: InitializationType | str) -> str:
+    return getattr(prov_type, "value", prov_type)
+
+
+def _runtime_label(function_version: FunctionVersion) -> str:
+    # container image functions don't have a managed runtime
+    return function_version.config.runtime or "container-image"
+
+
+def _observe_cold_start_phase(
+    phase: str,
+    function_version: FunctionVersion,
+    prov_type: InitializationType | str,
+    duration: float,
+):
+    LOCALSTACK_LAMBDA_COLD_START_PHASE_DURATION_SECONDS.labels(
+        phase=phase,
+        runtime=_runtime_label(function_version),
+        provisioning_type=_provisioning_type_key(prov_type),
+    ).observe(duration)
+
+
+class EnvironmentCounts:
+    """
+    Number of Lambda environments by version manager and provisioning type, maintained
+    incrementally whenever an environment is added to or removed from the AssignmentService.
+    """
+
+    def __init__(self):
+        self._mutex = threading.Lock()
+        self._by_version: dict[tuple[str, str], int] = defaultdict(int)
+        self._by_type: dict[str, int] = defaultdict(int)
+
+    def add(self, version_manager_id: str, prov_type: InitializationType, amount: int = 1):
+        prov_type = _provisioning_type_key(prov_type)
+        with self._mutex:
+            self._by_version[(version_manager_id, prov_type)] += amount
+            self._by_type[prov_type] += amount
+
+    def count_version(self, version_manager_id: str, prov_type: InitializationType) -> int:
+        return self._by_version.get((version_manager_id, _provisioning_type_key(prov_type)), 0)
+
+    def count_service(self, prov_type: InitializationType) -> int:
+        return self._by_type.get(_provisioning_type_key(prov_type), 0)
+
+
+class _CountedEnvironments(dict):
+    """
+    Environments of a version manager by id, counted by provisioning type on insert and removal.
+    All methods which add or remove environments are overridden to keep the counts consistent.
+    """
+
+    def __init__(self, version_manager_id: str, counts: EnvironmentCounts):
+        super().__init__()
+        self.version_manager_id = version_manager_id
+        self.counts = counts
+
+    def __setitem__(self, environment_id: str, environment: ExecutionEnvironment):
+        previous = self.get(environment_id)
+        super().__setitem__(environment_id, environment)
+        if previous is not None:
+            self.counts.add(self.version_manager_id, previous.initialization_type, -1)
+        self.counts.add(self.version_manager_id, environment.initialization_type)
+
+    def __delitem__(self, environment_id: str):
+        self.pop(environment_id)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, environment_id: str, *default):
+        # popping is atomic, hence concurrent removals of the same environment are counted once
+        environment = super().pop(environment_id, None)
+        if environment is None:
+            if default:
+                return default[0]
+            raise KeyError(environment_id)
+        self.counts.add(self.version_manager_id, environment.initialization_type, -1)
+        return environment
+
+    def popitem(self) -> tuple[str, ExecutionEnvironment]:
+        environment_id, environment = super().popitem()
+        self.counts.add(self.version_manager_id, environment.initialization_type, -1)
+        return environment_id, environment
+
+    def clear(self):
+        while True:
+            try:
+                self.popitem()
+            except KeyError:
+                return
+
+    def update(self, *args, **kwargs):
+        for environment_id, environment in dict(*args, **kwargs).items():
+            self[environment_id] = environment
+
+    def setdefault(self, environment_id: str, environment: ExecutionEnvironment):
+        if environment_id not in self:
+            self[environment_id] = environment
+        return self[environment_id]
+
+    def detach(self):
+        """Remove the environments from the counts, without removing them from this dict"""
+        for environment in list(self.values()):
+            self.counts.add(self.version_manager_id, environment.initialization_type, -1)
+        # subsequent changes (e.g., by callers still holding a reference) are not counted anymore
+        self.counts = EnvironmentCounts()
+
+
+class CountedEnvironmentRegistry(defaultdict):
+    """
+    Replacement of `AssignmentService.environments` (version manager id -> environment id ->
+    environment), which keeps count of the environments, so that they don't need to be scanned.
+    Environments of a version manager which are set are copied into a counted dict, and counted
+    environments which are replaced or removed are subtracted from the counts.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.counts = EnvironmentCounts()
+
+    def __missing__(self, version_manager_id: str) -> _CountedEnvironments:
+        environments = self[version_manager_id] = _CountedEnvironments(
+            version_manager_id, self.counts
+        )
+        return environments
+
+    def __setitem__(self, version_manager_id: str, environments: dict):
+        if not (
+            isinstance(environments, _CountedEnvironments) and environments.counts is self.counts
+        ):
+            counted = _CountedEnvironments(version_manager_id, self.counts)
+            counted.update(environments)
+            environments = counted
+        previous = self.get(version_manager_id)
+        super().__setitem__(version_manager_id, environments)
+        if previous is not None and previous is not environments:
+            previous.detach()
+
+    def __delitem__(self, version_manager_id: str):
+        self.pop(version_manager_id)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def pop(self, version_manager_id: str, *default):
+        environments = super().pop(version_manager_id, None)
+        if environments is None:
+            if default:
+                return default[0]
+            raise KeyError(version_manager_id)
+        environments.detach()
+        return environments
+
+    def popitem(self) -> tuple[str, _CountedEnvironments]:
+        version_manager_id, environments = super().popitem()
+        environments.detach()
+        return version_manager_id, environments
+
+    def clear(self):
+        while True:
+            try:
+                self.popitem()
+            except KeyError:
+                return
+
+    def update(self, *args, **kwargs):
+        for version_manager_id, environments in dict(*args, **kwargs).items():
+            self[version_manager_id] = environments
+
+    def setdefault(self, version_manager_id: str, environments: dict | None = None):
+        if version_manager_id not in self:
+            self[version_manager_id] = environments or {}
+        return self[version_manager_id]
+
 
 def count_version_environments(
     assignment_service: AssignmentService, version_manager_id: str, prov_type: InitializationType
 ):
     """Count environments of a specific provisioning type for a specific version manager"""
+    if isinstance(assignment_service.environments, CountedEnvironmentRegistry):
+        return assignment_service.environments.counts.count_version(version_manager_id, prov_type)
     return sum(
         env.initialization_type == prov_type
         for env in assignment_service.environments.get(version_manager_id, {}).values()
@@ -34,6 +225,8 @@ def count_service_environments(
     assignment_service: AssignmentService, prov_type: InitializationType
 ):
     """Count environments of a specific provisioning type across all function versions"""
+    if isinstance(assignment_service.environments, CountedEnvironmentRegistry):
+        return assignment_service.environments.counts.count_service(prov_type)
     return sum(
         count_version_environments(assignment_service, version_manager_id, prov_type)
         for version_manager_id in assignment_service.environments
@@ -42,6 +235,12 @@ def count_service_environments(
 
 def init_assignment_service_with_metrics(fn, self: AssignmentService):
     fn(self)
+    # Count environments as they are created and destroyed, instead of scanning all environments
+    registry = CountedEnvironmentRegistry()
+    for version_manager_id, environments in self.environments.items():
+        for environment_id, environment in environments.items():
+            registry[version_manager_id][environment_id] = environment
+    self.environments = registry
     # Initialise these once, with all subsequent calls being evaluated at collection time.
     LOCALSTACK_LAMBDA_ENVIRONMENT_ACTIVE.labels(
         provisioning_type="provisioned-concurrency"
@@ -52,10 +251,35 @@ def init_assignment_service_with_metrics(fn, self: AssignmentService):
     )
 
 
+def tracked_wait_for_startup(fn, self: ExecutorEndpoint, *args, **kwargs):
+    # Time the runtime initialisation (waiting for the runtime in the container to report its
+    # readiness), which is observed as a separate phase by `tracked_docker_start`
+    start_time = time.perf_counter()
+    try:
+        return fn(self, *args, **kwargs)
+    finally:
+        self._runtime_init_duration = time.perf_counter() - start_time
+
+
 def tracked_docker_start(fn, self: DockerRuntimeExecutor, env_vars: dict[str, str]):
+    start_time = time.perf_counter()
     fn(self, env_vars)
+    duration = time.perf_counter() - start_time
     LOCALSTACK_LAMBDA_ENVIRONMENT_CONTAINERS_RUNNING.inc()
 
+    # the environment start observes only what remains after the start of the container
+    self._start_duration = duration
+
+    prov_type = env_vars.get("AWS_LAMBDA_INITIALIZATION_TYPE", "unknown")
+    # the runtime initialisation is timed by `tracked_wait_for_startup`, as part of the start
+    runtime_init_duration = getattr(self.executor_endpoint, "_runtime_init_duration", None)
+    if runtime_init_duration is not None:
+        duration -= runtime_init_duration
+        _observe_cold_start_phase(
+            "runtime_init", self.function_version, prov_type, runtime_init_duration
+        )
+    _observe_cold_start_phase("container_start", self.function_version, prov_type, duration)
+
 
 def tracked_docker_stop(fn, self: DockerRuntimeExecutor):
     fn(self)
@@ -79,3 +303,39 @@ def tracked_get_environment(
     ).inc()
     with fn(self, version_manager_id, function_version, provisioning_type) as execution_env:
         yield execution_env
+
+
+def tracked_environment_start(fn, self: ExecutionEnvironment):
+    start_time = time.perf_counter()
+    fn(self)
+    duration = time.perf_counter() - start_time
+    # The start of the runtime executor is already observed as the `container_start` and
+    # `runtime_init` phases, hence only the remainder is observed to keep the phases disjoint.
+    # Failed or timed out starts raise, hence only environments which became ready are observed.
+    executor_duration = getattr(self.runtime_executor, "_start_duration", 0.0)
+    _observe_cold_start_phase(
+        "environment_setup",
+        self.function_version,
+        self.initialization_type,
+        max(duration - executor_duration, 0.0),
+    )
+
+
+def tracked_environment_invoke(fn, self: ExecutionEnvironment, invocation: Invocation):
+    # Only the first invocation of an on-demand environment is part of its cold start, whereas
+    # provisioned environments are started ahead of (and independently of) their first invocation
+    if _provisioning_type_key(self.initialization_type) != "on-demand" or getattr(
+        self, "_first_invocation_tracked", False
+    ):
+        return fn(self, invocation)
+    self._first_invocation_tracked = True
+    start_time = time.perf_counter()
+    try:
+        return fn(self, invocation)
+    finally:
+        _observe_cold_start_phase(
+            "first_invocation",
+            self.function_version,
+            self.initialization_type,
+            time.perf_counter() - start_time,
+        )
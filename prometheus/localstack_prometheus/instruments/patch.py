@@ -16,13 +16,20 @@ from localstack.pro.core.services.lambda_.invocation.assignment import Assignmen
 from localstack.pro.core.services.lambda_.invocation.docker_runtime_executor import (
     DockerRuntimeExecutor,
 )
+from localstack.pro.core.services.lambda_.invocation.execution_environment import (
+    ExecutionEnvironment,
+)
+from localstack.pro.core.services.lambda_.invocation.executor_endpoint import ExecutorEndpoint
 from localstack.utils.patch import Patch, Patches
 
 from localstack_prometheus.instruments.lambda_ import (
     init_assignment_service_with_metrics,
     tracked_docker_start,
     tracked_docker_stop,
+    tracked_environment_invoke,
+    tracked_environment_start,
     tracked_get_environment,
+    tracked_wait_for_startup,
 )
 from localstack_prometheus.instruments.poller import tracked_poll_events
 from localstack_prometheus.instruments.sender import tracked_send_events
@@ -39,6 +46,10 @@ def apply_lambda_tracking_patches():
             # Track starting and stopping of containers function
             Patch.function(target=DockerRuntimeExecutor.start, fn=tracked_docker_start),
             Patch.function(target=DockerRuntimeExecutor.stop, fn=tracked_docker_stop),
+            Patch.function(target=ExecutorEndpoint.wait_for_startup, fn=tracked_wait_for_startup),
+            # Track the duration of the cold start phases until the first invocation completes
+            Patch.function(target=ExecutionEnvironment.start, fn=tracked_environment_start),
+            Patch.function(target=ExecutionEnvironment.invoke, fn=tracked_environment_invoke),
             # Track cold and warm starts
             Patch.function(target=AssignmentService.get_environment, fn=tracked_get_environment),
             # Track and collect all environment
@@ -6,6 +6,7 @@ from localstack.pro.core.services.lambda_.event_source_mapping.pollers.poller im
 )
 
 from localstack_prometheus.instruments.util import get_event_target_from_procesor
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
 from localstack_prometheus.metrics.event_polling import (
     LOCALSTACK_POLL_EVENTS_DURATION_SECONDS,
     LOCALSTACK_POLL_MISS_TOTAL,
@@ -24,26 +25,33 @@ def tracked_poll_events(fn, self: Poller):
     event_target = get_event_target_from_procesor(self.processor)
 
     try:
-        with LOCALSTACK_POLL_EVENTS_DURATION_SECONDS.labels(
-            event_source=event_source, event_target=event_target
-        ).time():
+        with METRICS_ACCUMULATOR.time(
+            LOCALSTACK_POLL_EVENTS_DURATION_SECONDS.labels(
+                event_source=event_source, event_target=event_target
+            )
+        ):
             fn(self)
     except EmptyPollResultsException:
         # set to 0 since it's a batch-miss
-        LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
-            event_source=event_source, event_target=event_target
-        ).observe(0)
+        METRICS_ACCUMULATOR.observe(
+            LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
+                event_source=event_source, event_target=event_target
+            ),
+            0,
+        )
 
-        LOCALSTACK_POLL_MISS_TOTAL.labels(
-            event_source=event_source, event_target=event_target
-        ).inc()
+        METRICS_ACCUMULATOR.inc(
+            LOCALSTACK_POLL_MISS_TOTAL.labels(event_source=event_source, event_target=event_target)
+        )
 
         raise
     except Exception as e:
         error_type = type(e).__name__
-        LOCALSTACK_EVENT_PROCESSING_ERRORS_TOTAL.labels(
-            event_source=event_source,
-            event_target=event_target,
-            error_type=error_type,
-        ).inc()
+        METRICS_ACCUMULATOR.inc(
+            LOCALSTACK_EVENT_PROCESSING_ERRORS_TOTAL.labels(
+                event_source=event_source,
+                event_target=event_target,
+                error_type=error_type,
+            )
+        )
         raise
@@ -3,6 +3,7 @@ import time
 
 from localstack.pro.core.services.lambda_.event_source_mapping.senders.sender import Sender
 
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
 from localstack_prometheus.metrics.event_processing import (
     LOCALSTACK_EVENT_PROCESSING_ERRORS_TOTAL,
     LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS,
@@ -13,6 +14,46 @@ from localstack_prometheus.metrics.event_processing import (
 
 LOG = logging.getLogger(__name__)
 
+KAFKA_EVENT_SOURCES = {"aws:kafka", "SelfManagedKafka"}
+
+
+def get_event_timestamps(events: list, event_source: str) -> tuple[str, list[float]]:
+    """
+    Return the event source and the creation timestamps (in seconds) of a batch of events.
+    All events of a batch stem from the same source, hence the record format is determined once
+    from the first event, instead of for every event.
+    """
+    records = [event for event in events if isinstance(event, dict)]
+    if not records:
+        return event_source, []
+    first = records[0]
+
+    if first.get("dynamodb"):
+        return event_source or "aws:dynamodb", [
+            float(timestamp)
+            for record in records
+            if (timestamp := record.get("dynamodb", {}).get("ApproximateCreationDateTime"))
+        ]
+    if first.get("kinesis"):
+        return event_source or "aws:kinesis", [
+            float(timestamp)
+            for record in records
+            if (timestamp := record.get("kinesis", {}).get("approximateArrivalTimestamp"))
+        ]
+    if first.get("attributes"):
+        return event_source or "aws:sqs", [
+            float(timestamp) / 1000.0
+            for record in records
+            if (timestamp := record.get("attributes", {}).get("SentTimestamp"))
+        ]
+    if event_source in KAFKA_EVENT_SOURCES:
+        return event_source, [
+            float(timestamp) / 1000.0
+            for record in records
+            if (timestamp := record.get("timestamp"))
+        ]
+    return event_source, []
+
 
 def tracked_send_events(fn, self: Sender, events: list[dict] | dict):
     """Track metrics for event sending operations"""
@@ -33,72 +74,56 @@ def tracked_send_events(fn, self: Sender, events: list[dict] | dict):
         event_source = es
 
     # HACK: Workaround for Kafka since events are a dict
-    if event_source in {"aws:kafka", "SelfManagedKafka"} and isinstance(events, dict):
+    if event_source in KAFKA_EVENT_SOURCES and isinstance(events, dict):
         # Need to flatten 2d array since records are split by topic-partition key
         events = sum(events.get("records", []), [])
 
     start_time = time.time()
-    for event in events:
-        if not isinstance(event, dict):
-            continue
-
-        if dynamodb := event.get("dynamodb", {}):
-            if creation_time := dynamodb.get("ApproximateCreationDateTime"):
-                delay = start_time - float(creation_time)
-                LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS.labels(
-                    event_source=event_source or "aws:dynamodb",
-                    event_target=event_target,
-                ).observe(delay)
-
-        elif kinesis := event.get("kinesis", {}):
-            if arrival_time := kinesis.get("approximateArrivalTimestamp"):
-                delay = start_time - float(arrival_time)
-                LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS.labels(
-                    event_source=event_source or "aws:kinesis",
-                    event_target=event_target,
-                ).observe(delay)
-
-        elif sqs_attributes := event.get("attributes", {}):
-            if sent_timestamp := sqs_attributes.get("SentTimestamp"):
-                delay = start_time - (float(sent_timestamp) / 1000.0)
-                LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS.labels(
-                    event_source=event_source or "aws:sqs", event_target=event_target
-                ).observe(delay)
-        elif event_source in {"aws:kafka", "SelfManagedKafka"}:
-            if sent_timestamp := event.get("timestamp"):
-                delay = start_time - (float(sent_timestamp) / 1000.0)
-                LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS.labels(
-                    event_source=event_source, event_target=event_target
-                ).observe(delay)
-
-    LOCALSTACK_IN_FLIGHT_EVENTS_GAUGE.labels(
+    delay_source, timestamps = get_event_timestamps(events, event_source)
+    if timestamps:
+        METRICS_ACCUMULATOR.observe_many(
+            LOCALSTACK_EVENT_PROPAGATION_DELAY_SECONDS.labels(
+                event_source=delay_source, event_target=event_target
+            ),
+            [start_time - timestamp for timestamp in timestamps],
+        )
+
+    in_flight_events = LOCALSTACK_IN_FLIGHT_EVENTS_GAUGE.labels(
         event_source=event_source,
         event_target=event_target,
-    ).inc()
+    )
+    in_flight_events.inc()
 
     try:
-        with LOCALSTACK_PROCESS_EVENT_DURATION_SECONDS.labels(
-            event_source=event_source, event_target=event_target
-        ).time():
+        with METRICS_ACCUMULATOR.time(
+            LOCALSTACK_PROCESS_EVENT_DURATION_SECONDS.labels(
+                event_source=event_source, event_target=event_target
+            )
+        ):
             result = fn(self, original_events)
-        LOCALSTACK_PROCESSED_EVENTS_TOTAL.labels(
-            event_source=event_source, event_target=event_target, status="success"
-        ).inc(total_events)
+        METRICS_ACCUMULATOR.inc(
+            LOCALSTACK_PROCESSED_EVENTS_TOTAL.labels(
+                event_source=event_source, event_target=event_target, status="success"
+            ),
+            total_events,
+        )
 
         return result
 
     except Exception as e:
         error_type = type(e).__name__
-        LOCALSTACK_EVENT_PROCESSING_ERRORS_TOTAL.labels(
-            event_source=event_source, event_target=event_target, error_type=error_type
-        ).inc()
-
-        LOCALSTACK_PROCESSED_EVENTS_TOTAL.labels(
-            event_source=event_source, event_target=event_target, status="error"
-        ).inc(total_events)
+        METRICS_ACCUMULATOR.inc(
+            LOCALSTACK_EVENT_PROCESSING_ERRORS_TOTAL.labels(
+                event_source=event_source, event_target=event_target, error_type=error_type
+            )
+        )
+
+        METRICS_ACCUMULATOR.inc(
+            LOCALSTACK_PROCESSED_EVENTS_TOTAL.labels(
+                event_source=event_source, event_target=event_target, status="error"
+            ),
+            total_events,
+        )
         raise
     finally:
-        LOCALSTACK_IN_FLIGHT_EVENTS_GAUGE.labels(
-            event_source=event_source,
-            event_target=event_target,
-        ).dec()
+        in_flight_events.dec()
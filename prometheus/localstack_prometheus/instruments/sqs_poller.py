@@ -5,6 +5,7 @@ from localstack.pro.core.services.lambda_.event_source_mapping.pollers.sqs_polle
 )
 
 from localstack_prometheus.instruments.util import get_event_target_from_procesor
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
 from localstack_prometheus.metrics.event_polling import (
     LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO,
     LOCALSTACK_RECORDS_PER_POLL,
@@ -21,14 +22,20 @@ def tracked_sqs_handle_messages(fn, self: SqsPoller, messages: list[dict]):
 
     message_count = len(messages)
     if message_count > 0:
-        LOCALSTACK_RECORDS_PER_POLL.labels(
-            event_source=event_source,
-            event_target=event_target,
-        ).observe(message_count)
+        METRICS_ACCUMULATOR.observe(
+            LOCALSTACK_RECORDS_PER_POLL.labels(
+                event_source=event_source,
+                event_target=event_target,
+            ),
+            message_count,
+        )
 
         if self.batch_size > 0:
-            LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
-                event_source=event_source, event_target=event_target
-            ).observe(message_count / self.batch_size)
+            METRICS_ACCUMULATOR.observe(
+                LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
+                    event_source=event_source, event_target=event_target
+                ),
+                message_count / self.batch_size,
+            )
 
     return fn(self, messages)
@@ -3,6 +3,7 @@ from localstack.pro.core.services.lambda_.event_source_mapping.pollers.stream_po
 )
 
 from localstack_prometheus.instruments.util import get_event_target_from_procesor
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
 from localstack_prometheus.metrics.event_polling import (
     LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO,
     LOCALSTACK_POLLED_BATCH_WINDOW_EFFICIENCY_RATIO,
@@ -16,22 +17,30 @@ def tracked_get_records(fn, self: StreamPoller, shard_iterator: str):
     event_source = self.event_source()
     event_target = get_event_target_from_procesor(self.processor)
 
-    with LOCALSTACK_POLLED_BATCH_WINDOW_EFFICIENCY_RATIO.labels(
-        event_source=event_source, event_target=event_target
-    ).time():
+    with METRICS_ACCUMULATOR.time(
+        LOCALSTACK_POLLED_BATCH_WINDOW_EFFICIENCY_RATIO.labels(
+            event_source=event_source, event_target=event_target
+        )
+    ):
         response = fn(self, shard_iterator)
     records = response.get("Records", [])
     record_count = len(records)
 
     if record_count > 0:
-        LOCALSTACK_RECORDS_PER_POLL.labels(
-            event_source=event_source,
-            event_target=event_target,
-        ).observe(record_count)
+        METRICS_ACCUMULATOR.observe(
+            LOCALSTACK_RECORDS_PER_POLL.labels(
+                event_source=event_source,
+                event_target=event_target,
+            ),
+            record_count,
+        )
 
     if (batch_size := self.stream_parameters.get("BatchSize")) and batch_size > 0:
-        LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
-            event_source=event_source, event_target=event_target
-        ).observe(record_count / batch_size)
+        METRICS_ACCUMULATOR.observe(
+            LOCALSTACK_POLLED_BATCH_SIZE_EFFICIENCY_RATIO.labels(
+                event_source=event_source, event_target=event_target
+            ),
+            record_count / batch_size,
+        )
 
     return response
@@ -0,0 +1,139 @@
+"""
+Thread-local accumulation of metric updates.
+
+Updating a prometheus_client metric acquires the lock of the metric, which is contended once the
+metric is updated from many threads (gateway, ESM poller, and Lambda executor threads). Instead,
+the accumulator adds the updates of each thread to running totals in thread-local arrays, without
+any locking, and merges the totals into the exported metrics lazily, at scrape time.
+
+Histogram totals are merged into the buckets and sum of the histogram directly, which relies on
+internals of prometheus_client. If these are not available, histogram observations are passed on to
+the histogram instead.
+"""
+
+import contextlib
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator, Sequence
+
+from prometheus_client import Histogram
+from prometheus_client.metrics import MetricWrapperBase
+
+
+def _has_histogram_internals() -> bool:
+    """Return whether histograms expose the bucket internals, which the accumulator merges into"""
+    histogram = Histogram("accumulator_probe", "", registry=None)
+    return (
+        isinstance(getattr(histogram, "_upper_bounds", None), list)
+        and isinstance(getattr(histogram, "_buckets", None), list)
+        and len(histogram._buckets) == len(histogram._upper_bounds)
+        and hasattr(histogram, "_sum")
+    )
+
+
+HISTOGRAM_INTERNALS_SUPPORTED = _has_histogram_internals()
+
+
+class _ThreadTotals:
+    """Running totals of the metric updates of a single thread, by metric child"""
+
+    def __init__(self, thread: threading.Thread):
+        self.thread = thread
+        # updated by the owning thread only: a single total for counters, the count of each bucket
+        # followed by the sum of observations for histograms
+        self.totals: dict[MetricWrapperBase, list[float]] = {}
+        # the totals already merged into the metrics, updated by the merging thread only
+        self.merged: dict[MetricWrapperBase, list[float]] = {}
+
+
+class MetricAccumulator:
+    """
+    Accumulates updates of metric children (i.e., metrics with resolved labels) per thread. The
+    updates become visible in the metrics once `merge()` is called (e.g., before each scrape).
+    Gauges (e.g., of in-flight requests) are updated directly instead, since they report a current
+    value, which would be out of date until the next merge.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._threads: list[_ThreadTotals] = []
+        self._lock = threading.Lock()
+
+    def inc(self, child: MetricWrapperBase, amount: float = 1) -> None:
+        """Increment a counter child"""
+        self._get_totals(child, 1)[0] += amount
+
+    def observe(self, child: Histogram, amount: float) -> None:
+        """Observe the given amount with a histogram child"""
+        if not HISTOGRAM_INTERNALS_SUPPORTED:
+            child.observe(amount)
+            return
+        upper_bounds = child._upper_bounds
+        totals = self._get_totals(child, len(upper_bounds) + 1)
+        # the first bucket with an upper bound >= amount (the last bound is +Inf)
+        totals[bisect_left(upper_bounds, amount)] += 1
+        totals[-1] += amount
+
+    def observe_many(self, child: Histogram, amounts: Sequence[float]) -> None:
+        """Observe all given amounts with a histogram child"""
+        if not HISTOGRAM_INTERNALS_SUPPORTED:
+            for amount in amounts:
+                child.observe(amount)
+            return
+        upper_bounds = child._upper_bounds
+        totals = self._get_totals(child, len(upper_bounds) + 1)
+        for amount in amounts:
+            totals[bisect_left(upper_bounds, amount)] += 1
+        totals[-1] += sum(amounts)
+
+    @contextlib.contextmanager
+    def time(self, child: Histogram) -> Iterator[None]:
+        """Observe the duration of the block in seconds with a histogram child"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(child, time.perf_counter() - start)
+
+    def merge(self) -> None:
+        """Merge the updates accumulated since the last merge into the metrics"""
+        with self._lock:
+            for thread_totals in list(self._threads):
+                # all updates of a terminated thread are merged below
+                alive = thread_totals.thread.is_alive()
+                for child, totals in thread_totals.totals.copy().items():
+                    current = list(totals)
+                    merged = thread_totals.merged.get(child) or [0] * len(current)
+                    _apply_deltas(child, [value - merged[i] for i, value in enumerate(current)])
+                    thread_totals.merged[child] = current
+                if not alive:
+                    self._threads.remove(thread_totals)
+
+    def _get_totals(self, child: MetricWrapperBase, size: int) -> list[float]:
+        try:
+            totals = self._local.totals
+        except AttributeError:
+            thread_totals = _ThreadTotals(threading.current_thread())
+            with self._lock:
+                self._threads.append(thread_totals)
+            totals = self._local.totals = thread_totals.totals
+        values = totals.get(child)
+        if values is None:
+            values = totals[child] = [0] * size
+        return values
+
+
+def _apply_deltas(child: MetricWrapperBase, deltas: list[float]) -> None:
+    if isinstance(child, Histogram):
+        for index, count in enumerate(deltas[:-1]):
+            if count:
+                child._buckets[index].inc(count)
+        if deltas[-1]:
+            child._sum.inc(deltas[-1])
+    elif deltas[0]:
+        child.inc(deltas[0])
+
+
+METRICS_ACCUMULATOR = MetricAccumulator()
+"""Global accumulator of the metric updates on hot paths, merged into the metrics on each scrape"""
@@ -1,4 +1,4 @@
-from prometheus_client import Counter, Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 # Lambda environment metrics
 LOCALSTACK_LAMBDA_ENVIRONMENT_START_TOTAL = Counter(
@@ -17,3 +17,11 @@ LOCALSTACK_LAMBDA_ENVIRONMENT_ACTIVE = Gauge(
     "Number of currently active LocalStack Lambda environments.",
     ["provisioning_type"],
 )
+
+LOCALSTACK_LAMBDA_COLD_START_PHASE_DURATION_SECONDS = Histogram(
+    "localstack_lambda_cold_start_phase_duration_seconds",
+    "Duration of the disjoint phases (container_start, runtime_init, environment_setup, "
+    "first_invocation) of a Lambda environment cold start in seconds.",
+    ["phase", "runtime", "provisioning_type"],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0],
+)
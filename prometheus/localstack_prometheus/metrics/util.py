@@ -0,0 +1,24 @@
+from prometheus_client.metrics import MetricWrapperBase
+
+
+class LabelChildCache:
+    """
+    Cache of the children of a labelled metric, by label values. Resolving a child via
+    `metric.labels(...)` acquires the lock of the metric on every call, whereas cached children are
+    looked up without any locking. The cache is bounded, and cleared once it exceeds `maxsize`.
+    """
+
+    def __init__(self, metric: MetricWrapperBase, maxsize: int = 1024):
+        self.metric = metric
+        self.maxsize = maxsize
+        self._children: dict[tuple[str, ...], MetricWrapperBase] = {}
+
+    def labels(self, *labelvalues: str) -> MetricWrapperBase:
+        """Return the child of the metric for the given label values (in order of the label names)"""
+        child = self._children.get(labelvalues)
+        if child is None:
+            child = self.metric.labels(*labelvalues)
+            if len(self._children) >= self.maxsize:
+                self._children = {}
+            self._children[labelvalues] = child
+        return child
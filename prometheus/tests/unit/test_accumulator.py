@@ -0,0 +1,119 @@
+"""
+Unit tests for the thread-local accumulation of metric updates.
+"""
+
+import threading
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Histogram
+from prometheus_client.utils import floatToGoString
+
+from localstack_prometheus.metrics import accumulator
+from localstack_prometheus.metrics.accumulator import MetricAccumulator
+
+BUCKETS = [0.005, 0.05, 0.5, 5, 30]
+AMOUNTS = [0.001, 0.005, 0.02, 0.3, 0.5, 2, 10, 45, 120]
+
+
+def _histogram_samples(registry: CollectorRegistry, name: str) -> list[float]:
+    values = [
+        registry.get_sample_value(f"{name}_bucket", {"le": floatToGoString(bound)})
+        for bound in BUCKETS + [float("inf")]
+    ]
+    return values + [registry.get_sample_value(f"{name}_sum")]
+
+
+def _run_threads(target, count: int = 8):
+    threads = [threading.Thread(target=target, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_merge_of_threads_equals_direct_updates():
+    registry = CollectorRegistry()
+    accumulated = Histogram("accumulated", "", buckets=BUCKETS, registry=registry)
+    direct = Histogram("direct", "", buckets=BUCKETS, registry=registry)
+    accumulated_total = Counter("accumulated_events", "", registry=registry)
+    direct_total = Counter("direct_events", "", registry=registry)
+    metrics = MetricAccumulator()
+
+    def _update(index: int):
+        for amount in AMOUNTS:
+            metrics.observe(accumulated, amount * index)
+            direct.observe(amount * index)
+        metrics.observe_many(accumulated, AMOUNTS)
+        for amount in AMOUNTS:
+            direct.observe(amount)
+        metrics.inc(accumulated_total, index)
+        direct_total.inc(index)
+
+    _run_threads(_update)
+    # the updates only become visible once merged
+    assert registry.get_sample_value("accumulated_count") == 0
+    metrics.merge()
+
+    *buckets, total = _histogram_samples(registry, "accumulated")
+    *expected_buckets, expected_total = _histogram_samples(registry, "direct")
+    assert buckets == expected_buckets
+    assert total == pytest.approx(expected_total)
+    events = registry.get_sample_value("accumulated_events_total")
+    assert events == registry.get_sample_value("direct_events_total")
+
+
+def test_repeated_merges_do_not_double_count():
+    registry = CollectorRegistry()
+    histogram = Histogram("histogram", "", buckets=BUCKETS, registry=registry)
+    counter = Counter("events", "", registry=registry)
+    metrics = MetricAccumulator()
+
+    metrics.observe(histogram, 0.3)
+    metrics.inc(counter)
+    metrics.merge()
+    metrics.merge()
+    assert registry.get_sample_value("histogram_count") == 1
+    assert registry.get_sample_value("histogram_sum") == 0.3
+    assert registry.get_sample_value("events_total") == 1
+
+    # only the updates since the last merge are added
+    metrics.observe(histogram, 10)
+    metrics.inc(counter, 2)
+    metrics.merge()
+    metrics.merge()
+    assert registry.get_sample_value("histogram_count") == 2
+    assert registry.get_sample_value("histogram_sum") == 10.3
+    assert registry.get_sample_value("events_total") == 3
+
+
+def test_terminated_threads_are_merged_and_removed():
+    registry = CollectorRegistry()
+    counter = Counter("events", "", registry=registry)
+    metrics = MetricAccumulator()
+
+    _run_threads(lambda _: metrics.inc(counter), count=4)
+    assert len(metrics._threads) == 4
+
+    metrics.merge()
+    assert registry.get_sample_value("events_total") == 4
+    assert metrics._threads == []
+
+    metrics.merge()
+    assert registry.get_sample_value("events_total") == 4
+
+
+def test_observations_passed_on_without_histogram_internals(monkeypatch):
+    monkeypatch.setattr(accumulator, "HISTOGRAM_INTERNALS_SUPPORTED", False)
+    registry = CollectorRegistry()
+    histogram = Histogram("histogram", "", buckets=BUCKETS, registry=registry)
+    metrics = MetricAccumulator()
+
+    metrics.observe(histogram, 0.3)
+    metrics.observe_many(histogram, [0.01, 10])
+    assert registry.get_sample_value("histogram_count") == 3
+    metrics.merge()
+    assert registry.get_sample_value("histogram_count") == 3
+
+
+def test_histogram_internals_supported():
+    assert accumulator.HISTOGRAM_INTERNALS_SUPPORTED
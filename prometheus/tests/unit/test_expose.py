@@ -0,0 +1,55 @@
+"""
+Unit tests for the metrics endpoint, and the caching and compression of scrape results.
+"""
+
+import gzip
+
+import pytest
+from localstack.http import Request
+
+from localstack_prometheus import expose
+from localstack_prometheus.expose import retrieve_metrics
+
+
+@pytest.fixture(autouse=True)
+def scrape_cache(monkeypatch):
+    monkeypatch.setattr(expose, "_scrape_cache", {})
+
+
+def _scrape(accept_encoding: str = "") -> tuple:
+    request = Request("GET", "/_extension/metrics", headers={"Accept-Encoding": accept_encoding})
+    response = retrieve_metrics(request)
+    return response, response.get_data()
+
+
+def test_scrape_not_cached_by_default():
+    assert expose.PROMETHEUS_METRICS_CACHE_TTL == 0
+    _scrape()
+    assert expose._scrape_cache == {}
+
+
+def test_scrape_cached_within_ttl(monkeypatch):
+    monkeypatch.setattr(expose, "PROMETHEUS_METRICS_CACHE_TTL", 60)
+    _, data = _scrape()
+    monkeypatch.setattr(expose, "METRICS_ACCUMULATOR", None)
+    # served from the cache, without merging and encoding the metrics again
+    assert _scrape()[1] == data
+
+
+def test_gzip_responses_vary_by_accept_encoding(monkeypatch):
+    monkeypatch.setattr(expose, "PROMETHEUS_METRICS_GZIP", True)
+    response, data = _scrape("gzip, deflate")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert b"# HELP" in gzip.decompress(data)
+
+    response, data = _scrape()
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert b"# HELP" in data
+
+
+def test_no_vary_header_without_gzip():
+    response, _ = _scrape("gzip")
+    assert "Content-Encoding" not in response.headers
+    assert "Vary" not in response.headers
@@ -0,0 +1,74 @@
+"""
+Microbenchmark for the overhead of the request metrics handlers in the LocalStack handler chain.
+
+Runs synthetic requests through a handler chain with a no-op service handler, with and without the
+request and response handlers of the extension, and across a varying number of service operations
+(i.e., metric label values). No LocalStack or network access required.
+"""
+
+import time
+
+import pytest
+from localstack.aws.api import RequestContext
+from localstack.aws.chain import HandlerChain
+from localstack.aws.spec import load_service
+from localstack.http import Request, Response
+
+from localstack_prometheus.handler import RequestMetricsHandler, ResponseMetricsHandler
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR
+
+NUM_REQUESTS = 20_000
+ROUNDS = 3
+
+
+def _contexts(num_operations: int) -> list[RequestContext]:
+    service = load_service("sqs")
+    operations = [service.operation_model(name) for name in service.operation_names]
+    contexts = []
+    for i in range(NUM_REQUESTS):
+        context = RequestContext(Request("POST", "/"))
+        context.service = service
+        context.operation = operations[i % num_operations]
+        contexts.append(context)
+    return contexts
+
+
+def _serve(chain: HandlerChain, context: RequestContext, response: Response):
+    response.status_code = 200
+
+
+def _run(contexts: list[RequestContext], instrumented: bool):
+    request_handlers = [RequestMetricsHandler(), _serve] if instrumented else [_serve]
+    response_handlers = [ResponseMetricsHandler()] if instrumented else []
+    for context in contexts:
+        # the gateway creates a new handler chain for each request
+        chain = HandlerChain(request_handlers, response_handlers)
+        chain.handle(context, Response())
+
+
+def _best_time(fn, *args) -> float:
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(*args)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+@pytest.mark.parametrize("num_operations", [1, 10])
+def test_benchmark_handler_chain(num_operations):
+    contexts = _contexts(num_operations)
+
+    baseline_time = _best_time(_run, contexts, False)
+    instrumented_time = _best_time(_run, contexts, True)
+    METRICS_ACCUMULATOR.merge()
+
+    overhead = instrumented_time - baseline_time
+    print(
+        f"\n{NUM_REQUESTS} requests, {num_operations} operations | "
+        f"without extension {baseline_time * 1000:.2f}ms | "
+        f"with extension {instrumented_time * 1000:.2f}ms | "
+        f"overhead per request {overhead / NUM_REQUESTS * 1e6:.2f}us"
+    )
+    assert instrumented_time > baseline_time
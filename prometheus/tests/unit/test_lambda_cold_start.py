@@ -0,0 +1,117 @@
+"""
+Unit tests for the cold start phase metrics, with fake Lambda executors and a fake clock.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from prometheus_client import REGISTRY
+
+from localstack_prometheus.instruments import lambda_
+from localstack_prometheus.instruments.lambda_ import (
+    tracked_docker_start,
+    tracked_environment_invoke,
+    tracked_environment_start,
+    tracked_wait_for_startup,
+)
+
+RUNTIME = "python-test"
+METRIC_NAME = "localstack_lambda_cold_start_phase_duration_seconds"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(lambda_, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def function_version():
+    return SimpleNamespace(config=SimpleNamespace(runtime=RUNTIME))
+
+
+class _Endpoint:
+    def __init__(self, clock: _Clock, startup_time: float):
+        self.clock = clock
+        self.startup_time = startup_time
+
+    def wait_for_startup(self):
+        self.clock.advance(self.startup_time)
+
+
+class _Executor:
+    """Fake Docker runtime executor, which starts a container and waits for the runtime"""
+
+    def __init__(self, clock: _Clock, function_version, container_time: float, startup_time: float):
+        self.clock = clock
+        self.function_version = function_version
+        self.container_time = container_time
+        self.executor_endpoint = _Endpoint(clock, startup_time)
+
+    def start(self, env_vars: dict[str, str]):
+        self.clock.advance(self.container_time)
+        tracked_wait_for_startup(_Endpoint.wait_for_startup, self.executor_endpoint)
+
+
+def _phase(phase: str, provisioning_type: str = "on-demand") -> tuple[float, float]:
+    labels = {"phase": phase, "runtime": RUNTIME, "provisioning_type": provisioning_type}
+    count = REGISTRY.get_sample_value(f"{METRIC_NAME}_count", labels) or 0
+    total = REGISTRY.get_sample_value(f"{METRIC_NAME}_sum", labels) or 0
+    return count, total
+
+
+def test_container_start_and_runtime_init_phases(clock, function_version):
+    container_start, runtime_init = _phase("container_start"), _phase("runtime_init")
+    executor = _Executor(clock, function_version, container_time=1.5, startup_time=0.25)
+
+    tracked_docker_start(_Executor.start, executor, {"AWS_LAMBDA_INITIALIZATION_TYPE": "on-demand"})
+
+    # the runtime initialisation is not part of the container start
+    assert _phase("container_start") == (container_start[0] + 1, container_start[1] + 1.5)
+    assert _phase("runtime_init") == (runtime_init[0] + 1, runtime_init[1] + 0.25)
+
+
+def test_environment_setup_and_first_invocation_phases(clock, function_version):
+    environment_setup, first_invocation = _phase("environment_setup"), _phase("first_invocation")
+    executor = _Executor(clock, function_version, container_time=1.5, startup_time=0.25)
+    environment = SimpleNamespace(
+        function_version=function_version,
+        initialization_type="on-demand",
+        runtime_executor=executor,
+    )
+
+    def _start(env):
+        tracked_docker_start(_Executor.start, env.runtime_executor, {})
+        clock.advance(0.5)
+
+    tracked_environment_start(_start, environment)
+    for _ in range(3):
+        tracked_environment_invoke(lambda *_: clock.advance(0.5), environment, None)
+
+    # the phases are disjoint, i.e., the environment setup excludes the start of the executor
+    assert _phase("environment_setup") == (environment_setup[0] + 1, environment_setup[1] + 0.5)
+    # only the first invocation is part of the cold start
+    assert _phase("first_invocation") == (first_invocation[0] + 1, first_invocation[1] + 0.5)
+
+
+def test_first_invocation_of_provisioned_environment_not_observed(clock, function_version):
+    first_invocation = _phase("first_invocation", "provisioned-concurrency")
+    environment = SimpleNamespace(
+        function_version=function_version, initialization_type="provisioned-concurrency"
+    )
+
+    tracked_environment_invoke(lambda *_: clock.advance(0.5), environment, None)
+
+    assert _phase("first_invocation", "provisioned-concurrency") == first_invocation
@@ -0,0 +1,107 @@
+"""
+Unit tests for the incremental counting of Lambda environments in the AssignmentService.
+"""
+
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from localstack_prometheus.instruments.lambda_ import CountedEnvironmentRegistry
+
+ON_DEMAND = "on-demand"
+PROVISIONED = "provisioned-concurrency"
+
+
+def _environment(initialization_type: str = ON_DEMAND):
+    return SimpleNamespace(initialization_type=initialization_type)
+
+
+def _counts(registry: CountedEnvironmentRegistry, version_manager_id: str = "fn-1") -> tuple:
+    return (
+        registry.counts.count_version(version_manager_id, ON_DEMAND),
+        registry.counts.count_version(version_manager_id, PROVISIONED),
+    )
+
+
+def test_add_and_replace_environments():
+    registry = CountedEnvironmentRegistry()
+    registry["fn-1"]["env-1"] = _environment()
+    registry["fn-1"]["env-2"] = _environment(PROVISIONED)
+    registry["fn-2"]["env-3"] = _environment()
+    assert _counts(registry) == (1, 1)
+    assert registry.counts.count_service(ON_DEMAND) == 2
+
+    # replacing an environment with the same id counts it once, by its new provisioning type
+    registry["fn-1"]["env-1"] = _environment(PROVISIONED)
+    assert _counts(registry) == (0, 2)
+    assert registry.counts.count_service(ON_DEMAND) == 1
+
+
+def test_remove_environments():
+    registry = CountedEnvironmentRegistry()
+    environments = registry["fn-1"]
+    environments.update({f"env-{i}": _environment() for i in range(5)})
+    assert _counts(registry) == (5, 0)
+
+    del environments["env-0"]
+    assert environments.pop("env-1") is not None
+    assert environments.pop("env-1", None) is None
+    with pytest.raises(KeyError):
+        environments.pop("env-1")
+    environments.popitem()
+    assert _counts(registry) == (2, 0)
+
+    environments.clear()
+    assert _counts(registry) == (0, 0)
+    assert environments == {}
+
+
+def test_setdefault_counts_added_environments_only():
+    registry = CountedEnvironmentRegistry()
+    environment = _environment()
+    assert registry["fn-1"].setdefault("env-1", environment) is environment
+    assert registry["fn-1"].setdefault("env-1", _environment(PROVISIONED)) is environment
+    assert _counts(registry) == (1, 0)
+
+
+def test_concurrent_stop_of_environment_counted_once():
+    registry = CountedEnvironmentRegistry()
+    environments = registry["fn-1"]
+    for i in range(100):
+        environments[f"env-{i}"] = _environment()
+    barrier = threading.Barrier(8)
+
+    def _stop():
+        barrier.wait()
+        for i in range(100):
+            environments.pop(f"env-{i}", None)
+
+    threads = [threading.Thread(target=_stop) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert _counts(registry) == (0, 0)
+    assert registry.counts.count_service(ON_DEMAND) == 0
+
+
+def test_registry_updates_keep_counts_consistent():
+    registry = CountedEnvironmentRegistry()
+    registry["fn-1"]["env-1"] = _environment()
+    # plain dicts of environments are counted once set
+    registry["fn-2"] = {"env-2": _environment(), "env-3": _environment()}
+    assert _counts(registry, "fn-2") == (2, 0)
+
+    # replaced or removed environments are not counted anymore, even if changed afterwards
+    previous = registry["fn-2"]
+    registry["fn-2"] = {"env-4": _environment()}
+    previous["env-5"] = _environment()
+    assert _counts(registry, "fn-2") == (1, 0)
+    removed = registry.pop("fn-1")
+    removed.pop("env-1")
+    assert _counts(registry, "fn-1") == (0, 0)
+
+    assert registry.setdefault("fn-3") is registry["fn-3"]
+    registry.clear()
+    assert registry.counts.count_service(ON_DEMAND) == 0
@@ -0,0 +1,57 @@
+"""
+Unit tests for the cache of labelled metric children.
+"""
+
+from prometheus_client import CollectorRegistry, Counter
+
+from localstack_prometheus.metrics.util import LabelChildCache
+
+
+class _CountingMetric:
+    """Wraps a labelled metric, and counts the resolved children."""
+
+    def __init__(self, metric: Counter):
+        self.metric = metric
+        self.calls = 0
+
+    def labels(self, *labelvalues: str):
+        self.calls += 1
+        return self.metric.labels(*labelvalues)
+
+
+def _metric() -> _CountingMetric:
+    registry = CollectorRegistry()
+    return _CountingMetric(
+        Counter("test_requests", "", ["service", "operation"], registry=registry)
+    )
+
+
+def test_cached_children_resolved_once():
+    metric = _metric()
+    cache = LabelChildCache(metric)
+
+    child = cache.labels("sqs", "SendMessage")
+    assert cache.labels("sqs", "SendMessage") is child
+    assert metric.calls == 1
+    assert child is metric.metric.labels("sqs", "SendMessage")
+
+    assert cache.labels("sqs", "ReceiveMessage") is not child
+    assert metric.calls == 2
+
+
+def test_cache_cleared_at_maxsize():
+    metric = _metric()
+    cache = LabelChildCache(metric, maxsize=2)
+    first = cache.labels("sqs", "SendMessage")
+    cache.labels("sqs", "ReceiveMessage")
+    assert len(cache._children) == 2
+
+    # the whole cache is cleared once it is full, instead of evicting single entries
+    cache.labels("sqs", "DeleteMessage")
+    assert list(cache._children) == [("sqs", "DeleteMessage")]
+    assert metric.calls == 3
+
+    # evicted children are resolved again, to the same child of the metric
+    assert cache.labels("sqs", "SendMessage") is first
+    assert metric.calls == 4
+    assert len(cache._children) == 2
@@ -0,0 +1,121 @@
+"""
+Unit tests for the instrumentation of ESM senders, with synthetic event batches of each source.
+"""
+
+import pytest
+
+pytest.importorskip("localstack.pro.core")
+
+from prometheus_client import REGISTRY, CollectorRegistry, Histogram  # noqa: E402
+from prometheus_client.utils import floatToGoString  # noqa: E402
+
+from localstack_prometheus.instruments import sender  # noqa: E402
+from localstack_prometheus.instruments.sender import (  # noqa: E402
+    KAFKA_EVENT_SOURCES,
+    get_event_timestamps,
+    tracked_send_events,
+)
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR  # noqa: E402
+
+NOW = 1_700_000_000.0
+# propagation delays in seconds, covering all buckets of the histogram
+DELAYS = [0.001, 0.02, 0.3, 2, 10, 45, 120, 600, 1200, 5000]
+BUCKETS = [0.005, 0.05, 0.5, 5, 30, 60, 300, 900, 3600]
+METRIC_NAME = "localstack_event_propagation_delay_seconds"
+
+
+class _Sender:
+    def __init__(self, event_target: str):
+        self._event_target = event_target
+
+    def event_target(self) -> str:
+        return self._event_target
+
+
+def _dynamodb_events() -> list[dict]:
+    return [
+        {"eventSource": "aws:dynamodb", "dynamodb": {"ApproximateCreationDateTime": NOW - delay}}
+        for delay in DELAYS
+    ]
+
+
+def _kinesis_events() -> list[dict]:
+    return [
+        {"eventSource": "aws:kinesis", "kinesis": {"approximateArrivalTimestamp": NOW - delay}}
+        for delay in DELAYS
+    ]
+
+
+def _sqs_events() -> list[dict]:
+    return [
+        {"eventSource": "aws:sqs", "attributes": {"SentTimestamp": str(int((NOW - delay) * 1000))}}
+        for delay in DELAYS
+    ]
+
+
+def _kafka_events() -> dict:
+    records = [{"timestamp": int((NOW - delay) * 1000)} for delay in DELAYS]
+    # records are split by topic-partition key
+    return {"eventSource": "aws:kafka", "records": [records[:4], records[4:]]}
+
+
+BATCHES = {
+    "aws:dynamodb": _dynamodb_events,
+    "aws:kinesis": _kinesis_events,
+    "aws:sqs": _sqs_events,
+    "aws:kafka": _kafka_events,
+}
+
+
+def _observe_per_event(histogram: Histogram, events: list, event_source: str):
+    """The previous approach: parse the timestamp of every event, and observe it individually."""
+    for event in events:
+        if dynamodb := event.get("dynamodb", {}):
+            histogram.observe(NOW - float(dynamodb["ApproximateCreationDateTime"]))
+        elif kinesis := event.get("kinesis", {}):
+            histogram.observe(NOW - float(kinesis["approximateArrivalTimestamp"]))
+        elif attributes := event.get("attributes", {}):
+            histogram.observe(NOW - float(attributes["SentTimestamp"]) / 1000.0)
+        elif event_source in KAFKA_EVENT_SOURCES:
+            histogram.observe(NOW - float(event["timestamp"]) / 1000.0)
+
+
+def _samples(registry: CollectorRegistry, labels: dict) -> tuple[list[float], float]:
+    buckets = [
+        registry.get_sample_value(f"{METRIC_NAME}_bucket", {**labels, "le": floatToGoString(bound)})
+        for bound in BUCKETS + [float("inf")]
+    ]
+    return buckets, registry.get_sample_value(f"{METRIC_NAME}_sum", labels)
+
+
+@pytest.fixture(autouse=True)
+def fixed_time(monkeypatch):
+    monkeypatch.setattr(sender.time, "time", lambda: NOW)
+
+
+@pytest.mark.parametrize("event_source", list(BATCHES))
+def test_batched_delays_equal_per_event_observations(event_source):
+    events = BATCHES[event_source]()
+    event_target = f"test-target-{event_source}"
+    tracked_send_events(lambda _, batch: batch, _Sender(event_target), events)
+    METRICS_ACCUMULATOR.merge()
+
+    registry = CollectorRegistry()
+    expected = Histogram(METRIC_NAME, "", buckets=BUCKETS, registry=registry)
+    if isinstance(events, dict):
+        events = sum(events["records"], [])
+    _observe_per_event(expected, events, event_source)
+
+    buckets, total = _samples(
+        REGISTRY, {"event_source": event_source, "event_target": event_target}
+    )
+    expected_buckets, expected_total = _samples(registry, {})
+    assert buckets == expected_buckets
+    assert buckets[-1] == len(DELAYS)
+    assert total == pytest.approx(expected_total, rel=1e-12)
+
+
+def test_event_timestamps_of_batch_without_timestamps():
+    events = [{"eventSource": "aws:sqs", "attributes": {}}, "not-a-record"]
+    assert get_event_timestamps(events, "aws:sqs") == ("aws:sqs", [])
+    assert get_event_timestamps([], "aws:kinesis") == ("aws:kinesis", [])
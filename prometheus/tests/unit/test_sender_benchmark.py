@@ -0,0 +1,75 @@
+"""
+Microbenchmark for the overhead of the metrics instrumentation of ESM senders.
+
+Sends batches of synthetic SQS events of increasing size to a no-op target, and compares the
+uninstrumented `send_events` with the instrumented one (propagation delays, in-flight events,
+processing duration and processed events). No LocalStack or network access required.
+"""
+
+import time
+
+import pytest
+
+pytest.importorskip("localstack.pro.core")
+
+from localstack_prometheus.instruments.sender import tracked_send_events  # noqa: E402
+from localstack_prometheus.metrics.accumulator import METRICS_ACCUMULATOR  # noqa: E402
+
+NUM_EVENTS = 20_000
+ROUNDS = 3
+
+
+class _Sender:
+    def event_target(self) -> str:
+        return "aws:lambda"
+
+    def send_events(self, events: list[dict]) -> list[dict]:
+        return events
+
+
+def _sqs_batch(size: int) -> list[dict]:
+    sent_timestamp = str(int(time.time() * 1000))
+    return [
+        {"eventSource": "aws:sqs", "attributes": {"SentTimestamp": sent_timestamp}}
+        for _ in range(size)
+    ]
+
+
+def _send_uninstrumented(sender: _Sender, batches: list[list[dict]]):
+    for batch in batches:
+        sender.send_events(batch)
+
+
+def _send_instrumented(sender: _Sender, batches: list[list[dict]]):
+    for batch in batches:
+        tracked_send_events(_Sender.send_events, sender, batch)
+
+
+def _best_time(fn, *args) -> float:
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        fn(*args)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best
+
+
+@pytest.mark.parametrize("batch_size", [1, 10, 100, 1000])
+def test_benchmark_send_events_overhead(batch_size):
+    sender = _Sender()
+    batches = [_sqs_batch(batch_size)] * (NUM_EVENTS // batch_size)
+
+    uninstrumented_time = _best_time(_send_uninstrumented, sender, batches)
+    instrumented_time = _best_time(_send_instrumented, sender, batches)
+    METRICS_ACCUMULATOR.merge()
+
+    overhead = instrumented_time - uninstrumented_time
+    print(
+        f"\n{len(batches)} batches of {batch_size} events | "
+        f"uninstrumented {uninstrumented_time * 1000:.2f}ms | "
+        f"instrumented {instrumented_time * 1000:.2f}ms | "
+        f"overhead per batch {overhead / len(batches) * 1e6:.2f}us | "
+        f"per event {overhead / NUM_EVENTS * 1e6:.3f}us"
+    )
+    assert instrumented_time > uninstrumented_time
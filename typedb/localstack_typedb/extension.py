@@ -23,6 +23,8 @@ class TypeDbExtension(ProxiedDockerContainerExtension):
     DEFAULT_CMD_FLAGS = ["--diagnostics.reporting.metrics=false"]
     # default port for TypeDB HTTP2/gRPC endpoint
     TYPEDB_PORT = 1729
+    # default port for TypeDB HTTP/REST endpoint
+    TYPEDB_HTTP_PORT = 8000
 
     def __init__(self):
         command_flags = (os.environ.get(ENV_CMD_FLAGS) or "").strip()
@@ -30,7 +32,7 @@ class TypeDbExtension(ProxiedDockerContainerExtension):
         http2_ports = [self.TYPEDB_PORT] if is_env_not_false(ENV_HTTP2_PROXY) else []
         super().__init__(
             image_name=self.DOCKER_IMAGE,
-            container_ports=[8000, 1729],
+            container_ports=[self.TYPEDB_HTTP_PORT, self.TYPEDB_PORT],
             host=self.HOST,
             request_to_port_router=self.request_to_port_router,
             command=command_flags,
@@ -47,5 +49,6 @@ class TypeDbExtension(ProxiedDockerContainerExtension):
         return is_typedb_grpc_request
 
     def request_to_port_router(self, request: Request) -> int:
-        # TODO add REST API / gRPC routing based on request
-        return 1729
+        # gRPC requests are forwarded via the HTTP2 proxy, hence all HTTP requests routed
+        # here are targeting the REST API
+        return self.TYPEDB_HTTP_PORT
@@ -1,23 +1,41 @@
 from localstack_extensions.utils.docker import (
+    PortRoutingProxyResource,
     ProxiedDockerContainerExtension,
     ProxyResource,
 )
 from localstack_extensions.utils.h2_proxy import (
+    AsyncTcpForwarder,
+    Http2HeadersParser,
     ProxyRequestMatcher,
     TcpForwarder,
     apply_http2_patches_for_grpc_support,
     get_frames_from_http2_stream,
     get_headers_from_data_stream,
     get_headers_from_frames,
+    register_http2_backend,
+    unregister_http2_backend,
 )
+from localstack_extensions.utils.startup import (
+    STARTUP_COORDINATOR,
+    ContainerStartupCoordinator,
+)
+from localstack_extensions.utils.tcp_protocol_router import TcpSignature
 
 __all__ = [
+    "STARTUP_COORDINATOR",
+    "AsyncTcpForwarder",
+    "ContainerStartupCoordinator",
+    "Http2HeadersParser",
+    "PortRoutingProxyResource",
     "ProxiedDockerContainerExtension",
     "ProxyRequestMatcher",
     "ProxyResource",
     "TcpForwarder",
+    "TcpSignature",
     "apply_http2_patches_for_grpc_support",
     "get_frames_from_http2_stream",
     "get_headers_from_data_stream",
     "get_headers_from_frames",
+    "register_http2_backend",
+    "unregister_http2_backend",
 ]
@@ -1,30 +1,78 @@
+import hashlib
+import json
 import logging
+import math
 import re
+import threading
+import time
 from collections.abc import Callable
+from concurrent.futures import Future
 from functools import cache
+from typing import TYPE_CHECKING
 
 import requests
-from localstack.config import is_env_true
+import urllib3
+from localstack.config import GATEWAY_LISTEN, is_env_true
 from localstack.extensions.api import Extension, http
-from localstack.http import Request
+from localstack.http import Request, Response
 from localstack.utils.container_utils.container_client import (
+    DockerContainerStatus,
     PortMappings,
     SimpleVolumeBind,
 )
 from localstack.utils.docker_utils import DOCKER_CLIENT
 from localstack.utils.net import get_addressable_container_host
-from localstack.utils.sync import retry
+from requests.adapters import HTTPAdapter
 from rolo import route
-from rolo.proxy import Proxy
+from rolo.request import restore_payload
 from rolo.routing import RuleAdapter, WithHost
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred, succeed
+from twisted.internet.interfaces import IListeningPort
+from twisted.python.failure import Failure
 from werkzeug.datastructures import Headers
 
 from localstack_extensions.utils.h2_proxy import (
     apply_http2_patches_for_grpc_support,
+    unregister_http2_backend,
 )
+from localstack_extensions.utils.readiness import ContainerReadinessProbe
+from localstack_extensions.utils.startup import STARTUP_COORDINATOR
+
+if TYPE_CHECKING:
+    from localstack_extensions.utils.tcp_protocol_router import TcpSignature
 
 LOG = logging.getLogger(__name__)
 
+# Maximum number of keep-alive connections per proxied container port
+PROXY_POOL_SIZE = 32
+# Size of the chunks in which response bodies are streamed from the container
+PROXY_CHUNK_SIZE = 64 * 1024
+# Hop-by-hop headers, which apply to a single connection only, and are not forwarded by the proxy
+# (Transfer-Encoding is handled separately, as the body is re-chunked if required)
+HOP_BY_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "proxy-connection",
+    "te",
+    "trailer",
+    "upgrade",
+}
+# Label of kept warm containers, holding the hash of the container configuration
+CONTAINER_CONFIG_HASH_LABEL = "cloud.localstack.extension.config-hash"
+# Value of the Retry-After header of requests received while the container is starting
+STARTUP_RETRY_AFTER = 2
+# Time in seconds before a failed container start is retried
+CONTAINER_START_RETRY_BACKOFF = 5
+
+EXTENSIONS_BACKGROUND_STARTUP = is_env_true("EXTENSIONS_BACKGROUND_STARTUP")
+"""
+Whether to start the containers of all extensions concurrently in the background (see
+`ProxiedDockerContainerExtension.background_start`), instead of blocking LocalStack startup.
+"""
+
 
 class ProxiedDockerContainerExtension(Extension):
     """
@@ -63,12 +111,52 @@ class ProxiedDockerContainerExtension(Extension):
     The function should raise an exception if the health check fails.
     """
     health_check_retries: int
-    """Number of times to retry the health check before giving up."""
+    """
+    Number of times to retry the health check before giving up. Together with health_check_sleep,
+    this determines the time after which the container is considered failed to start.
+    """
     health_check_sleep: float
-    """Time in seconds to sleep between health check retries."""
+    """
+    Maximum time in seconds to sleep between health check retries. Retries start with a short
+    interval after the container is started, which is doubled up to this value.
+    """
+    health_check_log_patterns: list[str] | None = None
+    """
+    Optional regex patterns of container log lines which signal that the container is (about to
+    be) ready, e.g., "Listening on". A matching log line triggers an immediate health check.
+    """
+    lazy_start: bool = False
+    """
+    Whether to start the container on demand, when the first request or TCP connection for this
+    extension is received, instead of at LocalStack startup. Requests and connections received
+    while the container is starting are held until it is ready. Can also be enabled via the
+    `<NAME>_LAZY_START` environment variable.
+    """
+    keep_warm: bool = False
+    """
+    Whether to keep the container running when LocalStack shuts down, and to reuse it on the next
+    startup, provided that its configuration (image, command, environment, volumes, and ports) is
+    unchanged. Avoids the cold start of the container on LocalStack restarts. Can also be enabled
+    via the `<NAME>_KEEP_WARM` environment variable.
+    """
+    background_start: bool = False
+    """
+    Whether to start the container in the background, concurrently with the containers of other
+    extensions (see `startup.STARTUP_COORDINATOR`), instead of blocking LocalStack startup. HTTP
+    requests received while the container is starting are answered with 503 (and a Retry-After
+    header), TCP connections are held until the container is ready. Enabled for all extensions via
+    the `EXTENSIONS_BACKGROUND_STARTUP` environment variable.
+    """
 
     request_to_port_router: Callable[[Request], int] | None
     """Callable that returns the target port for a given request, for routing purposes"""
+    request_to_port_cache_segments: int | None = 1
+    """
+    Number of leading path segments which, together with the host, determine the target port of
+    request_to_port_router (e.g., 1 for "/v1/..."). Routing decisions are cached by host and path
+    prefix, so the router is not invoked for every request. Set to None to disable the cache, if
+    the router inspects other parts of the request.
+    """
     http2_ports: list[int] | None
     """List of ports for which HTTP2 proxy forwarding into the container should be enabled."""
     tcp_ports: list[int] | None
@@ -76,8 +164,51 @@ class ProxiedDockerContainerExtension(Extension):
     List of container ports for raw TCP proxying through the gateway.
     Enables transparent TCP forwarding for protocols that don't use HTTP (e.g., native DB protocols).
 
-    When tcp_ports is set, the extension must implement tcp_connection_matcher() to identify
-    its traffic by inspecting initial connection bytes.
+    When tcp_ports is set, the extension must define tcp_connection_signatures and/or implement
+    tcp_connection_matcher() to identify its traffic by inspecting initial connection bytes.
+    """
+
+    tcp_connection_signatures: list["TcpSignature"] | None = None
+    """
+    Optional byte signatures (byte sequences at fixed offsets) identifying the TCP connections
+    belonging to this extension.
+
+    The signatures of all extensions are compiled into a single dispatch table, which makes the
+    classification of connections independent of the number of registered extensions. Prefer
+    signatures over tcp_connection_matcher() wherever the protocol can be identified this way.
+    """
+
+    tcp_connection_pool_size: int = 0
+    """
+    Number of pre-connected idle connections to the container's TCP port, handed out to claimed
+    TCP connections to save the connection setup for short-lived clients (0 disables the pool).
+    """
+    tcp_connection_pool_idle_timeout: float = 30.0
+    """Time in seconds after which idle pooled TCP connections are closed and replaced."""
+
+    tcp_relay: bool = False
+    """
+    Whether to forward claimed TCP connections via a dedicated relay (see `tcp_relay.TcpRelay`),
+    which moves the data between the sockets in the kernel (via `os.splice` on Linux), instead of
+    copying it through the reactor. Recommended for high-throughput protocols (e.g., bulk loads).
+    """
+
+    tcp_default_backend: bool = False
+    """
+    Whether TCP connections which could not be identified within the detection timeout (see
+    `tcp_protocol_router.TCP_DETECTION_TIMEOUT`) are routed to the container's TCP port, instead of
+    the HTTP handler - e.g., connections of server-speaks-first protocols, whose clients wait for a
+    greeting before sending any data. Should only be enabled by a single extension.
+    """
+
+    tcp_dedicated_listeners: bool = False
+    """
+    Whether the gateway listens on each of the `tcp_ports` for connections to the container (in
+    addition to protocol detection on the main gateway port, if signatures or a matcher are given).
+    Connections on these ports are forwarded without protocol detection, which supports
+    server-speaks-first protocols (e.g., MySQL, SMTP) and avoids the detection latency. The ports
+    need to be exposed by the LocalStack container. Can also be enabled via the environment variable
+    `<NAME>_TCP_DEDICATED_LISTENERS`.
     """
 
     tcp_connection_matcher: Callable[[bytes], bool] | None
@@ -86,6 +217,7 @@ class ProxiedDockerContainerExtension(Extension):
 
     Called with initial connection bytes (up to 512 bytes) to determine if this extension
     should handle the connection. Return True to claim the connection, False otherwise.
+    Ignored if the extension defines tcp_connection_signatures.
     """
 
     def __init__(
@@ -130,14 +262,32 @@ class ProxiedDockerContainerExtension(Extension):
         self.tcp_ports = tcp_ports
         self.main_port = self.container_ports[0]
         self.container_host = get_addressable_container_host()
+        self.lazy_start = self.lazy_start or is_env_true(
+            f"{self.name.upper().replace('-', '_')}_LAZY_START"
+        )
+        self.keep_warm = self.keep_warm or is_env_true(
+            f"{self.name.upper().replace('-', '_')}_KEEP_WARM"
+        )
+        self.background_start = self.background_start or EXTENSIONS_BACKGROUND_STARTUP
+        self.tcp_dedicated_listeners = self.tcp_dedicated_listeners or is_env_true(
+            f"{self.name.upper().replace('-', '_')}_TCP_DEDICATED_LISTENERS"
+        )
+        self._proxy_resource = None
+        self._container_started = False
+        self._start_lock = threading.Lock()
+        self._start_failed_at: float | None = None
+        self._start_waiters: list[Deferred] = []
+        self._tcp_listeners: list[IListeningPort] = []
 
     def update_gateway_routes(self, router: http.Router[http.RouteHandler]):
         if self.path:
             raise NotImplementedError(
                 "Path-based routing not yet implemented for this extension"
             )
-        # note: for simplicity, starting the external container at startup - could be optimized over time ...
-        self.start_container()
+        if self.background_start and not self.lazy_start:
+            STARTUP_COORDINATOR.submit(self.name, self.ensure_container_started)
+        elif not self.lazy_start:
+            self.ensure_container_started()
 
         # Determine if HTTP proxy should be set up. Skip it when all container ports are
         # TCP-only and no host restriction is set, since a catch-all HTTP proxy would
@@ -146,7 +296,23 @@ class ProxiedDockerContainerExtension(Extension):
 
         if uses_http:
             # add resource for HTTP/1.1 requests
-            resource = RuleAdapter(ProxyResource(self.container_host, self.main_port))
+            if self.request_to_port_router:
+                self._proxy_resource = PortRoutingProxyResource(
+                    self.container_host,
+                    self.main_port,
+                    self.request_to_port_router,
+                    cache_segments=self.request_to_port_cache_segments,
+                )
+            else:
+                self._proxy_resource = ProxyResource(
+                    self.container_host, self.main_port
+                )
+            resource = self._proxy_resource
+            if self.lazy_start:
+                resource = _LazyStartResource(resource, self)
+            elif self.background_start:
+                resource = _StartupBarrierResource(resource, self)
+            resource = RuleAdapter(resource)
             if self.host:
                 resource = WithHost(self.host, [resource])
             router.add(resource)
@@ -154,7 +320,11 @@ class ProxiedDockerContainerExtension(Extension):
         # apply patches to serve HTTP/2 requests
         for port in self.http2_ports or []:
             apply_http2_patches_for_grpc_support(
-                self.container_host, port, self.http2_request_matcher
+                self.container_host,
+                port,
+                self.http2_request_matcher,
+                backend_name=self.name,
+                on_connect=self._get_connect_hook(),
             )
 
         # set up raw TCP proxies with protocol detection
@@ -166,22 +336,44 @@ class ProxiedDockerContainerExtension(Extension):
         Set up TCP routing on the LocalStack gateway for this extension.
 
         This method patches the gateway's HTTP protocol handler to intercept TCP
-        connections and allow this extension to claim them via tcp_connection_matcher().
+        connections and allow this extension to claim them via tcp_connection_signatures or
+        tcp_connection_matcher().
         This enables multiple TCP protocols to share the main gateway port (4566).
 
         Uses monkeypatching to intercept dataReceived() before HTTP processing.
         """
         from localstack_extensions.utils.tcp_protocol_router import (
+            configure_tcp_backend,
             patch_gateway_for_tcp_routing,
             register_tcp_extension,
         )
 
-        # Get the connection matcher from the extension
-        matcher = getattr(self, "tcp_connection_matcher", None)
-        if not matcher:
+        # Get the connection signatures and matcher from the extension. A matcher function cannot
+        # be inspected, which disables the HTTP fast path of the gateway - hence it is only
+        # registered for extensions which don't define signatures.
+        signatures = self.tcp_connection_signatures
+        matcher = None if signatures else getattr(self, "tcp_connection_matcher", None)
+        if self.tcp_dedicated_listeners:
+            reactor.callFromThread(self._listen_on_tcp_ports)
+            if not matcher and not signatures and not self.tcp_default_backend:
+                # no protocol detection required on the main gateway port
+                configure_tcp_backend(
+                    self.name,
+                    self.container_host,
+                    self.tcp_ports[0],
+                    pool_size=self.tcp_connection_pool_size,
+                    pool_idle_timeout=self.tcp_connection_pool_idle_timeout,
+                    on_connect=self._get_connect_hook(),
+                    relay=self.tcp_relay,
+                )
+                if self._container_started:
+                    self._start_tcp_backend_pool()
+                return
+        if not matcher and not signatures and not self.tcp_default_backend:
             LOG.warning(
-                "Extension %s has tcp_ports but no tcp_connection_matcher(). "
-                "TCP routing will not work without a matcher.", self.name
+                "Extension %s has tcp_ports but no tcp_connection_matcher() or "
+                "tcp_connection_signatures. TCP routing will not work without a matcher.",
+                self.name,
             )
             return
 
@@ -197,12 +389,51 @@ class ProxiedDockerContainerExtension(Extension):
             matcher=matcher,
             backend_host=self.container_host,
             backend_port=target_port,
+            signatures=signatures,
+            pool_size=self.tcp_connection_pool_size,
+            pool_idle_timeout=self.tcp_connection_pool_idle_timeout,
+            on_connect=self._get_connect_hook(),
+            relay=self.tcp_relay,
+            default=self.tcp_default_backend,
         )
+        if self._container_started:
+            # the container has been started before the extension was registered
+            self._start_tcp_backend_pool()
 
         LOG.info(
-            "Registered TCP extension %s -> %s:%s on gateway", self.name, self.container_host, target_port
+            "Registered TCP extension %s -> %s:%s on gateway",
+            self.name,
+            self.container_host,
+            target_port,
         )
 
+    def _listen_on_tcp_ports(self):
+        """Listen on each of the TCP ports of the container on the gateway (in the reactor thread)."""
+        from localstack_extensions.utils.tcp_protocol_router import (
+            listen_tcp_extension,
+        )
+
+        interface = GATEWAY_LISTEN[0].host if GATEWAY_LISTEN else ""
+        for port in self.tcp_ports:
+            try:
+                self._tcp_listeners.append(
+                    listen_tcp_extension(
+                        self.name, port, self.container_host, port, interface=interface
+                    )
+                )
+            except Exception as e:
+                LOG.warning(
+                    "Unable to listen on port %s for extension %s: %s",
+                    port,
+                    self.name,
+                    e,
+                )
+
+    def _stop_listening_on_tcp_ports(self):
+        listeners, self._tcp_listeners = self._tcp_listeners, []
+        for listener in listeners:
+            listener.stopListening()
+
     def http2_request_matcher(self, headers: Headers) -> bool:
         """
         Define whether an HTTP2 request should be proxied, based on request headers.
@@ -213,7 +444,95 @@ class ProxiedDockerContainerExtension(Extension):
         return False
 
     def on_platform_shutdown(self):
-        self._remove_container()
+        if self.http2_ports:
+            # stop routing HTTP2 requests to the container, and close upstream connections
+            unregister_http2_backend(self.name)
+        if self.keep_warm:
+            LOG.debug("Keeping extension container %s running", self.container_name)
+        else:
+            self._remove_container()
+        if self._proxy_resource:
+            self._proxy_resource.close()
+        if self._tcp_listeners:
+            reactor.callFromThread(self._stop_listening_on_tcp_ports)
+
+    def ensure_container_started(self) -> None:
+        """
+        Start the container, unless it is already running. Blocks until the container is ready,
+        and raises an exception if the container fails to start. A failed start is retried on the
+        next call after `CONTAINER_START_RETRY_BACKOFF` seconds - until then, calls fail right away.
+        """
+        if self._container_started:
+            return
+        with self._start_lock:
+            if self._container_started:
+                return
+            if backoff := self.get_start_retry_backoff():
+                raise RuntimeError(
+                    f"Container {self.container_name} failed to start, retrying in {backoff:.1f}s"
+                )
+            try:
+                self.start_container()
+            except Exception:
+                self._start_failed_at = time.monotonic()
+                raise
+            self._start_failed_at = None
+            self._container_started = True
+            self._start_tcp_backend_pool()
+
+    def get_start_retry_backoff(self) -> float:
+        """Return the time in seconds until a failed container start is retried (0 if none)."""
+        if self._start_failed_at is None:
+            return 0
+        elapsed = time.monotonic() - self._start_failed_at
+        return max(0.0, CONTAINER_START_RETRY_BACKOFF - elapsed)
+
+    def _start_tcp_backend_pool(self):
+        """Start pre-connecting the TCP backend connection pool, once the container is ready."""
+        if not self.tcp_ports or not self.tcp_connection_pool_size:
+            return
+        from localstack_extensions.utils.tcp_protocol_router import (
+            start_tcp_backend_pool,
+        )
+
+        reactor.callFromThread(start_tcp_backend_pool, self.name)
+
+    def _get_connect_hook(self) -> Callable[[], Deferred] | None:
+        """Return the hook which holds TCP/HTTP2 connections until the container is started."""
+        if self.lazy_start or self.background_start:
+            return self._on_container_started
+        return None
+
+    def _on_container_started(self) -> Deferred:
+        """
+        Return a Deferred which fires once the container is ready, submitting the container start
+        to the startup coordinator if required. The Deferred is chained onto the readiness future
+        of the extension, hence no reactor thread is blocked while the container is starting. Must
+        be called from the reactor thread.
+        """
+        if self._container_started:
+            return succeed(None)
+        waiter = Deferred()
+        self._start_waiters.append(waiter)
+        if len(self._start_waiters) == 1:
+            future = STARTUP_COORDINATOR.submit(
+                self.name, self.ensure_container_started
+            )
+            future.add_done_callback(self._on_start_future_done)
+        return waiter
+
+    def _on_start_future_done(self, future: Future):
+        error = future.exception()
+        result = Failure(error) if error else None
+        reactor.callFromThread(self._notify_start_waiters, result)
+
+    def _notify_start_waiters(self, result):
+        waiters, self._start_waiters = self._start_waiters, []
+        for waiter in waiters:
+            if isinstance(result, Failure):
+                waiter.errback(result)
+            else:
+                waiter.callback(None)
 
     @cache
     def start_container(self) -> None:
@@ -231,35 +550,101 @@ class ProxiedDockerContainerExtension(Extension):
         if self.volumes:
             kwargs["volumes"] = self.volumes
 
-        try:
-            DOCKER_CLIENT.run_container(
-                self.image_name,
-                detach=True,
-                remove=True,
-                name=self.container_name,
-                ports=port_mapping,
-                **kwargs,
-            )
-        except Exception as e:
-            LOG.debug("Failed to start container %s: %s", self.container_name, e)
-            # allow running the container in a local server in dev mode
-            if not is_env_true(f"{self.name.upper().replace('-', '_')}_DEV_MODE"):
-                raise
+        container_started = False
+        if self.keep_warm:
+            config_hash = self._get_container_config_hash()
+            kwargs["labels"] = {CONTAINER_CONFIG_HASH_LABEL: config_hash}
+            container_started = self._reuse_warm_container(config_hash)
+
+        if not container_started:
+            try:
+                DOCKER_CLIENT.run_container(
+                    self.image_name,
+                    detach=True,
+                    remove=True,
+                    name=self.container_name,
+                    ports=port_mapping,
+                    **kwargs,
+                )
+                container_started = True
+            except Exception as e:
+                LOG.debug("Failed to start container %s: %s", self.container_name, e)
+                # allow running the container in a local server in dev mode
+                if not is_env_true(f"{self.name.upper().replace('-', '_')}_DEV_MODE"):
+                    raise
 
         # Use custom health check if provided, otherwise default to HTTP GET
         health_check = self.health_check_fn or self._default_health_check
 
+        probe = ContainerReadinessProbe(
+            self.name,
+            self.container_name,
+            health_check,
+            timeout=self.health_check_retries * self.health_check_sleep,
+            max_interval=self.health_check_sleep,
+            log_patterns=self.health_check_log_patterns,
+            # the container is not checked if it is served by a local server in dev mode
+            check_container=container_started,
+        )
         try:
-            retry(
-                health_check,
-                retries=self.health_check_retries,
-                sleep=self.health_check_sleep,
-            )
+            probe.wait()
         except Exception as e:
             LOG.info("Failed to connect to container %s: %s", self.container_name, e)
             self._remove_container()
             raise
 
+    def _get_container_config_hash(self) -> str:
+        """Return a hash of the configuration of the container, to identify reusable containers."""
+        config = {
+            "image": self.image_name,
+            "command": self.command,
+            "env_vars": self.env_vars,
+            "volumes": self.volumes,
+            "ports": self.container_ports,
+        }
+        config_json = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(config_json.encode()).hexdigest()
+
+    def _reuse_warm_container(self, config_hash: str) -> bool:
+        """
+        Return whether a running container with the given configuration hash can be reused. An
+        existing container with a different configuration (or which is not running) is removed,
+        whereas a container which cannot be inspected is left as is.
+        """
+        try:
+            status = DOCKER_CLIENT.get_container_status(self.container_name)
+            if status == DockerContainerStatus.NON_EXISTENT:
+                return False
+            labels = {}
+            if status == DockerContainerStatus.UP:
+                container = DOCKER_CLIENT.inspect_container(self.container_name)
+                labels = (container.get("Config") or {}).get("Labels") or {}
+        except Exception as e:
+            # the container is left alone, as it is unknown whether it can be reused
+            LOG.warning(
+                "Unable to inspect extension container %s, not reusing it: %s",
+                self.container_name,
+                e,
+            )
+            return False
+
+        if status != DockerContainerStatus.UP:
+            LOG.info(
+                "Replacing extension container %s, which is not running (status: %s)",
+                self.container_name,
+                status.name,
+            )
+        elif labels.get(CONTAINER_CONFIG_HASH_LABEL) == config_hash:
+            LOG.info("Reusing warm extension container %s", self.container_name)
+            return True
+        else:
+            LOG.info(
+                "Replacing extension container %s with changed configuration",
+                self.container_name,
+            )
+        self._remove_container()
+        return False
+
     def _default_health_check(self) -> None:
         """Default health check: HTTP GET request to the main port."""
         response = requests.get(f"http://{self.container_host}:{self.main_port}/")
@@ -272,35 +657,289 @@ class ProxiedDockerContainerExtension(Extension):
         )
 
 
+class _LazyStartResource:
+    """
+    Proxy resource wrapper, which ensures that the container is started before proxying. If the
+    container fails to start, requests are rejected with 503 (Service Unavailable) until the start
+    is retried (see `CONTAINER_START_RETRY_BACKOFF`).
+    """
+
+    def __init__(self, resource, extension: ProxiedDockerContainerExtension):
+        self.resource = resource
+        self.extension = extension
+
+    @route("/<path:path>")
+    def index(self, request: Request, path: str, *args, **kwargs):
+        try:
+            self.extension.ensure_container_started()
+        except Exception as e:
+            LOG.warning("Unable to start container for request %s: %s", request.path, e)
+            retry_after = max(
+                STARTUP_RETRY_AFTER, math.ceil(self.extension.get_start_retry_backoff())
+            )
+            return Response(
+                "Extension container failed to start",
+                status=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+        return self.resource.index(request, path, *args, **kwargs)
+
+
+class _StartupBarrierResource:
+    """
+    Proxy resource wrapper, which rejects requests with 503 (Service Unavailable) until the
+    container started in the background is ready. Failed startups are retried in the background.
+    """
+
+    def __init__(self, resource, extension: ProxiedDockerContainerExtension):
+        self.resource = resource
+        self.extension = extension
+
+    @route("/<path:path>")
+    def index(self, request: Request, path: str, *args, **kwargs):
+        if not self.extension._container_started:
+            future = STARTUP_COORDINATOR.submit(
+                self.extension.name, self.extension.ensure_container_started
+            )
+            if not future.done() or future.exception():
+                return Response(
+                    f"Extension {self.extension.name} is starting",
+                    status=503,
+                    headers={"Retry-After": str(STARTUP_RETRY_AFTER)},
+                )
+        return self.resource.index(request, path, *args, **kwargs)
+
+
+def _get_hop_by_hop_headers(headers) -> set[str]:
+    """
+    Return the (lower-case) names of the hop-by-hop headers to remove from the given headers, i.e.,
+    the `HOP_BY_HOP_HEADERS` and any further headers listed in the Connection header.
+    """
+    names = set(HOP_BY_HOP_HEADERS)
+    for value in headers.get("Connection", "").split(","):
+        if value := value.strip().lower():
+            names.add(value)
+    return names
+
+
+def _is_body_decoded(request: Request) -> bool:
+    """
+    Return whether the body of the request has been decoded in the handler chain, i.e., whether its
+    Content-Encoding (e.g., gzip) has been replaced (by "identity", see LocalStack's ContentDecoder),
+    hence the input stream of the request no longer matches the received body.
+    """
+    received = request.environ.get("HTTP_CONTENT_ENCODING", "").strip().lower()
+    if not received or received == "identity":
+        return False
+    return request.headers.get("Content-Encoding", "").strip().lower() != received
+
+
+class _RequestBodyStream:
+    """
+    File-like view of a request's input stream with a known length, which allows `requests` to
+    stream the body to the target (with a Content-Length header) instead of reading it into memory.
+    """
+
+    def __init__(self, stream, length: int):
+        self.stream = stream
+        self.length = length
+
+    def read(self, size: int = -1) -> bytes:
+        return self.stream.read(size)
+
+    def __len__(self):
+        return self.length
+
+
 class ProxyResource:
     """
     Simple proxy resource that forwards incoming requests from the
     LocalStack Gateway to the target Docker container.
+
+    Uses a long-lived HTTP session with a pool of keep-alive connections to the container, and
+    streams request and response bodies through the proxy, instead of reading them into memory.
     """
 
     host: str
     port: int
 
-    def __init__(self, host: str, port: int):
+    def __init__(self, host: str, port: int, pool_size: int = PROXY_POOL_SIZE):
         self.host = host
         self.port = port
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
 
     @route("/<path:path>")
     def index(self, request: Request, path: str, *args, **kwargs):
         return self._proxy_request(request, forward_path=f"/{path}")
 
     def _proxy_request(self, request: Request, forward_path: str, *args, **kwargs):
-        base_url = f"http://{self.host}:{self.port}"
-        proxy = Proxy(forward_base_url=base_url)
-
-        # update content length (may have changed due to content compression)
-        if request.method not in ("GET", "OPTIONS"):
-            request.headers["Content-Length"] = str(len(request.data))
+        # connection-specific headers of the client must not affect the pooled connections
+        hop_by_hop_headers = _get_hop_by_hop_headers(request.headers)
+        headers = {
+            key: value
+            for key, value in request.headers.items()
+            if key.lower() not in hop_by_hop_headers
+        }
+
+        if client_ip := request.remote_addr:
+            if xff := request.headers.get("X-Forwarded-For"):
+                headers["X-Forwarded-For"] = f"{xff}, {client_ip}"
+            else:
+                headers["X-Forwarded-For"] = client_ip
 
         # make sure we're forwarding the correct Host header
-        request.headers["Host"] = f"localhost:{self.port}"
+        headers["Host"] = f"localhost:{self.port}"
+
+        # urllib3 sets a default Accept-Encoding header, unless explicitly skipped
+        if not request.headers.get("Accept-Encoding"):
+            headers["Accept-Encoding"] = urllib3.util.SKIP_HEADER
+
+        # the content length is set by `requests` for the forwarded body (it may have changed due
+        # to content compression), and Transfer-Encoding is a hop-by-hop header
+        headers.pop("Content-Length", None)
+        headers.pop("Transfer-Encoding", None)
+        body = self._get_request_body(request)
 
         # forward the request to the target
-        result = proxy.forward(request, forward_path=forward_path)
+        response = self.session.request(
+            method=request.method,
+            url=f"http://{self.host}:{self.port}{forward_path}",
+            params=list(request.args.items(multi=True)),
+            headers=headers,
+            data=body,
+            stream=True,
+        )
+        return self._to_response(request, response)
+
+    @staticmethod
+    def _get_request_body(request: Request) -> bytes | _RequestBodyStream:
+        """
+        Return the body of the request to forward. The input stream of the request is streamed
+        as-is, unless it has already been consumed, or changed by content decoding.
+        """
+        content_length = request.content_length
+        stream_consumed = (
+            getattr(request, "_cached_data", None) is not None
+            or "form" in request.__dict__
+        )
+        if stream_consumed or _is_body_decoded(request) or content_length is None:
+            return restore_payload(request)
+        return _RequestBodyStream(request.stream, content_length)
+
+    @staticmethod
+    def _to_response(request: Request, response: requests.Response) -> Response:
+        # use the raw headers, to preserve repeated headers like Set-Cookie
+        response_headers = Headers()
+        hop_by_hop_headers = _get_hop_by_hop_headers(response.raw.headers)
+        for key, value in response.raw.headers.iteritems():
+            if key.lower() not in hop_by_hop_headers:
+                response_headers.add(key, value)
+
+        if request.method == "HEAD":
+            # keep the original content length of HEAD responses
+            result = Response(status=response.status_code, headers=response_headers)
+            result.content_length = response.headers.get("Content-Length", 0)
+            response.close()
+            return result
+
+        transfer_encoding = response_headers.get("Transfer-Encoding", "")
+        if "chunked" in transfer_encoding:
+            # the response is re-chunked by the web server, if required
+            response_headers.pop("Content-Length", None)
+            response_headers.setlist(
+                "Transfer-Encoding",
+                [
+                    value.strip()
+                    for value in transfer_encoding.split(",")
+                    if value.strip().lower() != "chunked"
+                ],
+            )
+
+        def _stream_body():
+            try:
+                yield from response.raw.stream(PROXY_CHUNK_SIZE, decode_content=False)
+            finally:
+                # returns the connection to the pool (or discards it, if not fully consumed)
+                response.close()
+
+        return Response(
+            response=_stream_body(),
+            status=response.status_code,
+            headers=response_headers,
+        )
+
+    def close(self):
+        self.session.close()
+
 
-        return result
+class PortRoutingProxyResource:
+    """
+    Proxy resource that forwards incoming requests to one of multiple ports of the target Docker
+    container, as determined per request by a port router. Each target port is served by its own
+    ProxyResource (with a separate connection pool).
+
+    Routing decisions are cached by host and path prefix (the first `cache_segments` segments of
+    the path), hence the router is only invoked for the first request of each prefix.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        default_port: int,
+        port_router: Callable[[Request], int],
+        cache_segments: int | None = 1,
+        cache_size: int = 1024,
+    ):
+        self.host = host
+        self.default_port = default_port
+        self.port_router = port_router
+        self.cache_segments = cache_segments
+        self.cache_size = cache_size
+        self._route_cache: dict[tuple[str, str], int] = {}
+        self._resources: dict[int, ProxyResource] = {}
+        self._mutex = threading.Lock()
+
+    @route("/<path:path>")
+    def index(self, request: Request, path: str, *args, **kwargs):
+        resource = self._get_resource(self._get_target_port(request))
+        return resource._proxy_request(request, forward_path=f"/{path}")
+
+    def _get_target_port(self, request: Request) -> int:
+        cache_key = None
+        if self.cache_segments is not None:
+            prefix = "/".join(request.path.split("/")[: self.cache_segments + 1])
+            cache_key = (request.host, prefix)
+            if (port := self._route_cache.get(cache_key)) is not None:
+                return port
+
+        try:
+            port = self.port_router(request)
+        except Exception as e:
+            LOG.warning(
+                "Error routing request %s to container port, using default port %s: %s",
+                request.path,
+                self.default_port,
+                e,
+            )
+            return self.default_port
+        port = port or self.default_port
+
+        if cache_key:
+            if len(self._route_cache) >= self.cache_size:
+                self._route_cache.clear()
+            self._route_cache[cache_key] = port
+        return port
+
+    def _get_resource(self, port: int) -> ProxyResource:
+        if resource := self._resources.get(port):
+            return resource
+        with self._mutex:
+            if port not in self._resources:
+                self._resources[port] = ProxyResource(self.host, port)
+            return self._resources[port]
+
+    def close(self):
+        for resource in self._resources.values():
+            resource.close()
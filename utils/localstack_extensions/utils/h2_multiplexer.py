@@ -0,0 +1,552 @@
+"""
+Stream-level multiplexing for proxied HTTP2 connections.
+
+In contrast to the connection-level forwarding in `h2_proxy.ForwardingBuffer` (where the first
+request on a connection determines where the entire connection is routed), the multiplexer routes
+each individual HTTP2 stream: the client connection is terminated by the gateway's H2Connection,
+streams matching a registered backend are proxied over a single upstream HTTP2 connection shared
+per backend (with their own stream IDs and flow control windows), and all other streams on the
+same client connection are served by the gateway as usual.
+
+Proxied streams are registered with the gateway's H2Connection in place of Twisted's own streams,
+which relies on some private attributes of the H2Connection (see `H2_CONNECTION_INTERNALS`). If
+these are not available (e.g., with a different Twisted version), stream multiplexing is disabled,
+and connections are forwarded as a whole.
+"""
+
+import logging
+from collections import deque
+from collections.abc import Callable
+
+import h2.config
+import h2.connection
+import h2.errors
+import h2.events
+import h2.exceptions
+import priority
+from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.protocol import ClientFactory, Protocol
+from twisted.web._http2 import H2Connection
+
+LOG = logging.getLogger(__name__)
+
+# Global pool of upstream connections, keyed by (backend_host, backend_port)
+_upstream_connections: dict[tuple[str, int], "UpstreamH2Connection"] = {}
+
+H2_CONNECTION_INTERNALS = (
+    "_outboundStreamQueues",
+    "_requestDone",
+    "_streamCleanupCallbacks",
+    "_streamIsActive",
+    "_tryToWriteControlData",
+    "openStreamWindow",
+    "priority",
+)
+"""Attributes of the Twisted H2Connection which proxied streams depend on."""
+
+_stream_multiplexing_supported: bool | None = None
+
+
+def supports_stream_multiplexing(connection: H2Connection) -> bool:
+    """
+    Return whether streams of the given H2Connection can be proxied, i.e., whether the connection
+    provides all the `H2_CONNECTION_INTERNALS`. Checked once, on the first connection.
+    """
+    global _stream_multiplexing_supported
+    if _stream_multiplexing_supported is None:
+        missing = [
+            name for name in H2_CONNECTION_INTERNALS if not hasattr(connection, name)
+        ]
+        _stream_multiplexing_supported = not missing
+        if missing:
+            LOG.warning(
+                "HTTP2 stream multiplexing is not supported by this Twisted version (missing %s) "
+                "- forwarding entire connections instead",
+                ", ".join(missing),
+            )
+    return _stream_multiplexing_supported
+
+
+class _FlowControlledSender:
+    """
+    Queue of outbound data for a single HTTP2 stream, which is written to the given h2 connection
+    as far as the flow control windows and maximum frame size permit.
+    """
+
+    def __init__(self, conn: h2.connection.H2Connection, stream_id: int):
+        self.conn = conn
+        self.stream_id = stream_id
+        # list of entries [data, on_sent_callback]
+        self.chunks = deque()
+        self.end_requested = False
+        self.trailers = None
+        self.ended = False
+
+    def send(self, data: bytes, on_sent: Callable[[], None] | None = None):
+        self.chunks.append([data, on_sent])
+
+    def end_stream(self, trailers: list | None = None):
+        self.end_requested = True
+        self.trailers = trailers
+
+    def flush(self):
+        """Write as much of the queued data as possible to the h2 connection."""
+        while self.chunks:
+            data, on_sent = self.chunks[0]
+            window = min(
+                self.conn.local_flow_control_window(self.stream_id),
+                self.conn.max_outbound_frame_size,
+            )
+            if data and window <= 0:
+                return
+            if len(data) > window:
+                self.conn.send_data(self.stream_id, data[:window])
+                self.chunks[0][0] = data[window:]
+                continue
+            if data:
+                self.conn.send_data(self.stream_id, data)
+            self.chunks.popleft()
+            if on_sent:
+                on_sent()
+
+        if self.end_requested and not self.ended:
+            self.ended = True
+            if self.trailers:
+                self.conn.send_headers(self.stream_id, self.trailers, end_stream=True)
+            else:
+                self.conn.end_stream(self.stream_id)
+
+
+class ProxiedH2Stream:
+    """
+    A stream of a client HTTP2 connection which is proxied to an upstream backend connection.
+
+    Registered in place of a Twisted `H2Stream` in the streams of the client's H2Connection,
+    hence it receives the request events of the stream from the client connection. Responses
+    received from the upstream connection are written back to the client connection directly.
+    """
+
+    def __init__(
+        self,
+        stream_id: int,
+        connection: H2Connection,
+        upstream: "UpstreamH2Connection",
+    ):
+        self.streamID = stream_id
+        self.connection = connection
+        self.upstream = upstream
+        self.upstream_stream_id: int | None = None
+        self.sender = _FlowControlledSender(connection.conn, stream_id)
+        self.request_complete = False
+        self.closed = False
+
+    # methods called by the client H2Connection
+
+    def receiveDataChunk(self, data: bytes, flowControlledLength: int):
+        def _on_sent():
+            # hand the window back to the client, once the data was passed on to the backend
+            self.connection.openStreamWindow(self.streamID, flowControlledLength)
+            self.connection._tryToWriteControlData()
+
+        self.upstream.send_request_data(self, data, _on_sent)
+
+    def requestComplete(self):
+        self.request_complete = True
+        self.upstream.end_request(self)
+
+    def connectionLost(self, reason):
+        # the stream was reset by the client, or the client connection was lost
+        if not self.closed:
+            self.closed = True
+            self.upstream.cancel_stream(self)
+
+    def windowUpdated(self):
+        self._flush()
+
+    def flowControlBlocked(self):
+        pass
+
+    # methods called by the upstream connection
+
+    def response_headers(self, headers: list, end_stream: bool = False):
+        if self.closed:
+            return
+        try:
+            self.connection.conn.send_headers(
+                self.streamID, headers, end_stream=end_stream
+            )
+        except h2.exceptions.StreamClosedError:
+            return
+        if end_stream:
+            self.sender.ended = True
+            self._finish()
+        else:
+            self.connection._tryToWriteControlData()
+
+    def response_data(self, data: bytes, on_sent: Callable[[], None]):
+        if self.closed:
+            on_sent()
+            return
+        self.sender.send(data, on_sent)
+        self._flush()
+
+    def response_ended(self, trailers: list | None = None):
+        if self.closed:
+            return
+        self.sender.end_stream(trailers)
+        self._flush()
+
+    def reset(self, error_code: int = h2.errors.ErrorCodes.INTERNAL_ERROR):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.connection.conn.reset_stream(self.streamID, error_code=error_code)
+        except h2.exceptions.StreamClosedError:
+            pass
+        if self.connection._tryToWriteControlData():
+            self._done()
+
+    def _flush(self):
+        if self.closed:
+            return
+        try:
+            self.sender.flush()
+        except h2.exceptions.StreamClosedError:
+            self.closed = True
+            self.upstream.cancel_stream(self)
+            return
+        if self.sender.ended:
+            self._finish()
+        else:
+            self.connection._tryToWriteControlData()
+
+    def _finish(self):
+        """Clean up the stream, after the response has been sent completely."""
+        self.closed = True
+        if not self.request_complete:
+            # the backend has responded before the request was complete - ask the client
+            # to stop sending, as any further request data is discarded (RFC 9113, 8.1)
+            try:
+                self.connection.conn.reset_stream(
+                    self.streamID, error_code=h2.errors.ErrorCodes.NO_ERROR
+                )
+            except h2.exceptions.StreamClosedError:
+                pass
+        if self.connection._tryToWriteControlData():
+            self._done()
+
+    def _done(self):
+        if self.connection._streamIsActive(self.streamID):
+            self.connection._requestDone(self.streamID)
+
+
+class _UpstreamH2Protocol(Protocol):
+    """Twisted protocol for the TCP connection of an `UpstreamH2Connection`."""
+
+    upstream: "UpstreamH2Connection"
+
+    def connectionMade(self):
+        self.upstream._connected(self)
+
+    def dataReceived(self, data):
+        self.upstream._data_received(data)
+
+    def connectionLost(self, reason=None):
+        self.upstream._connection_lost(reason)
+
+
+class _UpstreamH2Factory(ClientFactory):
+    protocol = _UpstreamH2Protocol
+
+    def __init__(self, upstream: "UpstreamH2Connection"):
+        self.upstream = upstream
+
+    def buildProtocol(self, addr):
+        protocol = super().buildProtocol(addr)
+        protocol.upstream = self.upstream
+        return protocol
+
+    def clientConnectionFailed(self, connector, reason):
+        self.upstream._connection_lost(reason)
+
+
+class UpstreamH2Connection:
+    """
+    HTTP2 client connection to a backend, shared by all streams proxied to this backend.
+
+    Output is produced via the h2 state machine right away, and written to the transport as soon as
+    the TCP connection is established. Stream IDs and flow control windows on this connection are
+    independent of those of the client connections, which are mapped per `ProxiedH2Stream`.
+    """
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=True, header_encoding=None)
+        )
+        self.conn.initiate_connection()
+        self.streams: dict[int, ProxiedH2Stream] = {}
+        self.senders: dict[int, _FlowControlledSender] = {}
+        # streams waiting for a free slot, due to the backend's concurrent streams limit -
+        # list of entries [stream, request_headers, queued_operations]
+        self.pending_streams: deque[list] = deque()
+        self.transport = None
+        self.closed = False
+        self._connector = reactor.connectTCP(host, port, _UpstreamH2Factory(self))
+
+    # stream management, called for proxied streams of client connections
+
+    def start_stream(self, stream: ProxiedH2Stream, headers: list):
+        if self.closed:
+            stream.reset(h2.errors.ErrorCodes.REFUSED_STREAM)
+            return
+        if self.pending_streams or not self._has_free_stream_slot():
+            self.pending_streams.append([stream, headers, []])
+            return
+        self._open_stream(stream, headers)
+
+    def send_request_data(
+        self, stream: ProxiedH2Stream, data: bytes, on_sent: Callable[[], None]
+    ):
+        if sender := self._get_sender(stream):
+            sender.send(data, on_sent)
+            self._flush(sender)
+        elif pending := self._get_pending(stream):
+            pending[2].append((data, on_sent))
+
+    def end_request(self, stream: ProxiedH2Stream):
+        if sender := self._get_sender(stream):
+            sender.end_stream()
+            self._flush(sender)
+        elif pending := self._get_pending(stream):
+            pending[2].append(None)
+
+    def cancel_stream(self, stream: ProxiedH2Stream):
+        self.pending_streams = deque(
+            entry for entry in self.pending_streams if entry[0] is not stream
+        )
+        stream_id = stream.upstream_stream_id
+        if stream_id not in self.streams:
+            return
+        self._stream_closed(stream_id)
+        try:
+            self.conn.reset_stream(stream_id, error_code=h2.errors.ErrorCodes.CANCEL)
+        except h2.exceptions.StreamClosedError:
+            pass
+        self._write()
+
+    def close(self):
+        """
+        Close the connection to the backend (or stop connecting), after announcing the shutdown to
+        the backend via GOAWAY. Streams still proxied over this connection are reset.
+        """
+        if self.closed:
+            return
+        try:
+            self.conn.close_connection()
+            self._write()
+        except h2.exceptions.ProtocolError:
+            pass
+        if self.transport is not None:
+            self.transport.loseConnection()
+        else:
+            self._connector.disconnect()
+        self._connection_lost(None)
+
+    # internal methods
+
+    def _get_sender(self, stream: ProxiedH2Stream) -> _FlowControlledSender | None:
+        if stream.upstream_stream_id is None:
+            return None
+        return self.senders.get(stream.upstream_stream_id)
+
+    def _get_pending(self, stream: ProxiedH2Stream) -> list | None:
+        for entry in self.pending_streams:
+            if entry[0] is stream:
+                return entry
+        return None
+
+    def _flush(self, sender: _FlowControlledSender):
+        try:
+            sender.flush()
+        except h2.exceptions.StreamClosedError:
+            pass
+        self._write()
+
+    def _write(self):
+        if self.transport is not None and (data := self.conn.data_to_send()):
+            self.transport.write(data)
+
+    def _stream_closed(self, stream_id: int):
+        self.streams.pop(stream_id, None)
+        self.senders.pop(stream_id, None)
+        self._start_pending_streams()
+
+    def _has_free_stream_slot(self) -> bool:
+        max_streams = self.conn.remote_settings.max_concurrent_streams
+        return self.conn.open_outbound_streams < max_streams
+
+    def _open_stream(self, stream: ProxiedH2Stream, headers: list):
+        stream_id = self.conn.get_next_available_stream_id()
+        stream.upstream_stream_id = stream_id
+        self.streams[stream_id] = stream
+        self.senders[stream_id] = _FlowControlledSender(self.conn, stream_id)
+        self.conn.send_headers(stream_id, headers)
+        self._write()
+
+    def _start_pending_streams(self):
+        while self.pending_streams and self._has_free_stream_slot():
+            stream, headers, operations = self.pending_streams.popleft()
+            self._open_stream(stream, headers)
+            for operation in operations:
+                if operation is None:
+                    self.end_request(stream)
+                else:
+                    self.send_request_data(stream, *operation)
+
+    def _connected(self, protocol: _UpstreamH2Protocol):
+        if self.closed:
+            protocol.transport.loseConnection()
+            return
+        self.transport = protocol.transport
+        self._write()
+
+    def _data_received(self, data: bytes):
+        try:
+            events = self.conn.receive_data(data)
+        except h2.exceptions.ProtocolError as e:
+            LOG.debug(
+                "HTTP2 protocol error on upstream %s:%s: %s", self.host, self.port, e
+            )
+            self._write()
+            self.transport.loseConnection()
+            return
+
+        for event in events:
+            stream = self.streams.get(getattr(event, "stream_id", 0))
+            if isinstance(event, h2.events.ResponseReceived):
+                if stream:
+                    # a response without body and trailers (e.g., gRPC "trailers-only")
+                    # must be passed on as a single HEADERS frame that ends the stream
+                    end_stream = event.stream_ended is not None
+                    stream.response_headers(event.headers, end_stream=end_stream)
+                    if end_stream:
+                        self._stream_closed(event.stream_id)
+            elif isinstance(event, h2.events.DataReceived):
+                self._upstream_data_received(stream, event)
+            elif isinstance(event, h2.events.TrailersReceived):
+                if stream:
+                    stream.response_ended(event.headers)
+                    self._stream_closed(event.stream_id)
+            elif isinstance(event, h2.events.StreamEnded):
+                if stream:
+                    stream.response_ended()
+                    self._stream_closed(event.stream_id)
+            elif isinstance(event, h2.events.StreamReset):
+                if stream:
+                    stream.reset(event.error_code)
+                    self._stream_closed(event.stream_id)
+            elif isinstance(event, h2.events.WindowUpdated):
+                self._window_updated(event.stream_id)
+            elif isinstance(event, h2.events.RemoteSettingsChanged):
+                self._start_pending_streams()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.loseConnection()
+        self._write()
+
+    def _upstream_data_received(
+        self, stream: ProxiedH2Stream | None, event: h2.events.DataReceived
+    ):
+        stream_id = event.stream_id
+        length = event.flow_controlled_length
+
+        def _on_sent():
+            # hand the window back to the backend, once the data was passed on to the client
+            self.conn.acknowledge_received_data(length, stream_id)
+            self._write()
+
+        if stream:
+            stream.response_data(event.data, _on_sent)
+        else:
+            _on_sent()
+
+    def _window_updated(self, stream_id: int):
+        senders = [self.senders[stream_id]] if stream_id in self.senders else []
+        if not stream_id:
+            senders = list(self.senders.values())
+        for sender in senders:
+            self._flush(sender)
+
+    def _connection_lost(self, reason):
+        if self.closed:
+            return
+        LOG.debug(
+            "Upstream HTTP2 connection to %s:%s closed: %s",
+            self.host,
+            self.port,
+            reason,
+        )
+        self.closed = True
+        if _upstream_connections.get((self.host, self.port)) is self:
+            del _upstream_connections[(self.host, self.port)]
+        streams = list(self.streams.values()) + [e[0] for e in self.pending_streams]
+        self.streams = {}
+        self.senders = {}
+        self.pending_streams = deque()
+        for stream in streams:
+            stream.reset(h2.errors.ErrorCodes.REFUSED_STREAM)
+
+
+def get_upstream_connection(host: str, port: int) -> UpstreamH2Connection:
+    """Return the shared upstream connection for the given backend, creating it if required."""
+    upstream = _upstream_connections.get((host, port))
+    if upstream is None or upstream.closed:
+        LOG.debug("Opening upstream HTTP2 connection to %s:%s", host, port)
+        upstream = _upstream_connections[(host, port)] = UpstreamH2Connection(
+            host, port
+        )
+    return upstream
+
+
+def close_upstream_connections(host: str | None = None, port: int | None = None):
+    """
+    Close and evict the shared upstream connections - either to the given backend, or all of them.
+    Must be called from the reactor thread.
+    """
+    for key, upstream in list(_upstream_connections.items()):
+        if host is None or key == (host, port):
+            _upstream_connections.pop(key, None)
+            upstream.close()
+
+
+def proxy_stream_to_backend(
+    connection: H2Connection,
+    event: h2.events.RequestReceived,
+    backend_host: str,
+    backend_port: int,
+) -> ProxiedH2Stream:
+    """
+    Proxy the stream of the given request event to the backend. Registers the proxied stream
+    with the client H2Connection, mirroring the state set up by `H2Connection._requestReceived`.
+    Requires `supports_stream_multiplexing` to hold for the connection.
+    """
+    stream_id = event.stream_id
+    upstream = get_upstream_connection(backend_host, backend_port)
+    stream = ProxiedH2Stream(stream_id, connection, upstream)
+
+    connection.streams[stream_id] = stream
+    connection._streamCleanupCallbacks[stream_id] = Deferred()
+    connection._outboundStreamQueues[stream_id] = deque()
+    # the stream is permanently blocked in the priority tree, as the proxied stream writes its
+    # response data directly, without the data sending loop of the H2Connection
+    try:
+        connection.priority.insert_stream(stream_id)
+    except priority.DuplicateStreamError:
+        pass
+    connection.priority.block(stream_id)
+
+    upstream.start_stream(stream, event.headers)
+    return stream
@@ -3,11 +3,16 @@ import socket
 from collections.abc import Callable, Iterable
 from enum import Enum
 
+from h2.errors import ErrorCodes
 from h2.frame_buffer import FrameBuffer
 from hpack import Decoder
 from hyperframe.frame import Frame, HeadersFrame
+from localstack.config import is_env_true
 from localstack.utils.patch import patch
 from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.protocol import ClientFactory, Protocol
+from twisted.python.failure import Failure
 from twisted.web._http2 import H2Connection
 from werkzeug.datastructures import Headers
 
@@ -18,7 +23,12 @@ ProxyRequestMatcher = Callable[[Headers], bool]
 
 
 class TcpForwarder:
-    """Simple helper class for bidirectional forwarding of TCP traffic."""
+    """
+    Simple helper class for bidirectional forwarding of TCP traffic, using a blocking socket.
+
+    Note: `receive_loop` blocks the calling thread for the lifetime of the connection. Inside the
+    LocalStack gateway, prefer `AsyncTcpForwarder`, which is driven by the Twisted reactor.
+    """
 
     buffer_size: int = 1024
     """Data buffer size for receiving data from upstream socket."""
@@ -59,99 +69,592 @@ class TcpForwarder:
             pass
 
 
-patched_connection = False
+class _AsyncTcpForwarderProtocol(Protocol):
+    """Twisted protocol for the backend connection of an `AsyncTcpForwarder`."""
 
+    forwarder: "AsyncTcpForwarder"
 
-def apply_http2_patches_for_grpc_support(
-    target_host: str, target_port: int, http2_request_matcher: ProxyRequestMatcher
-):
+    def connectionMade(self):
+        self.forwarder._backend_connected(self)
+
+    def dataReceived(self, data):
+        self.forwarder._received_from_backend(data)
+
+    def connectionLost(self, reason=None):
+        self.forwarder._backend_lost(reason)
+
+
+class _AsyncTcpForwarderFactory(ClientFactory):
+    protocol = _AsyncTcpForwarderProtocol
+
+    def __init__(self, forwarder: "AsyncTcpForwarder"):
+        self.forwarder = forwarder
+
+    def buildProtocol(self, addr):
+        protocol = super().buildProtocol(addr)
+        protocol.forwarder = self.forwarder
+        return protocol
+
+    def clientConnectionFailed(self, connector, reason):
+        self.forwarder._backend_lost(reason)
+
+
+class AsyncTcpForwarder:
     """
-    Apply some patches to proxy incoming gRPC requests and forward them to a target port.
-    Note: this is a very brute-force approach and needs to be fixed/enhanced over time!
+    Non-blocking helper class for bidirectional forwarding of TCP traffic, driven by the reactor.
+
+    The backend connection is established via `reactor.connectTCP`, and data received from the
+    backend is passed to the `on_data` callback in the reactor thread - hence, no thread is occupied
+    per forwarded connection. Data sent before the connection is established is buffered and
+    flushed as soon as the backend connection is up.
+
+    All methods must be called from the reactor thread.
     """
-    LOG.debug("Enabling proxying to backend %s:%s", target_host, target_port)
-    global patched_connection
-    assert not patched_connection, (
-        "It is not safe to patch H2Connection twice with this function"
-    )
-    patched_connection = True
 
-    class ForwardingState(Enum):
-        UNDECIDED = "undecided"
-        FORWARDING = "forwarding"
-        PASSTHROUGH = "passthrough"
+    def __init__(
+        self,
+        port: int,
+        host: str = "localhost",
+        on_data: Callable[[bytes], None] | None = None,
+        on_close: Callable[[Failure | None], None] | None = None,
+    ):
+        self.port = port
+        self.host = host
+        self.on_data = on_data
+        self.on_close = on_close
+        self._protocol: _AsyncTcpForwarderProtocol | None = None
+        self._pending: list[bytes] = []
+        self._peer_transport = None
+        self._closed = False
+        self._connector = reactor.connectTCP(
+            self.host, self.port, _AsyncTcpForwarderFactory(self)
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._protocol is not None and not self._closed
+
+    def send(self, data: bytes):
+        if self._closed:
+            LOG.debug(
+                "Dropping data for closed upstream connection on port %d", self.port
+            )
+            return
+        if self._protocol is None:
+            self._pending.append(data)
+            return
+        self._protocol.transport.write(data)
 
-    class ForwardingBuffer:
+    def couple(self, peer_transport):
         """
-        A buffer atop the HTTP2 client connection, that will hold
-        data until the ProxyRequestMatcher tells us whether to send it
-        to the backend, or leave it to the default handler.
+        Enable producer/consumer flow control between the backend connection and the given peer
+        transport (i.e., the client connection whose data is forwarded to the backend): reading
+        from the peer is paused while the backend cannot keep up, and vice versa. Any producer
+        previously registered on the peer transport is unregistered.
         """
+        self._peer_transport = peer_transport
+        if self._protocol is None:
+            # hold back client data until the backend connection is established
+            peer_transport.pauseProducing()
+            return
+        self._register_producers()
 
-        backend: TcpForwarder
-        buffer: list
-        state: ForwardingState
+    def close(self):
+        if self._closed:
+            return
+        LOG.debug("Closing connection to upstream HTTP2 server on port %d", self.port)
+        self._closed = True
+        self._pending = []
+        # stops a pending connection attempt, or drops an established connection
+        self._connector.disconnect()
 
-        def __init__(self, http_response_stream):
-            self.http_response_stream = http_response_stream
-            LOG.debug(
-                "Starting TCP forwarder to port %s for new HTTP2 connection", target_port
-            )
-            self.backend = TcpForwarder(target_port, host=target_host)
-            self.buffer = []
-            self.state = ForwardingState.UNDECIDED
-            reactor.getThreadPool().callInThread(
-                self.backend.receive_loop, self.received_from_backend
-            )
+    def _register_producers(self):
+        peer_transport = self._peer_transport
+        backend_transport = self._protocol.transport
+        try:
+            peer_transport.unregisterProducer()
+        except Exception:
+            pass  # no producer was registered, which is fine
+        backend_transport.registerProducer(peer_transport, True)
+        peer_transport.registerProducer(backend_transport, True)
+
+    def _backend_connected(self, protocol: _AsyncTcpForwarderProtocol):
+        if self._closed:
+            protocol.transport.loseConnection()
+            return
+        self._protocol = protocol
+        if self._pending:
+            protocol.transport.writeSequence(self._pending)
+            self._pending = []
+        if self._peer_transport is not None:
+            self._register_producers()
+            self._peer_transport.resumeProducing()
+
+    def _received_from_backend(self, data: bytes):
+        if self.on_data:
+            self.on_data(data)
+
+    def _backend_lost(self, reason: Failure | None):
+        was_closed = self._closed
+        self._closed = True
+        self._protocol = None
+        self._pending = []
+        if self.on_close and not was_closed:
+            self.on_close(reason)
+
+
+class Http2ProxyStats:
+    """Simple counters for instrumenting the HTTP2 proxy. Updated from the reactor thread only."""
+
+    connections_forwarded: int
+    """Number of HTTP2 connections forwarded to a backend."""
+    connections_passed_through: int
+    """Number of HTTP2 connections handed to the default (gateway) handler."""
+    backend_dials: int
+    """Number of backend connections established for forwarded HTTP2 connections."""
+    backend_dials_avoided: int
+    """Number of HTTP2 connections for which no backend connection was dialed at all."""
+    backend_connections: dict[str, int]
+    """Number of HTTP2 connections forwarded to each backend, keyed by backend name."""
+    backend_connections_active: dict[str, int]
+    """Number of currently open HTTP2 connections forwarded to each backend, keyed by backend name."""
+    backend_streams: dict[str, int]
+    """Number of HTTP2 streams proxied to each backend in stream multiplexing mode."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.connections_forwarded = 0
+        self.connections_passed_through = 0
+        self.backend_dials = 0
+        self.backend_dials_avoided = 0
+        self.backend_connections = {}
+        self.backend_connections_active = {}
+        self.backend_streams = {}
+
+    def backend_connection_opened(self, backend_name: str):
+        self.connections_forwarded += 1
+        self.backend_connections[backend_name] = (
+            self.backend_connections.get(backend_name, 0) + 1
+        )
+        self.backend_connections_active[backend_name] = (
+            self.backend_connections_active.get(backend_name, 0) + 1
+        )
+
+    def backend_connection_closed(self, backend_name: str):
+        self.backend_connections_active[backend_name] -= 1
 
-        def received_from_backend(self, data):
-            self.http_response_stream.write(data)
-
-        def received_from_http2_client(self, data, default_handler: Callable):
-            match self.state:
-                case ForwardingState.PASSTHROUGH:
-                    default_handler(data)
-                case ForwardingState.FORWARDING:
-                    assert not self.buffer
-                    # Keep sending data to the backend for the lifetime of this connection
-                    self.backend.send(data)
-                case ForwardingState.UNDECIDED:
+    def backend_stream_opened(self, backend_name: str):
+        self.backend_streams[backend_name] = (
+            self.backend_streams.get(backend_name, 0) + 1
+        )
+
+    def snapshot(self) -> dict:
+        return {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in vars(self).items()
+        }
+
+
+HTTP2_PROXY_STATS = Http2ProxyStats()
+"""Global instrumentation counters of the HTTP2 proxy."""
+
+# Global registry of backends for HTTP2 connections
+# List of tuples: (backend_name, matcher_func, backend_host, backend_port)
+_http2_backends = []
+_h2_connection_patched = False
+
+# Hooks invoked before connecting to a backend (e.g., to start the backend on demand), by backend
+# name, returning a Deferred which fires once the backend accepts connections
+_http2_connect_hooks: dict[str, Callable[[], Deferred]] = {}
+
+HTTP2_STREAM_MULTIPLEXING = is_env_true("EXTENSIONS_HTTP2_STREAM_MULTIPLEXING")
+"""
+Whether to route proxied HTTP2 traffic per stream (see `h2_multiplexer`), instead of pinning
+entire connections to a backend based on the first request. Read from the environment once at
+import time - the module attribute is checked for each new connection.
+"""
+
+
+class ForwardingState(Enum):
+    UNDECIDED = "undecided"
+    FORWARDING = "forwarding"
+    PASSTHROUGH = "passthrough"
+
+
+class ForwardingBuffer:
+    """
+    A buffer atop the HTTP2 client connection, that will hold data until the
+    ProxyRequestMatchers of the registered backends tell us whether to send it
+    to one of the backends, or leave it to the default handler.
+
+    The connection to the backend is only dialed once the connection is
+    determined to be forwarded - passthrough connections never touch the backend.
+    If the backend has a connect hook, the client connection is held until the
+    backend is ready.
+    """
+
+    backend: AsyncTcpForwarder | None
+    backend_name: str | None
+    buffer: list
+    headers_parser: "Http2HeadersParser | None"
+    state: ForwardingState
+
+    def __init__(
+        self,
+        http_response_stream,
+        backends: list[tuple] | None = None,
+        on_passthrough: Callable[[], None] | None = None,
+    ):
+        self.http_response_stream = http_response_stream
+        self.backends = backends
+        self.on_passthrough = on_passthrough
+        self.backend = None
+        self.backend_name = None
+        self.buffer = []
+        self.headers_parser = Http2HeadersParser()
+        self.state = ForwardingState.UNDECIDED
+        self.closed = False
+
+    def received_from_backend(self, data):
+        self.http_response_stream.write(data)
+
+    def backend_closed(self, reason):
+        if self.state == ForwardingState.FORWARDING:
+            # the backend has terminated the connection - propagate to the client
+            self.http_response_stream.loseConnection()
+
+    def received_from_http2_client(self, data, default_handler: Callable):
+        match self.state:
+            case ForwardingState.PASSTHROUGH:
+                default_handler(data)
+            case ForwardingState.FORWARDING:
+                if self.backend is None:
+                    # still waiting for the backend to become ready
                     self.buffer.append(data)
+                    return
+                assert not self.buffer
+                # Keep sending data to the backend for the lifetime of this connection
+                self.backend.send(data)
+            case ForwardingState.UNDECIDED:
+                self.buffer.append(data)
+
+                if headers := self.headers_parser.feed(data):
+                    buffered_data = b"".join(self.buffer)
+                    self.buffer = []
+                    self.headers_parser = None
+
+                    if backend := find_http2_backend(headers, self.backends):
+                        self.state = ForwardingState.FORWARDING
+                        self._forward_to_backend(backend, buffered_data)
+                    else:
+                        self.state = ForwardingState.PASSTHROUGH
+                        HTTP2_PROXY_STATS.connections_passed_through += 1
+                        HTTP2_PROXY_STATS.backend_dials_avoided += 1
+                        if self.on_passthrough:
+                            self.on_passthrough()
+                        # if this is not a target request, then call the default handler
+                        default_handler(buffered_data)
+
+    def _forward_to_backend(self, backend: tuple[str, str, int], data: bytes):
+        on_connect = _http2_connect_hooks.get(backend[0])
+        if not on_connect:
+            self._connect_backend(*backend)
+            self.backend.send(data)
+            return
 
-                    if headers := get_headers_from_data_stream(self.buffer):
-                        buffered_data = b"".join(self.buffer)
-                        self.buffer = []
+        # hold the client connection until the backend is ready
+        self.buffer.append(data)
+        self.http_response_stream.pauseProducing()
 
-                        if http2_request_matcher(headers):
-                            self.state = ForwardingState.FORWARDING
-                            self.backend.send(buffered_data)
-                        else:
-                            self.state = ForwardingState.PASSTHROUGH
-                            # if this is not a target request, then call the default handler
-                            default_handler(buffered_data)
+        def _backend_ready(_):
+            if self.closed:
+                return
+            self._connect_backend(*backend)
+            buffered_data = b"".join(self.buffer)
+            self.buffer = []
+            self.backend.send(buffered_data)
 
-        def close(self):
+        def _backend_failed(failure):
+            LOG.warning(
+                "HTTP2 backend %s is not available: %s",
+                backend[0],
+                failure.getErrorMessage(),
+            )
+            self.buffer = []
+            if not self.closed:
+                self.http_response_stream.loseConnection()
+
+        on_connect().addCallbacks(_backend_ready, _backend_failed)
+
+    def _connect_backend(self, backend_name: str, backend_host: str, backend_port: int):
+        LOG.debug(
+            "Starting TCP forwarder to %s:%s (%s) for HTTP2 connection",
+            backend_host,
+            backend_port,
+            backend_name,
+        )
+        self.backend_name = backend_name
+        HTTP2_PROXY_STATS.backend_dials += 1
+        HTTP2_PROXY_STATS.backend_connection_opened(backend_name)
+        self.backend = AsyncTcpForwarder(
+            backend_port,
+            host=backend_host,
+            on_data=self.received_from_backend,
+            on_close=self.backend_closed,
+        )
+        self.backend.couple(self.http_response_stream)
+
+    def close(self):
+        self.closed = True
+        if self.backend:
             self.backend.close()
+            HTTP2_PROXY_STATS.backend_connection_closed(self.backend_name)
+        elif self.state == ForwardingState.UNDECIDED:
+            # connection closed before a decision was made - no backend was dialed
+            HTTP2_PROXY_STATS.backend_dials_avoided += 1
+
+
+def find_http2_backend(
+    headers: Headers, backends: list[tuple] | None = None
+) -> tuple[str, str, int] | None:
+    """
+    Return (name, host, port) of the first backend whose matcher accepts the given headers.
+    Uses the global registry of backends, unless a list of backends is passed explicitly.
+    """
+    backends = _http2_backends if backends is None else backends
+    for backend_name, matcher, backend_host, backend_port in backends:
+        try:
+            if matcher(headers):
+                return backend_name, backend_host, backend_port
+        except Exception as e:
+            LOG.debug("Error in HTTP2 matcher for %s: %s", backend_name, e)
+    return None
+
+
+def patch_h2_connection_for_proxying():
+    """
+    Patch the Twisted H2Connection to dispatch incoming HTTP2 connections to the registered
+    backends (see `register_http2_backend`). The patch is applied only once globally.
+
+    By default, the entire connection is forwarded to the backend matching the first request. If
+    `HTTP2_STREAM_MULTIPLEXING` is enabled, the connection is served by the H2Connection, and each
+    individual stream is routed to the matching backend (or served by the gateway).
+    """
+    global _h2_connection_patched
+
+    if _h2_connection_patched:
+        return
+
+    from localstack_extensions.utils.h2_multiplexer import (
+        proxy_stream_to_backend,
+        supports_stream_multiplexing,
+    )
 
     @patch(H2Connection.connectionMade)
     def _connectionMade(fn, self, *args, **kwargs):
-        self._ls_forwarding_buffer = ForwardingBuffer(self.transport)
+        self._ls_stream_multiplexing = (
+            HTTP2_STREAM_MULTIPLEXING and supports_stream_multiplexing(self)
+        )
+        if self._ls_stream_multiplexing:
+            self._ls_forwarding_buffer = None
+            return fn(self, *args, **kwargs)
+        # defer the default connection setup (e.g., sending the server preface) until we know
+        # that the connection is not forwarded - otherwise, the backend sends its own preface
+        self._ls_forwarding_buffer = ForwardingBuffer(
+            self.transport,
+            on_passthrough=lambda: fn(self, *args, **kwargs),
+        )
 
     @patch(H2Connection.dataReceived)
     def _dataReceived(fn, self, data, *args, **kwargs):
+        if not self._ls_forwarding_buffer:
+            return fn(self, data, *args, **kwargs)
         self._ls_forwarding_buffer.received_from_http2_client(
             data, lambda d: fn(self, d, *args, **kwargs)
         )
 
+    @patch(H2Connection._requestReceived)
+    def _requestReceived(fn, self, event, *args, **kwargs):
+        if getattr(self, "_ls_stream_multiplexing", False):
+            headers = Headers(
+                [
+                    (key.decode("latin-1"), value.decode("latin-1"))
+                    for key, value in event.headers
+                ]
+            )
+            if backend := find_http2_backend(headers):
+                backend_name, backend_host, backend_port = backend
+                if not _is_backend_ready(backend_name):
+                    # streams cannot be held, hence the client is asked to retry them
+                    self.conn.reset_stream(event.stream_id, ErrorCodes.REFUSED_STREAM)
+                    self.transport.write(self.conn.data_to_send())
+                    return
+                HTTP2_PROXY_STATS.backend_stream_opened(backend_name)
+                proxy_stream_to_backend(self, event, backend_host, backend_port)
+                return
+        return fn(self, event, *args, **kwargs)
+
     @patch(H2Connection.connectionLost)
     def connectionLost(fn, self, *args, **kwargs):
-        self._ls_forwarding_buffer.close()
+        forwarding_buffer = self._ls_forwarding_buffer
+        if not forwarding_buffer:
+            return fn(self, *args, **kwargs)
+        forwarding_buffer.close()
+        if forwarding_buffer.state == ForwardingState.PASSTHROUGH:
+            fn(self, *args, **kwargs)
+
+    _h2_connection_patched = True
+
+
+def _is_backend_ready(backend_name: str) -> bool:
+    """
+    Invoke the connect hook of the given backend (if any), and return whether the backend is ready.
+    """
+    if not (on_connect := _http2_connect_hooks.get(backend_name)):
+        return True
+    ready = on_connect()
+    if ready.called:
+        return True
+    ready.addErrback(
+        lambda failure: LOG.warning(
+            "HTTP2 backend %s is not available: %s",
+            backend_name,
+            failure.getErrorMessage(),
+        )
+    )
+    return False
+
+
+def register_http2_backend(
+    backend_name: str,
+    matcher: ProxyRequestMatcher,
+    backend_host: str,
+    backend_port: int,
+    on_connect: Callable[[], Deferred] | None = None,
+):
+    """
+    Register a backend for HTTP2 connection routing. Each incoming HTTP2 connection is forwarded
+    to the first registered backend whose matcher accepts the request headers.
+
+    Args:
+        backend_name: Name of the backend (e.g., the name of the extension)
+        matcher: Function that takes the request headers and returns bool to claim the connection
+        backend_host: Backend host to route to
+        backend_port: Backend port to route to
+        on_connect: Function invoked (in the reactor thread) before requests are forwarded to the
+            backend - returns a Deferred which fires once the backend is ready
+    """
+    _http2_backends.append((backend_name, matcher, backend_host, backend_port))
+    _http2_connect_hooks.pop(backend_name, None)
+    if on_connect:
+        _http2_connect_hooks[backend_name] = on_connect
+    LOG.info(
+        "Registered HTTP2 backend %s -> %s:%s", backend_name, backend_host, backend_port
+    )
+
+
+def unregister_http2_backend(backend_name: str):
+    """
+    Unregister a backend from HTTP2 connection routing, and close the upstream connections of
+    stream multiplexing to the backend (unless still used by another registered backend).
+    """
+    global _http2_backends
+    from localstack_extensions.utils import h2_multiplexer
+
+    removed = {
+        (host, port) for name, _, host, port in _http2_backends if name == backend_name
+    }
+    _http2_backends = [
+        (name, matcher, host, port)
+        for name, matcher, host, port in _http2_backends
+        if name != backend_name
+    ]
+    _http2_connect_hooks.pop(backend_name, None)
+    remaining = {(host, port) for _, _, host, port in _http2_backends}
+    for host, port in removed - remaining:
+        if (host, port) in h2_multiplexer._upstream_connections:
+            reactor.callFromThread(
+                h2_multiplexer.close_upstream_connections, host, port
+            )
+    LOG.info("Unregistered HTTP2 backend %s", backend_name)
+
+
+def apply_http2_patches_for_grpc_support(
+    target_host: str,
+    target_port: int,
+    http2_request_matcher: ProxyRequestMatcher,
+    backend_name: str | None = None,
+    on_connect: Callable[[], Deferred] | None = None,
+):
+    """
+    Apply some patches to proxy incoming gRPC requests and forward them to a target port.
+    Can be called multiple times, e.g., by different extensions - each call registers an
+    additional backend, and connections are routed to the first backend whose matcher applies.
+    """
+    backend_name = backend_name or f"{target_host}:{target_port}"
+    LOG.debug("Enabling proxying to backend %s:%s", target_host, target_port)
+    patch_h2_connection_for_proxying()
+    register_http2_backend(
+        backend_name,
+        http2_request_matcher,
+        target_host,
+        target_port,
+        on_connect=on_connect,
+    )
+
+
+class Http2HeadersParser:
+    """
+    Incremental parser for the headers sent by the client of an HTTP2 connection.
+
+    Keeps a single frame buffer and HPACK decoder per connection, so that each chunk of data
+    is only parsed once as it arrives - instead of re-parsing the entire stream from the start
+    on every new chunk.
+    """
+
+    def __init__(self):
+        self._frame_buffer = FrameBuffer(server=True)
+        self._frame_buffer.max_frame_size = 16384
+        self._decoder = Decoder()
+        self._headers = Headers()
+        self._failed = False
+
+    @property
+    def headers(self) -> Headers:
+        """The headers parsed so far (empty, if no HEADERS frame has been received yet)."""
+        return self._headers
+
+    def feed(self, data: bytes) -> Headers:
+        """Parse the given chunk of data, and return the headers parsed so far, if any."""
+        if self._failed or not data:
+            return self._headers
+        try:
+            self._frame_buffer.add_data(data)
+            for frame in self._frame_buffer:
+                if isinstance(frame, HeadersFrame):
+                    self._decode_headers(frame)
+        except Exception:
+            # not a (valid) HTTP2 stream - stop parsing any further data
+            self._failed = True
+        return self._headers
+
+    def _decode_headers(self, frame: HeadersFrame):
+        try:
+            headers = dict(self._decoder.decode(frame.data))
+        except Exception:
+            return
+        # create a new object, to not modify headers previously returned to the caller
+        self._headers = Headers({**dict(self._headers), **headers})
 
 
 def get_headers_from_data_stream(data_list: Iterable[bytes]) -> Headers:
     """Get headers from a data stream (list of bytes data), if any headers are contained."""
-    stream = b"".join(data_list)
-    return get_headers_from_frames(get_frames_from_http2_stream(stream))
+    parser = Http2HeadersParser()
+    for data in data_list:
+        parser.feed(data)
+    return parser.headers
 
 
 def get_headers_from_frames(frames: Iterable[Frame]) -> Headers:
@@ -0,0 +1,155 @@
+"""
+Command line tool to pull the Docker images of all installed container-backed extensions ahead of
+time (e.g., when baking CI runner images), so that the startup of LocalStack never includes a pull.
+
+Usage:
+    python -m localstack_extensions.utils.prepull [--force] [--max-workers N] [extension ...]
+
+Images are pulled concurrently, and images which are already present are skipped (unless `--force`
+is given). Image names are resolved the same way as when the extensions start their containers.
+"""
+
+import argparse
+import logging
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from importlib.metadata import entry_points
+
+from localstack.utils.docker_utils import DOCKER_CLIENT
+
+from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+
+LOG = logging.getLogger(__name__)
+
+# Entry point group under which LocalStack extensions are registered
+EXTENSIONS_ENTRY_POINT_GROUP = "localstack.extensions"
+# Default number of images pulled concurrently
+PREPULL_MAX_WORKERS = 4
+
+
+def find_container_extensions(
+    names: list[str] | None = None,
+) -> list[ProxiedDockerContainerExtension]:
+    """
+    Return instances of all installed extensions based on ProxiedDockerContainerExtension, or only
+    of the extensions with the given names.
+    """
+    extensions = []
+    for entry_point in entry_points(group=EXTENSIONS_ENTRY_POINT_GROUP):
+        if names and entry_point.name not in names:
+            continue
+        try:
+            extension_class = entry_point.load()
+            if not (
+                isinstance(extension_class, type)
+                and issubclass(extension_class, ProxiedDockerContainerExtension)
+            ):
+                continue
+            extensions.append(extension_class())
+        except Exception as e:
+            LOG.warning("Unable to load extension %s: %s", entry_point.name, e)
+    return extensions
+
+
+def get_extension_images(
+    extensions: list[ProxiedDockerContainerExtension],
+) -> dict[str, list[str]]:
+    """Return the names of the extensions using each (resolved) image name."""
+    images = {}
+    for extension in extensions:
+        images.setdefault(extension.image_name, []).append(extension.name)
+    return images
+
+
+def _is_image_present(image: str) -> bool:
+    try:
+        DOCKER_CLIENT.inspect_image(image, pull=False)
+        return True
+    except Exception:
+        return False
+
+
+def pull_images(
+    images: list[str],
+    max_workers: int = PREPULL_MAX_WORKERS,
+    force: bool = False,
+    out=None,
+) -> dict[str, Exception | None]:
+    """
+    Pull the given images concurrently, reporting the progress to the given output stream. Returns
+    the error of each image, or None if the image was pulled successfully (or is already present).
+    """
+    out = out or sys.stdout
+    results = {}
+    completed = 0
+    mutex = threading.Lock()
+
+    def _report(image: str, status: str):
+        nonlocal completed
+        with mutex:
+            completed += 1
+            print(
+                f"[{completed}/{len(images)}] {image}: {status}", file=out, flush=True
+            )
+
+    def _pull(image: str):
+        if not force and _is_image_present(image):
+            results[image] = None
+            _report(image, "already present")
+            return
+        start = time.perf_counter()
+        try:
+            DOCKER_CLIENT.pull_image(
+                image, log_handler=lambda line: LOG.debug("%s: %s", image, line)
+            )
+        except Exception as e:
+            results[image] = e
+            _report(image, f"failed ({e})")
+            return
+        results[image] = None
+        _report(image, f"pulled in {time.perf_counter() - start:.1f}s")
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="ext-prepull"
+    ) as executor:
+        list(executor.map(_pull, images))
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Pull the Docker images of the installed container-backed LocalStack extensions"
+    )
+    parser.add_argument(
+        "extensions",
+        nargs="*",
+        help="Names of the extensions to pull images for (default: all installed extensions)",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=PREPULL_MAX_WORKERS,
+        help="Number of images to pull concurrently",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Pull images even if they are already present",
+    )
+    args = parser.parse_args(argv)
+
+    images = get_extension_images(find_container_extensions(args.extensions))
+    if not images:
+        print("No container-based extensions found")
+        return 0
+    for image, names in images.items():
+        print(f"{image} ({', '.join(names)})")
+
+    results = pull_images(list(images), max_workers=args.max_workers, force=args.force)
+    return 1 if any(results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
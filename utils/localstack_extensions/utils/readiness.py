@@ -0,0 +1,174 @@
+"""
+Readiness detection for the Docker containers of extensions.
+
+Instead of polling the health check of a container at a fixed interval, the readiness probe polls
+quickly after the container is started, and then backs off exponentially. In addition, the probe
+follows the container logs - a log line matching one of the configured readiness patterns (e.g.,
+"database system is ready") triggers an immediate health check - and fails fast if the container
+exits before becoming ready.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Callable
+
+from localstack.utils.container_utils.container_client import DockerContainerStatus
+from localstack.utils.docker_utils import DOCKER_CLIENT
+
+LOG = logging.getLogger(__name__)
+
+# Interval in seconds before the second health check, doubled after each failed health check
+READINESS_INITIAL_INTERVAL = 0.1
+READINESS_BACKOFF_FACTOR = 2.0
+
+# Time to ready and number of health checks, by extension name
+_readiness_stats: dict[str, dict] = {}
+
+
+class ContainerReadinessProbe:
+    """
+    Waits until the container of an extension is ready, i.e., until its health check succeeds.
+
+    The health check is retried with exponential backoff (starting at `initial_interval`, up to
+    `max_interval`), until the given timeout has elapsed. If `log_patterns` are given, the logs of
+    the container are followed in a background thread, and a matching log line wakes up the probe
+    to run the health check immediately.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        container_name: str,
+        health_check: Callable[[], None],
+        timeout: float,
+        max_interval: float,
+        initial_interval: float = READINESS_INITIAL_INTERVAL,
+        backoff_factor: float = READINESS_BACKOFF_FACTOR,
+        log_patterns: list[str] | None = None,
+        check_container: bool = True,
+    ):
+        self.name = name
+        self.container_name = container_name
+        self.health_check = health_check
+        self.timeout = timeout
+        self.max_interval = max_interval
+        self.initial_interval = min(initial_interval, max_interval)
+        self.backoff_factor = backoff_factor
+        self.log_patterns = (
+            re.compile("|".join(f"(?:{pattern})" for pattern in log_patterns))
+            if log_patterns
+            else None
+        )
+        self.check_container = check_container
+        self._log_signal = threading.Event()
+        self._log_stream = None
+        self._stopped = False
+
+    def wait(self) -> float:
+        """
+        Block until the container is ready, and return the time to ready in seconds. Raises the
+        last health check error if the container is not ready within the timeout, or an exception
+        if the container has exited.
+        """
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        interval = self.initial_interval
+        checks = 0
+        signal = "poll"
+        if self.log_patterns:
+            threading.Thread(
+                target=self._follow_logs,
+                name=f"readiness-logs-{self.container_name}",
+                daemon=True,
+            ).start()
+        try:
+            while True:
+                checks += 1
+                try:
+                    self.health_check()
+                    break
+                except Exception as e:
+                    if self.check_container and not self._is_container_running():
+                        raise Exception(
+                            f"Container {self.container_name} exited before becoming ready"
+                        ) from e
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        raise
+                    LOG.debug(
+                        "Container %s not ready yet (%s), retrying in %.2fs",
+                        self.container_name,
+                        e,
+                        min(interval, remaining),
+                    )
+                if self._log_signal.wait(min(interval, remaining)):
+                    self._log_signal.clear()
+                    signal = "log"
+                interval = min(interval * self.backoff_factor, self.max_interval)
+        finally:
+            self._close_log_stream()
+
+        time_to_ready = time.perf_counter() - start
+        _readiness_stats[self.name] = {
+            "time_to_ready": time_to_ready,
+            "health_checks": checks,
+            "signal": signal,
+        }
+        LOG.info(
+            "Container %s ready after %.2fs (%d health checks)",
+            self.container_name,
+            time_to_ready,
+            checks,
+        )
+        return time_to_ready
+
+    def _is_container_running(self) -> bool:
+        try:
+            status = DOCKER_CLIENT.get_container_status(self.container_name)
+        except Exception as e:
+            LOG.debug(
+                "Unable to get status of container %s: %s", self.container_name, e
+            )
+            return True
+        return status in (DockerContainerStatus.UP, DockerContainerStatus.PAUSED)
+
+    def _follow_logs(self):
+        try:
+            self._log_stream = DOCKER_CLIENT.stream_container_logs(self.container_name)
+            if self._stopped:
+                # the container got ready while the log stream was opened
+                self._close_log_stream()
+                return
+            pending = b""
+            for chunk in self._log_stream:
+                *lines, pending = (pending + chunk).split(b"\n")
+                for line in lines:
+                    if self.log_patterns.search(line.decode("utf-8", "replace")):
+                        LOG.debug(
+                            "Readiness log line of container %s: %s",
+                            self.container_name,
+                            line,
+                        )
+                        self._log_signal.set()
+        except Exception as e:
+            LOG.debug(
+                "Stopped following logs of container %s: %s", self.container_name, e
+            )
+
+    def _close_log_stream(self):
+        self._stopped = True
+        if self._log_stream:
+            try:
+                self._log_stream.close()
+            except Exception:
+                pass
+
+
+def get_container_readiness_stats() -> dict[str, dict]:
+    """
+    Return the readiness statistics of the extension containers started so far, by extension name:
+    the time to ready (in seconds), the number of health checks, and the last readiness signal.
+    """
+    return {name: dict(stats) for name, stats in _readiness_stats.items()}
@@ -0,0 +1,101 @@
+"""
+Coordinator for the background startup of container-backed extensions.
+
+Extensions submit their (blocking) startup function, which is executed concurrently with the startup
+of all other extensions in a shared thread pool. Hence, the overall startup time is determined by the
+slowest extension, rather than by the sum of the startup times of all extensions.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+
+LOG = logging.getLogger(__name__)
+
+# Maximum number of extensions started concurrently
+STARTUP_MAX_WORKERS = 16
+
+
+class ContainerStartupCoordinator:
+    """
+    Starts registered extensions concurrently in a thread pool, and exposes a readiness future per
+    extension, which resolves once the startup function of the extension has completed.
+    """
+
+    def __init__(self, max_workers: int = STARTUP_MAX_WORKERS):
+        self.max_workers = max_workers
+        self._executor: ThreadPoolExecutor | None = None
+        self._futures: dict[str, Future] = {}
+        self._startup_times: dict[str, float] = {}
+        self._mutex = threading.Lock()
+
+    def submit(self, name: str, start_fn: Callable[[], None]) -> Future:
+        """
+        Start the extension with the given name in the background, unless it is already starting
+        (or started successfully). Returns the readiness future of the extension.
+        """
+        with self._mutex:
+            future = self._futures.get(name)
+            if future and not (future.done() and future.exception()):
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="ext-startup"
+                )
+            future = self._futures[name] = self._executor.submit(
+                self._start, name, start_fn
+            )
+            return future
+
+    def _start(self, name: str, start_fn: Callable[[], None]):
+        LOG.debug("Starting extension %s in the background", name)
+        start = time.perf_counter()
+        try:
+            start_fn()
+        except Exception as e:
+            LOG.warning("Failed to start extension %s: %s", name, e)
+            raise
+        self._startup_times[name] = time.perf_counter() - start
+        LOG.debug("Extension %s ready after %.2fs", name, self._startup_times[name])
+
+    def get_future(self, name: str) -> Future | None:
+        """Return the readiness future of the given extension, or None if it was not submitted."""
+        return self._futures.get(name)
+
+    def is_ready(self, name: str) -> bool:
+        """Return whether the given extension has been started successfully."""
+        future = self._futures.get(name)
+        return bool(future and future.done() and not future.exception())
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait until all submitted extensions are started (or failed), and return whether all are."""
+        _, not_done = wait(list(self._futures.values()), timeout=timeout)
+        return not not_done
+
+    def stats(self) -> dict:
+        """Return the startup state and duration (in seconds, if started) of each extension."""
+        result = {}
+        for name, future in self._futures.items():
+            if not future.done():
+                state = "starting"
+            elif future.exception():
+                state = "failed"
+            else:
+                state = "ready"
+            result[name] = {
+                "state": state,
+                "startup_time": self._startup_times.get(name),
+            }
+        return result
+
+    def shutdown(self):
+        with self._mutex:
+            if self._executor:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+STARTUP_COORDINATOR = ContainerStartupCoordinator()
+"""Global coordinator for the background startup of container-backed extensions."""
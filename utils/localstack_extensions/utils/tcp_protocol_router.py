@@ -7,21 +7,286 @@ protocols to share a single gateway port.
 """
 
 import logging
+import os
+import time
+from bisect import bisect_left
+from collections.abc import Callable
+from itertools import accumulate
 
 from localstack import config
 from localstack.utils.patch import patch
 from twisted.internet import reactor
+from twisted.internet.defer import Deferred
+from twisted.internet.interfaces import IListeningPort
+from twisted.internet.protocol import ClientFactory, Factory, Protocol
 from twisted.protocols.portforward import ProxyClient, ProxyClientFactory
 from twisted.web.http import HTTPChannel
 
+from localstack_extensions.utils.tcp_relay import TcpRelay, detach_socket
+
 LOG = logging.getLogger(__name__)
 LOG.setLevel(logging.DEBUG if config.DEBUG else logging.INFO)
 
 # Global registry of extensions with TCP matchers
-# List of tuples: (extension_name, matcher_func, backend_host, backend_port)
+# List of tuples: (extension_name, matcher_func, backend_host, backend_port, signatures)
 _tcp_extensions = []
 _gateway_patched = False
 
+# Pools of pre-connected backend connections, by extension name
+_tcp_backend_pools: dict[str, "BackendConnectionPool"] = {}
+
+# Hooks invoked before connecting to the backend of an extension (e.g., to start the backend on
+# demand), returning a Deferred which fires once the backend accepts connections
+_tcp_connect_hooks: dict[str, Callable[[], Deferred]] = {}
+
+# Names of the extensions whose connections are forwarded by a TcpRelay, instead of the reactor
+_tcp_relay_extensions: set[str] = set()
+
+# Extension receiving the connections not identified within the detection timeout, as a tuple
+# (extension_name, backend_host, backend_port)
+_tcp_default_backend: tuple[str, str, int] | None = None
+
+# Minimum number of buffered bytes before matcher functions are invoked
+MIN_DETECTION_BYTES = 8
+# Maximum number of bytes buffered (and passed to matcher functions) to detect the protocol
+MAX_DETECTION_BYTES = 512
+
+TCP_DETECTION_TIMEOUT = float(os.environ.get("EXTENSIONS_TCP_DETECTION_TIMEOUT") or 5)
+"""
+Time in seconds after which connections which could not be identified yet (e.g., clients which
+sent only a few bytes, or clients of server-speaks-first protocols which wait for a greeting) are
+routed to the default TCP backend, if any, or handed to the HTTP handler (0 disables the timeout).
+"""
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+
+# Known prefixes of HTTP connections, as tuples (prefix, is_followed_by_text). HTTP/1.x requests
+# start with a method token (followed by the text of the request line and headers), HTTP/2
+# connections with the (prior knowledge) connection preface, followed by binary frames.
+HTTP_PREFIXES = [
+    (b"GET ", True),
+    (b"POST", True),
+    (b"PUT ", True),
+    (b"HEAD", True),
+    (b"DELETE", True),
+    (b"OPTIONS", True),
+    (b"PATCH", True),
+    (b"CONNECT", True),
+    (b"TRACE", True),
+    (HTTP2_PREFACE, False),
+]
+
+
+# Upper bounds (in seconds) of the buckets of the latency histograms of the TCP router
+TCP_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class LatencyHistogram:
+    """Histogram of latencies in seconds, with fixed buckets (cumulative in snapshots)."""
+
+    def __init__(self, buckets: tuple[float, ...] = TCP_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def snapshot(self) -> dict:
+        bounds = (*self.buckets, float("inf"))
+        return {
+            "buckets": dict(zip(bounds, accumulate(self.counts), strict=True)),
+            "count": self.count,
+            "sum": self.sum,
+        }
+
+
+class TcpExtensionStats:
+    """Counters and latency histograms of the TCP connections claimed by an extension."""
+
+    connections_claimed: int
+    """Number of connections claimed by the extension."""
+    connections_active: int
+    """Number of claimed connections currently forwarded to the backend."""
+    bytes_to_backend: int
+    """Number of bytes forwarded from clients to the backend (including the detection buffer)."""
+    bytes_to_client: int
+    """Number of bytes forwarded from the backend to clients."""
+    backend_connect_failures: int
+    """Number of claimed connections which could not be connected to the backend."""
+    matcher_errors: int
+    """Number of exceptions raised by the matcher function of the extension."""
+    detection_time: LatencyHistogram
+    """Time from the first byte received from the client until the connection was claimed."""
+    backend_connect_time: LatencyHistogram
+    """Time to connect to the backend (close to zero for pre-connected pooled connections)."""
+
+    def __init__(self):
+        self.connections_claimed = 0
+        self.connections_active = 0
+        self.bytes_to_backend = 0
+        self.bytes_to_client = 0
+        self.backend_connect_failures = 0
+        self.matcher_errors = 0
+        self.detection_time = LatencyHistogram()
+        self.backend_connect_time = LatencyHistogram()
+
+    def snapshot(self) -> dict:
+        return {
+            key: value.snapshot() if isinstance(value, LatencyHistogram) else value
+            for key, value in vars(self).items()
+        }
+
+
+class TcpRouterStats:
+    """
+    Instrumentation of the TCP router, keyed by extension name. Updated from the reactor thread only
+    (relayed connections are accounted for by the reactor once the relay is done).
+    """
+
+    connections_passed_to_http: int
+    """Number of connections not claimed by any extension, and handed to the HTTP handler."""
+    detection_timeouts: int
+    """Number of connections which could not be identified within the detection timeout."""
+    extensions: dict[str, TcpExtensionStats]
+    """Statistics of the connections claimed by each extension, keyed by extension name."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.connections_passed_to_http = 0
+        self.detection_timeouts = 0
+        self.extensions = {}
+
+    def extension(self, extension_name: str) -> TcpExtensionStats:
+        stats = self.extensions.get(extension_name)
+        if stats is None:
+            stats = self.extensions[extension_name] = TcpExtensionStats()
+        return stats
+
+    def snapshot(self) -> dict:
+        return {
+            "connections_passed_to_http": self.connections_passed_to_http,
+            "detection_timeouts": self.detection_timeouts,
+            "extensions": {
+                name: stats.snapshot() for name, stats in self.extensions.items()
+            },
+        }
+
+
+TCP_ROUTER_STATS = TcpRouterStats()
+"""Global instrumentation counters of the TCP router."""
+
+
+class TcpSignature:
+    """
+    Byte-level signature of a TCP protocol, i.e., a byte sequence expected at a fixed offset
+    of the initial bytes sent by the client (e.g., a protocol preface at offset 0, or a
+    protocol version code following a 4-byte length field at offset 4).
+    """
+
+    def __init__(self, pattern: bytes, offset: int = 0):
+        if not pattern:
+            raise ValueError("Signature pattern must not be empty")
+        if offset < 0:
+            raise ValueError("Signature offset must not be negative")
+        self.pattern = bytes(pattern)
+        self.offset = offset
+
+    def __repr__(self):
+        return f"TcpSignature({self.pattern!r}, offset={self.offset})"
+
+    def matches(self, data: bytes) -> bool:
+        """Return whether the given initial bytes of a connection contain this signature."""
+        return data[self.offset : self.offset + len(self.pattern)] == self.pattern
+
+
+class SignatureTable:
+    """
+    Dispatch table compiled from the byte signatures of the registered extensions.
+
+    Signatures are grouped by their (offset, length), with the patterns of each group stored in
+    a dict. Classifying a connection takes one hash lookup per distinct (offset, length) - which
+    is independent of the number of registered extensions and signatures.
+    """
+
+    def __init__(self):
+        # maps (offset, length) -> {pattern: (priority, value)}
+        self._patterns: dict[tuple[int, int], dict[bytes, tuple]] = {}
+        # maps (offset, length) -> set of all proper prefixes of the patterns in the group
+        self._prefixes: dict[tuple[int, int], set[bytes]] = {}
+        # list of tuples (offset, end, patterns, prefixes), for fast iteration when matching
+        self._groups = []
+
+    def add(self, signature: TcpSignature, value, priority: int = 0):
+        """Add a signature; on multiple matches, the value with the lowest priority wins."""
+        pattern = signature.pattern
+        key = (signature.offset, len(pattern))
+        patterns = self._patterns.setdefault(key, {})
+        if pattern not in patterns or priority < patterns[pattern][0]:
+            patterns[pattern] = (priority, value)
+        prefixes = self._prefixes.setdefault(key, set())
+        prefixes.update(pattern[:i] for i in range(len(pattern)))
+        self._groups = [
+            (offset, offset + length, self._patterns[(offset, length)], prefixes)
+            for (offset, length), prefixes in sorted(self._prefixes.items())
+        ]
+
+    def match(self, data: bytes) -> tuple[object | None, bool]:
+        """
+        Match the given initial connection bytes against the signatures in the table.
+
+        :param data: the bytes received from the client so far
+        :return: tuple (value, incomplete) - the value of the matching signature (or None), and
+                 whether more data could still produce a match for a signature (if no match yet)
+        """
+        best = None
+        incomplete = False
+        data_len = len(data)
+        for offset, end, patterns, prefixes in self._groups:
+            if data_len >= end:
+                match = patterns.get(data[offset:end])
+                if match and (best is None or match[0] < best[0]):
+                    best = match
+            elif not incomplete:
+                # the data ends within the signature - more data may still produce a match
+                incomplete = data[offset:] in prefixes
+        if best is not None:
+            return best[1], False
+        return None, incomplete
+
+    def __len__(self):
+        return sum(len(patterns) for patterns in self._patterns.values())
+
+
+# Compiled lookup structures, rebuilt whenever the registry of TCP extensions changes
+_tcp_signature_table = SignatureTable()
+# List of tuples: (extension_name, matcher_func, backend_host, backend_port)
+_tcp_matchers = []
+# Maps the first 4 bytes of HTTP prefixes not claimed by any extension -> full prefix
+_http_fast_path = {prefix[:4]: prefix for prefix, _ in HTTP_PREFIXES}
+
+
+def _may_claim_http_prefix(
+    signature: TcpSignature, prefix: bytes, followed_by_text: bool
+) -> bool:
+    """Determine whether the given signature could match a connection starting with prefix."""
+    pattern = signature.pattern
+    offset = signature.offset
+    # bytes of the signature overlapping with the prefix must be equal
+    overlap = prefix[offset : offset + len(pattern)]
+    if pattern[: len(overlap)] != overlap:
+        return False
+    # the remaining bytes cannot match text if they contain control characters (e.g., null bytes)
+    remainder = pattern[max(0, len(prefix) - offset) :]
+    if remainder and followed_by_text:
+        return not any(byte < 0x20 and byte not in b"\t\r\n" for byte in remainder)
+    return True
+
 
 class TcpProxyClient(ProxyClient):
     """Backend TCP connection for protocol-detected connections."""
@@ -43,21 +308,483 @@ class TcpProxyClient(ProxyClient):
         self.transport.registerProducer(server.transport, True)
         server.transport.registerProducer(self.transport, True)
 
+        stats = self.factory.stats
+        stats.connections_active += 1
+        stats.backend_connect_time.observe(
+            time.perf_counter() - self.factory.connect_started
+        )
+
         # Send buffered data from detection phase
         if hasattr(self.factory, "initial_data"):
             initial_data = self.factory.initial_data
             self.transport.write(initial_data)
+            stats.bytes_to_backend += len(initial_data)
             del self.factory.initial_data
 
     def dataReceived(self, data):
         """Forward data from backend to client."""
+        self.factory.stats.bytes_to_client += len(data)
         self.factory.server.transport.write(data)
 
     def connectionLost(self, reason):
         """Backend connection closed."""
+        self.factory.stats.connections_active -= 1
         self.factory.server.transport.loseConnection()
 
 
+class _TcpProxyClientFactory(ProxyClientFactory):
+    """Factory of the backend connection of a client connection claimed by an extension."""
+
+    protocol = TcpProxyClient
+
+    def __init__(
+        self,
+        server: "HTTPChannel | _DedicatedTcpServer",
+        ext_name: str,
+        initial_data: bytes,
+    ):
+        self.server = server
+        self.ext_name = ext_name
+        self.initial_data = initial_data
+        self.stats = TCP_ROUTER_STATS.extension(ext_name)
+        self.connect_started = time.perf_counter()
+
+    def clientConnectionFailed(self, connector, reason):
+        self.stats.backend_connect_failures += 1
+        super().clientConnectionFailed(connector, reason)
+
+
+class _PooledTcpProxyClient(TcpProxyClient):
+    """Backend TCP connection, established in advance and kept idle in a pool until claimed."""
+
+    pool: "BackendConnectionPool"
+    attached = False
+
+    def connectionMade(self):
+        self.pool = self.factory.pool
+        self._idle_data = []
+        self._idle_timer = None
+        self.pool._connection_made(self)
+
+    def dataReceived(self, data):
+        if not self.attached:
+            # buffer any data sent by the backend before the connection is claimed
+            self._idle_data.append(data)
+            return
+        super().dataReceived(data)
+
+    def connectionLost(self, reason):
+        if not self.attached:
+            self.pool._idle_connection_lost(self)
+            return
+        super().connectionLost(reason)
+
+    def attach(self, client_factory: "_TcpProxyClientFactory"):
+        """Hand out this connection to the client connection of the given factory."""
+        self.factory = client_factory
+        self.attached = True
+        TcpProxyClient.connectionMade(self)
+        if self._idle_data:
+            self.dataReceived(b"".join(self._idle_data))
+            self._idle_data = []
+
+
+class _BackendPoolFactory(ClientFactory):
+    protocol = _PooledTcpProxyClient
+
+    def __init__(self, pool: "BackendConnectionPool"):
+        self.pool = pool
+        self.started = time.monotonic()
+
+    def clientConnectionFailed(self, connector, reason):
+        self.pool._connection_failed(reason)
+
+
+class BackendConnectionPool:
+    """
+    Pool of pre-connected, idle backend connections of a TCP extension, which are handed out to
+    claimed client connections - saving the connection setup to the backend on each claim.
+
+    The pool is filled up to `size` connections once the backend is ready (see `start`), and
+    refilled whenever a connection is handed out. Idle connections are evicted (and replaced)
+    after `idle_timeout` seconds, to avoid handing out connections that the backend is about to
+    close (e.g., PostgreSQL closes connections without a startup message after 60 seconds).
+    """
+
+    def __init__(
+        self,
+        backend_host: str,
+        backend_port: int,
+        size: int,
+        idle_timeout: float = 30.0,
+        retry_delay: float = 1.0,
+    ):
+        self.backend_host = backend_host
+        self.backend_port = backend_port
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.retry_delay = retry_delay
+        self.idle: list[_PooledTcpProxyClient] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.connections_opened = 0
+        self.connect_time_total = 0.0
+        self._connecting = 0
+        self._fill_call = None
+        self._closed = False
+
+    def start(self):
+        """Start pre-connecting the idle connections, once the backend accepts connections."""
+        self._fill()
+
+    def acquire(self) -> _PooledTcpProxyClient | None:
+        """Return an idle backend connection, or None if the pool is empty (a miss)."""
+        client = None
+        while self.idle and not client:
+            candidate = self.idle.pop()
+            self._cancel_idle_timer(candidate)
+            if not candidate.transport.disconnecting:
+                client = candidate
+        if client:
+            self.hits += 1
+        else:
+            self.misses += 1
+        self._fill()
+        return client
+
+    def close(self):
+        """Close the pool, including all idle connections."""
+        self._closed = True
+        if self._fill_call and self._fill_call.active():
+            self._fill_call.cancel()
+        idle, self.idle = self.idle, []
+        for client in idle:
+            self._cancel_idle_timer(client)
+            client.transport.loseConnection()
+
+    def stats(self) -> dict:
+        """Return the hit/miss statistics of this pool."""
+        connect_time_avg = (
+            self.connect_time_total / self.connections_opened
+            if self.connections_opened
+            else 0.0
+        )
+        return {
+            "size": self.size,
+            "idle": len(self.idle),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "connect_time_avg": connect_time_avg,
+            # estimated time saved by handing out pre-connected connections
+            "connect_time_saved": self.hits * connect_time_avg,
+        }
+
+    def _fill(self):
+        while not self._closed and len(self.idle) + self._connecting < self.size:
+            self._connecting += 1
+            reactor.connectTCP(
+                self.backend_host, self.backend_port, _BackendPoolFactory(self)
+            )
+
+    def _schedule_fill(self):
+        # refill with a delay, to avoid reconnecting in a tight loop if the backend is unavailable
+        if not self._closed and not (self._fill_call and self._fill_call.active()):
+            self._fill_call = reactor.callLater(self.retry_delay, self._fill)
+
+    def _connection_made(self, client: _PooledTcpProxyClient):
+        self._connecting -= 1
+        self.connections_opened += 1
+        self.connect_time_total += time.monotonic() - client.factory.started
+        if self._closed or len(self.idle) >= self.size:
+            client.transport.loseConnection()
+            return
+        client._idle_timer = reactor.callLater(self.idle_timeout, self._evict, client)
+        self.idle.append(client)
+
+    def _connection_failed(self, reason):
+        self._connecting -= 1
+        LOG.debug(
+            "Unable to pre-connect to %s:%s: %s",
+            self.backend_host,
+            self.backend_port,
+            reason.getErrorMessage(),
+        )
+        self._schedule_fill()
+
+    def _idle_connection_lost(self, client: _PooledTcpProxyClient):
+        self._cancel_idle_timer(client)
+        if client in self.idle:
+            # closed by the backend
+            self.idle.remove(client)
+            self._schedule_fill()
+
+    def _evict(self, client: _PooledTcpProxyClient):
+        client._idle_timer = None
+        if client in self.idle:
+            self.idle.remove(client)
+            self.evictions += 1
+            client.transport.loseConnection()
+            self._fill()
+
+    @staticmethod
+    def _cancel_idle_timer(client: _PooledTcpProxyClient):
+        if client._idle_timer and client._idle_timer.active():
+            client._idle_timer.cancel()
+        client._idle_timer = None
+
+
+def get_tcp_router_stats() -> dict[str, dict]:
+    """
+    Return the statistics of the TCP connections claimed by each extension, by extension name:
+    connection and byte counters, as well as histograms of the detection and backend connect time.
+    """
+    return TCP_ROUTER_STATS.snapshot()["extensions"]
+
+
+def get_tcp_backend_pool_stats() -> dict[str, dict]:
+    """Return the statistics of the backend connection pools, by extension name."""
+    return {name: pool.stats() for name, pool in _tcp_backend_pools.items()}
+
+
+def start_tcp_backend_pool(extension_name: str):
+    """
+    Start pre-connecting the backend connection pool of the given extension (if it has one), e.g.,
+    once the backend of an extension with a connect hook is ready. Must be called from the reactor
+    thread.
+    """
+    if pool := _tcp_backend_pools.get(extension_name):
+        pool.start()
+
+
+def _forward_to_backend(
+    channel: HTTPChannel, ext_name: str, backend_host: str, backend_port: int
+):
+    """Switch the given gateway connection to TCP proxy mode, forwarding to the given backend."""
+    LOG.debug(
+        "Routing TCP connection to %s (%s:%s)", ext_name, backend_host, backend_port
+    )
+    # Switch to TCP proxy mode
+    initial_data = channel._detection_buffer
+    _stop_detection(channel)
+    stats = _proxy_to_backend(
+        channel, ext_name, backend_host, backend_port, initial_data
+    )
+    if channel._detection_started is not None:
+        stats.detection_time.observe(time.perf_counter() - channel._detection_started)
+
+
+def _proxy_to_backend(
+    server: "HTTPChannel | _DedicatedTcpServer",
+    ext_name: str,
+    backend_host: str,
+    backend_port: int,
+    initial_data: bytes = b"",
+) -> TcpExtensionStats:
+    """Forward the given client connection to the backend, once the backend is ready."""
+    server.transport.pauseProducing()
+
+    # Create backend connection
+    client_factory = _TcpProxyClientFactory(server, ext_name, initial_data)
+    stats = server._tcp_stats = client_factory.stats
+    stats.connections_claimed += 1
+
+    if on_connect := _tcp_connect_hooks.get(ext_name):
+        # hold the (paused) client connection until the backend is ready
+        def _backend_ready(_):
+            if not getattr(server.transport, "disconnected", False):
+                _connect_to_backend(
+                    client_factory, ext_name, backend_host, backend_port
+                )
+
+        def _backend_failed(failure):
+            stats.backend_connect_failures += 1
+            LOG.warning(
+                "Backend of TCP extension %s is not available: %s",
+                ext_name,
+                failure.getErrorMessage(),
+            )
+            server.transport.loseConnection()
+
+        on_connect().addCallbacks(_backend_ready, _backend_failed)
+        return stats
+
+    _connect_to_backend(client_factory, ext_name, backend_host, backend_port)
+    return stats
+
+
+def _connect_to_backend(
+    client_factory: _TcpProxyClientFactory,
+    ext_name: str,
+    backend_host: str,
+    backend_port: int,
+):
+    client_factory.connect_started = time.perf_counter()
+    if ext_name in _tcp_relay_extensions and _start_relay(
+        client_factory, ext_name, backend_host, backend_port
+    ):
+        return
+
+    # Use a pre-connected backend connection, if available
+    pool = _tcp_backend_pools.get(ext_name)
+    if (
+        pool
+        and pool.backend_port == backend_port
+        and pool.backend_host == backend_host
+        and (pooled_client := pool.acquire())
+    ):
+        pooled_client.attach(client_factory)
+        return
+
+    reactor.connectTCP(backend_host, backend_port, client_factory)
+
+
+def _start_relay(
+    client_factory: _TcpProxyClientFactory,
+    ext_name: str,
+    backend_host: str,
+    backend_port: int,
+) -> bool:
+    """
+    Hand the client connection over to a TcpRelay, and return whether this succeeded (which is not
+    the case for connections that cannot be detached from the reactor, e.g., TLS connections).
+    """
+    client = detach_socket(client_factory.server.transport)
+    if not client:
+        LOG.debug("Unable to relay TCP connection to %s, using the reactor", ext_name)
+        return False
+    stats = client_factory.stats
+    stats.connections_active += 1
+    TcpRelay(
+        client,
+        backend_host,
+        backend_port,
+        initial_data=client_factory.initial_data,
+        name=f"tcp-relay-{ext_name}",
+        on_close=lambda relay: reactor.callFromThread(_relay_closed, stats, relay),
+    ).start()
+    return True
+
+
+def _relay_closed(stats: TcpExtensionStats, relay: TcpRelay):
+    stats.connections_active -= 1
+    stats.bytes_to_backend += relay.bytes_to_backend
+    stats.bytes_to_client += relay.bytes_to_client
+    if relay.connect_time is None:
+        stats.backend_connect_failures += 1
+    else:
+        stats.backend_connect_time.observe(relay.connect_time)
+
+
+class _DedicatedTcpServer(Protocol):
+    """Client connection on a dedicated listening port of an extension, forwarded as-is."""
+
+    _tcp_peer = None
+    _tcp_stats = None
+
+    def connectionMade(self):
+        factory = self.factory
+        _proxy_to_backend(
+            self, factory.ext_name, factory.backend_host, factory.backend_port
+        )
+
+    def set_tcp_peer(self, peer: TcpProxyClient):
+        self._tcp_peer = peer
+        self.transport.resumeProducing()
+
+    def dataReceived(self, data):
+        self._tcp_stats.bytes_to_backend += len(data)
+        self._tcp_peer.transport.write(data)
+
+    def connectionLost(self, reason):
+        if tcp_peer := self._tcp_peer:
+            self._tcp_peer = None
+            tcp_peer.transport.loseConnection()
+
+
+class _DedicatedTcpServerFactory(Factory):
+    protocol = _DedicatedTcpServer
+
+    def __init__(self, ext_name: str, backend_host: str, backend_port: int):
+        self.ext_name = ext_name
+        self.backend_host = backend_host
+        self.backend_port = backend_port
+
+
+def listen_tcp_extension(
+    extension_name: str,
+    port: int,
+    backend_host: str,
+    backend_port: int,
+    interface: str = "",
+) -> IListeningPort:
+    """
+    Listen on a dedicated port for TCP connections of an extension, which are forwarded to the
+    backend without protocol detection - e.g., for server-speaks-first protocols (like MySQL or
+    SMTP), whose clients wait for a greeting before sending any data. The connect hook, connection
+    pool, and relay mode of the extension (if any) apply to these connections as well.
+    Must be called from the reactor thread - returns the listening port, to stop listening.
+    The backend of the extension is configured via `register_tcp_extension` or
+    `configure_tcp_backend`.
+
+    Args:
+        extension_name: Name of the extension
+        port: Port to listen on
+        backend_host: Backend host to route to
+        backend_port: Backend port to route to
+        interface: Interface to listen on (all interfaces by default)
+    """
+    listening_port = reactor.listenTCP(
+        port,
+        _DedicatedTcpServerFactory(extension_name, backend_host, backend_port),
+        interface=interface,
+    )
+    LOG.info(
+        "Listening on port %s for TCP extension %s -> %s:%s",
+        port,
+        extension_name,
+        backend_host,
+        backend_port,
+    )
+    return listening_port
+
+
+def _stop_detection(channel: HTTPChannel):
+    """End the detection phase of the given gateway connection."""
+    channel._detecting = False
+    channel._detection_buffer = b""
+    if timer := getattr(channel, "_detection_timer", None):
+        channel._detection_timer = None
+        if timer.active():
+            timer.cancel()
+
+
+def _schedule_detection_timeout(channel: HTTPChannel):
+    if TCP_DETECTION_TIMEOUT > 0 and not getattr(channel, "_detection_timer", None):
+        channel._detection_timer = reactor.callLater(
+            TCP_DETECTION_TIMEOUT, _detection_timed_out, channel
+        )
+
+
+def _detection_timed_out(channel: HTTPChannel):
+    channel._detection_timer = None
+    if not channel._detecting:
+        return
+    TCP_ROUTER_STATS.detection_timeouts += 1
+    if _tcp_default_backend:
+        LOG.debug("TCP detection timed out, routing to the default backend")
+        _forward_to_backend(channel, *_tcp_default_backend)
+        return
+
+    buffered_data = channel._detection_buffer
+    _stop_detection(channel)
+    TCP_ROUTER_STATS.connections_passed_to_http += 1
+    if buffered_data:
+        # detection has ended, hence the data is passed on to the HTTP handler
+        channel.dataReceived(buffered_data)
+
+
 def patch_gateway_for_tcp_routing():
     """
     Patch the LocalStack gateway to enable protocol detection and TCP routing.
@@ -76,9 +803,19 @@ def patch_gateway_for_tcp_routing():
         # Call original init
         fn(self, *args, **kwargs)
         # Add our detection attributes
-        self._detection_buffer = []
+        self._detection_buffer = b""
+        self._detection_started = None
+        self._detection_timer = None
         self._detecting = True
         self._tcp_peer = None
+        self._tcp_stats = None
+
+    @patch(HTTPChannel.connectionMade)
+    def _patched_connectionMade(fn, self):
+        fn(self)
+        if _tcp_default_backend:
+            # route connections of clients which wait for the server to speak first
+            _schedule_detection_timeout(self)
 
     @patch(HTTPChannel.dataReceived)
     def _patched_dataReceived(fn, self, data):
@@ -87,6 +824,7 @@ def patch_gateway_for_tcp_routing():
             # Already decided - either proxying TCP or processing HTTP
             if getattr(self, "_tcp_peer", None):
                 # TCP proxying mode
+                self._tcp_stats.bytes_to_backend += len(data)
                 self._tcp_peer.transport.write(data)
             else:
                 # HTTP mode - pass to original
@@ -94,42 +832,57 @@ def patch_gateway_for_tcp_routing():
             return
 
         # Still detecting - buffer data
-        if not hasattr(self, "_detection_buffer"):
-            self._detection_buffer = []
-        self._detection_buffer.append(data)
-        buffered_data = b"".join(self._detection_buffer)
-
-        # Try each registered extension's matcher
-        if len(buffered_data) >= 8:
-            for ext_name, matcher, backend_host, backend_port in _tcp_extensions:
-                try:
-                    if matcher(buffered_data):
-                        # Switch to TCP proxy mode
-                        self._detecting = False
-                        self.transport.pauseProducing()
-
-                        # Create backend connection
-                        client_factory = ProxyClientFactory()
-                        client_factory.protocol = TcpProxyClient
-                        client_factory.server = self
-                        client_factory.initial_data = buffered_data
-
-                        reactor.connectTCP(backend_host, backend_port, client_factory)
-                        return
-                except Exception as e:
-                    LOG.debug("Error in matcher for %s: %s", ext_name, e)
-                    continue
-
-            # No extension claimed the connection
-            self._detecting = False
-            # Feed buffered data to HTTP handler
-            for chunk in self._detection_buffer:
-                fn(self, chunk)
-            self._detection_buffer = []
+        if not getattr(self, "_detection_buffer", b""):
+            self._detection_buffer = b""
+            self._detection_started = time.perf_counter()
+        buffered_data = self._detection_buffer = self._detection_buffer + data
+
+        # Fast path for connections that are obviously HTTP, if no extension may claim them
+        http_prefix = _http_fast_path.get(buffered_data[:4])
+        if http_prefix and buffered_data.startswith(http_prefix):
+            _stop_detection(self)
+            TCP_ROUTER_STATS.connections_passed_to_http += 1
+            fn(self, buffered_data)
+            return
+
+        # Byte signatures are matched first, via the compiled dispatch table
+        backend, incomplete = _tcp_signature_table.match(buffered_data)
+        if backend:
+            _forward_to_backend(self, *backend)
+            return
+
+        if len(buffered_data) < MIN_DETECTION_BYTES:
+            _schedule_detection_timeout(self)
+            return
+
+        # Fall back to the matcher functions of extensions without (matching) signatures
+        detection_data = buffered_data[:MAX_DETECTION_BYTES]
+        for ext_name, matcher, backend_host, backend_port in _tcp_matchers:
+            try:
+                if matcher(detection_data):
+                    _forward_to_backend(self, ext_name, backend_host, backend_port)
+                    return
+            except Exception as e:
+                LOG.debug("Error in matcher for %s: %s", ext_name, e)
+                TCP_ROUTER_STATS.extension(ext_name).matcher_errors += 1
+                continue
+
+        if incomplete and len(buffered_data) < MAX_DETECTION_BYTES:
+            # a signature may still match once more data has been received
+            _schedule_detection_timeout(self)
+            return
+
+        # No extension claimed the connection
+        _stop_detection(self)
+        TCP_ROUTER_STATS.connections_passed_to_http += 1
+        # Feed buffered data to HTTP handler
+        fn(self, buffered_data)
 
     @patch(HTTPChannel.connectionLost)
     def _patched_connectionLost(fn, self, reason):
         """Handle connection close."""
+        if getattr(self, "_detecting", False):
+            _stop_detection(self)
         tcp_peer = getattr(self, "_tcp_peer", None)
         if tcp_peer:
             tcp_peer.transport.loseConnection()
@@ -152,28 +905,134 @@ def register_tcp_extension(
     matcher: callable,
     backend_host: str,
     backend_port: int,
+    signatures: list[TcpSignature] | None = None,
+    pool_size: int = 0,
+    pool_idle_timeout: float = 30.0,
+    on_connect: Callable[[], Deferred] | None = None,
+    relay: bool = False,
+    default: bool = False,
 ):
     """
     Register an extension for TCP connection routing.
 
+    Connections are first classified via the byte signatures of all registered extensions
+    (compiled into a single dispatch table), and only then via the matcher functions.
+
     Args:
         extension_name: Name of the extension
-        matcher: Function that takes bytes and returns bool to claim connection
+        matcher: Function that takes bytes and returns bool to claim connection (optional if
+            signatures are given)
         backend_host: Backend host to route to
         backend_port: Backend port to route to
+        signatures: Byte signatures identifying the connections of this extension
+        pool_size: Number of pre-connected idle backend connections to keep (0 to disable)
+        pool_idle_timeout: Time in seconds after which idle pooled connections are replaced
+        on_connect: Function invoked (in the reactor thread) for each claimed connection, before
+            connecting to the backend - returns a Deferred which fires once the backend is ready.
+            Without a connect hook, the backend is assumed to be ready, and the connection pool is
+            filled right away - otherwise, see `start_tcp_backend_pool`.
+        relay: Whether to forward claimed connections via a (zero-copy) TcpRelay instead of the
+            reactor, for high-throughput protocols (bypasses the connection pool)
+        default: Whether to route connections which could not be identified within the detection
+            timeout to this extension (e.g., for server-speaks-first protocols), instead of HTTP
     """
-    _tcp_extensions.append((extension_name, matcher, backend_host, backend_port))
+    global _tcp_default_backend
+    if not matcher and not signatures and not default:
+        raise ValueError(
+            f"Extension {extension_name} requires a TCP matcher or signatures"
+        )
+    _tcp_extensions.append(
+        (extension_name, matcher, backend_host, backend_port, list(signatures or []))
+    )
+    _compile_tcp_extensions()
+    configure_tcp_backend(
+        extension_name,
+        backend_host,
+        backend_port,
+        pool_size=pool_size,
+        pool_idle_timeout=pool_idle_timeout,
+        on_connect=on_connect,
+        relay=relay,
+    )
+    if default:
+        _tcp_default_backend = (extension_name, backend_host, backend_port)
+    elif _tcp_default_backend and _tcp_default_backend[0] == extension_name:
+        _tcp_default_backend = None
     LOG.info(
         "Registered TCP extension %s -> %s:%s", extension_name, backend_host, backend_port
     )
 
 
+def configure_tcp_backend(
+    extension_name: str,
+    backend_host: str,
+    backend_port: int,
+    pool_size: int = 0,
+    pool_idle_timeout: float = 30.0,
+    on_connect: Callable[[], Deferred] | None = None,
+    relay: bool = False,
+):
+    """
+    Configure how the TCP connections of an extension are forwarded to its backend (see
+    `register_tcp_extension` for the arguments), without registering the extension for protocol
+    detection - e.g., for extensions which only receive connections on dedicated ports.
+    """
+    if previous_pool := _tcp_backend_pools.pop(extension_name, None):
+        previous_pool.close()
+    if pool_size > 0:
+        pool = _tcp_backend_pools[extension_name] = BackendConnectionPool(
+            backend_host, backend_port, pool_size, idle_timeout=pool_idle_timeout
+        )
+        if not on_connect:
+            # the backend is ready - pre-connect, so that even the first claim is a hit
+            reactor.callFromThread(pool.start)
+    _tcp_connect_hooks.pop(extension_name, None)
+    if on_connect:
+        _tcp_connect_hooks[extension_name] = on_connect
+    _tcp_relay_extensions.discard(extension_name)
+    if relay:
+        _tcp_relay_extensions.add(extension_name)
+
+
 def unregister_tcp_extension(extension_name: str):
     """Unregister an extension from TCP routing."""
-    global _tcp_extensions
+    global _tcp_extensions, _tcp_default_backend
     _tcp_extensions = [
-        (name, matcher, host, port)
-        for name, matcher, host, port in _tcp_extensions
-        if name != extension_name
+        extension for extension in _tcp_extensions if extension[0] != extension_name
     ]
+    _compile_tcp_extensions()
+    if pool := _tcp_backend_pools.pop(extension_name, None):
+        pool.close()
+    _tcp_connect_hooks.pop(extension_name, None)
+    _tcp_relay_extensions.discard(extension_name)
+    if _tcp_default_backend and _tcp_default_backend[0] == extension_name:
+        _tcp_default_backend = None
     LOG.info("Unregistered TCP extension %s", extension_name)
+
+
+def _compile_tcp_extensions():
+    """Rebuild the signature dispatch table and matcher list from the registered extensions."""
+    global _tcp_signature_table, _tcp_matchers, _http_fast_path
+    table = SignatureTable()
+    matchers = []
+    for priority, (name, matcher, host, port, signatures) in enumerate(_tcp_extensions):
+        for signature in signatures:
+            table.add(signature, (name, host, port), priority)
+        if matcher:
+            matchers.append((name, matcher, host, port))
+
+    # HTTP prefixes are only fast-pathed if no extension may claim them. Matcher functions
+    # cannot be inspected, hence they disable the fast path altogether.
+    fast_path = {}
+    if not matchers:
+        signatures = [sig for extension in _tcp_extensions for sig in extension[4]]
+        for prefix, followed_by_text in HTTP_PREFIXES:
+            if not any(
+                _may_claim_http_prefix(sig, prefix, followed_by_text)
+                for sig in signatures
+            ):
+                fast_path[prefix[:4]] = prefix
+
+    _tcp_signature_table = table
+    _tcp_matchers = matchers
+    _http_fast_path = fast_path
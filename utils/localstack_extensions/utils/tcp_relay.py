@@ -0,0 +1,195 @@
+"""
+Zero-copy relay for TCP connections claimed by extensions.
+
+By default, claimed TCP connections are proxied through the Twisted reactor, which copies every
+byte from the kernel into Python objects and back. With the relay, the client socket of a claimed
+connection is detached from the reactor, and the traffic between client and backend is forwarded by
+a pair of dedicated threads - on Linux via `os.splice`, which moves the data between the sockets
+through a kernel pipe, without copying it into user space.
+"""
+
+import fcntl
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+from collections.abc import Callable
+
+LOG = logging.getLogger(__name__)
+
+SPLICE_SUPPORTED = hasattr(os, "splice")
+"""Whether the relay forwards data via `os.splice` (Linux, Python 3.10+), or via a copy loop."""
+
+# Size of the kernel pipe used for splicing, and of the chunks forwarded by the copy loop
+RELAY_PIPE_SIZE = 1024 * 1024
+# Timeout in seconds for connecting to the backend
+RELAY_CONNECT_TIMEOUT = 10
+
+
+def detach_socket(transport) -> socket.socket | None:
+    """
+    Detach the socket underlying the given Twisted transport (or its wrapped transports) from the
+    reactor, and return a duplicate of it. The transport is aborted, which closes its file
+    descriptor (and notifies its protocols) on the next reactor iteration, while the connection is
+    kept open for the duplicated socket. Returns None if the transport is not backed by a plain TCP
+    socket (e.g., for TLS connections). Must be called from the reactor thread.
+    """
+    while transport is not None:
+        if hasattr(transport, "_tlsConnection"):
+            # the traffic is encrypted by the transport, hence cannot be forwarded as-is
+            return None
+        if isinstance(getattr(transport, "socket", None), socket.socket) and hasattr(
+            transport, "abortConnection"
+        ):
+            break
+        transport = getattr(transport, "transport", None)
+    else:
+        return None
+
+    sock = transport.socket.dup()
+    transport.stopReading()
+    transport.stopWriting()
+    # aborting (rather than losing) the connection closes the file descriptor of the transport
+    # without shutting down the connection, which is shared with the duplicated socket
+    transport.abortConnection()
+    # an aborted transport sets SO_LINGER to send a reset on close, which is reverted once the
+    # transport is closed, so that the detached socket is closed gracefully
+    transport.reactor.callLater(0, _disable_linger, sock)
+    sock.setblocking(True)
+    return sock
+
+
+def _disable_linger(sock: socket.socket):
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, struct.pack("ii", 0, 0))
+    except OSError:
+        pass  # the socket has already been closed by the relay
+
+
+class TcpRelay:
+    """
+    Forwards the traffic between a client socket and a backend, with one thread per direction.
+    The relay takes ownership of the client socket, and closes it once both directions are done.
+    The `on_close` callback is invoked (in a relay thread) once the relay is closed.
+    """
+
+    def __init__(
+        self,
+        client: socket.socket,
+        backend_host: str,
+        backend_port: int,
+        initial_data: bytes = b"",
+        name: str = "tcp-relay",
+        on_close: Callable[["TcpRelay"], None] | None = None,
+    ):
+        self.client = client
+        self.backend_host = backend_host
+        self.backend_port = backend_port
+        self.initial_data = initial_data
+        self.name = name
+        self.backend: socket.socket | None = None
+        self.bytes_to_backend = 0
+        self.bytes_to_client = 0
+        self.connect_time: float | None = None
+        self.on_close = on_close
+        self._open_directions = 2
+        self._mutex = threading.Lock()
+
+    def start(self):
+        threading.Thread(
+            target=self._run, name=f"{self.name}-connect", daemon=True
+        ).start()
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            self.backend = socket.create_connection(
+                (self.backend_host, self.backend_port), timeout=RELAY_CONNECT_TIMEOUT
+            )
+            self.connect_time = time.perf_counter() - start
+            self.backend.settimeout(None)
+            self.backend.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            if self.initial_data:
+                self.backend.sendall(self.initial_data)
+                self.bytes_to_backend += len(self.initial_data)
+                self.initial_data = b""
+        except OSError as e:
+            LOG.debug(
+                "Unable to connect relay to %s:%s: %s",
+                self.backend_host,
+                self.backend_port,
+                e,
+            )
+            self.close()
+            return
+
+        threading.Thread(
+            target=self._forward,
+            args=(self.backend, self.client, "bytes_to_client"),
+            name=f"{self.name}-to-client",
+            daemon=True,
+        ).start()
+        self._forward(self.client, self.backend, "bytes_to_backend")
+
+    def _forward(self, source: socket.socket, target: socket.socket, counter: str):
+        pump = _splice if SPLICE_SUPPORTED else _copy
+        try:
+            for size in pump(source, target):
+                setattr(self, counter, getattr(self, counter) + size)
+        except OSError as e:
+            LOG.debug("Relay %s stopped forwarding: %s", self.name, e)
+        finally:
+            try:
+                target.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            with self._mutex:
+                self._open_directions -= 1
+                done = not self._open_directions
+            if done:
+                self.close()
+
+    def close(self):
+        for sock in (self.client, self.backend):
+            if sock:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        if on_close := self.on_close:
+            self.on_close = None
+            on_close(self)
+
+
+def _splice(source: socket.socket, target: socket.socket):
+    """Move data from source to target through a kernel pipe, yielding the size of each chunk."""
+    read_fd, write_fd = os.pipe()
+    try:
+        try:
+            fcntl.fcntl(write_fd, fcntl.F_SETPIPE_SZ, RELAY_PIPE_SIZE)
+        except (AttributeError, OSError):
+            pass  # keep the default pipe size
+        source_fd = source.fileno()
+        target_fd = target.fileno()
+        while size := os.splice(
+            source_fd, write_fd, RELAY_PIPE_SIZE, flags=os.SPLICE_F_MOVE
+        ):
+            remaining = size
+            while remaining:
+                remaining -= os.splice(
+                    read_fd, target_fd, remaining, flags=os.SPLICE_F_MOVE
+                )
+            yield size
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def _copy(source: socket.socket, target: socket.socket):
+    """Copy data from source to target via a reusable buffer, yielding the size of each chunk."""
+    buffer = memoryview(bytearray(RELAY_PIPE_SIZE))
+    while size := source.recv_into(buffer):
+        target.sendall(buffer[:size])
+        yield size
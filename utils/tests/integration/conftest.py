@@ -16,9 +16,14 @@ import pytest
 from hyperframe.frame import Frame
 from localstack.utils.net import get_free_tcp_port
 from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+from localstack_extensions.utils.tcp_protocol_router import (
+    TcpSignature,
+    register_tcp_extension,
+    unregister_tcp_extension,
+)
 from rolo import Router
 from rolo.gateway import Gateway
-from twisted.internet import reactor
+from twisted.internet import reactor, threads
 from twisted.web import server as twisted_server
 
 GRPCBIN_IMAGE = "moul/grpcbin"
@@ -29,6 +34,9 @@ GRPCBIN_SECURE_PORT = 9001  # HTTP/2 with TLS
 HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
 SETTINGS_FRAME = b"\x00\x00\x00\x04\x00\x00\x00\x00\x00"  # Empty SETTINGS frame
 
+# Name of the TCP extension registered by the signature-based grpcbin fixture
+GRPCBIN_SIGNATURE_EXTENSION = "grpcbin-signature-test"
+
 
 class GrpcbinExtension(ProxiedDockerContainerExtension):
     """
@@ -129,6 +137,31 @@ def grpcbin_extension(grpcbin_extension_server):
     return grpcbin_extension_server["extension"]
 
 
+@pytest.fixture
+def grpcbin_signature_extension_server(grpcbin_extension_server):
+    """
+    Route HTTP/2 connections of the test gateway to the grpcbin container via a TCP signature
+    (registered as a separate extension), instead of the matcher function of the grpcbin test
+    extension. Signatures are classified before matchers, hence take precedence while registered.
+    """
+    extension = grpcbin_extension_server["extension"]
+    threads.blockingCallFromThread(
+        reactor,
+        register_tcp_extension,
+        GRPCBIN_SIGNATURE_EXTENSION,
+        None,
+        extension.container_host,
+        GRPCBIN_INSECURE_PORT,
+        signatures=[TcpSignature(HTTP2_PREFACE)],
+    )
+
+    yield grpcbin_extension_server
+
+    threads.blockingCallFromThread(
+        reactor, unregister_tcp_extension, GRPCBIN_SIGNATURE_EXTENSION
+    )
+
+
 def parse_server_frames(data: bytes) -> list:
     """Parse HTTP/2 frames from server response data (no preface expected).
 
@@ -0,0 +1,179 @@
+"""
+Benchmark of the HTTP request throughput of the gateway, with TCP protocol routing enabled.
+
+Requests are served by a Twisted Site over in-memory transports (one connection per request), to
+isolate the overhead of the protocol detection in the patched HTTPChannel from network effects.
+Compares the unpatched gateway with the TCP routing patches applied - with and without the ParadeDB
+extension registered (as set up by the extension itself), and with and without the fast path for
+connections that are obviously HTTP. Reported are the full request throughput, as well as the time
+spent on the first read of each connection (where the protocol detection happens). No Docker or
+network access required, but the ParadeDB extension needs to be installed. The benchmark can be
+deselected with `-m "not benchmark"`.
+"""
+
+import gc
+import time
+
+import pytest
+from localstack.utils.patch import Patch
+from localstack_extensions.utils import tcp_protocol_router
+from localstack_extensions.utils.tcp_protocol_router import (
+    SignatureTable,
+    patch_gateway_for_tcp_routing,
+    register_tcp_extension,
+    unregister_tcp_extension,
+)
+from twisted.internet.testing import StringTransport
+from twisted.web.http import HTTPChannel
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+NUM_REQUESTS = 300
+NUM_CONNECTIONS = 10_000
+ROUNDS = 3
+
+REQUEST = (
+    b"POST /_aws/sqs/messages HTTP/1.1\r\nHost: localhost:4566\r\n"
+    b"Content-Type: application/json\r\nContent-Length: 2\r\n\r\n{}"
+)
+# first read of a connection, only buffered (but not yet processed) by the HTTP parser
+FIRST_READ = b"POST /_aws/sqs/messages HTTP/1.1"
+
+paradedb = pytest.importorskip("localstack_paradedb.extension")
+
+
+class GatewayResource(Resource):
+    isLeaf = True
+
+    def render_POST(self, request):
+        return b"{}"
+
+
+@pytest.fixture
+def tcp_registry(monkeypatch):
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_extensions", [])
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_signature_table", SignatureTable())
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_matchers", [])
+    monkeypatch.setattr(tcp_protocol_router, "_http_fast_path", {})
+    tcp_protocol_router._compile_tcp_extensions()
+    patch_gateway_for_tcp_routing()
+
+
+def _unpatched_gateway():
+    """Configuration of the gateway without the TCP routing patches."""
+    patches = [
+        p
+        for p in Patch.applied_patches
+        if p.obj is HTTPChannel and p.name in ("__init__", "dataReceived")
+    ]
+    for p in patches:
+        p.undo()
+    return lambda: [p.apply() for p in patches]
+
+
+def _no_extensions():
+    return lambda: None
+
+
+def _paradedb_extension() -> "paradedb.ParadeDbExtension":
+    extension = paradedb.ParadeDbExtension()
+    extension.container_host = "postgres"
+    extension.tcp_dedicated_listeners = False
+    return extension
+
+
+def _paradedb_fast_path():
+    """The ParadeDB extension, registered for TCP routing as on LocalStack startup."""
+    extension = _paradedb_extension()
+    extension._setup_tcp_protocol_routing()
+    # the extension is identified by its signatures, hence HTTP connections are fast-pathed
+    assert tcp_protocol_router._tcp_matchers == []
+    assert tcp_protocol_router._http_fast_path
+    return lambda: unregister_tcp_extension(extension.name)
+
+
+def _paradedb_no_fast_path():
+    extension = _paradedb_extension()
+    extension._setup_tcp_protocol_routing()
+    tcp_protocol_router._http_fast_path = {}
+    return lambda: unregister_tcp_extension(extension.name)
+
+
+def _paradedb_matcher_function():
+    """The ParadeDB extension, identified by its matcher function instead of its signatures."""
+    extension = _paradedb_extension()
+    register_tcp_extension(
+        extension.name,
+        extension.tcp_connection_matcher,
+        extension.container_host,
+        extension.tcp_ports[0],
+    )
+    assert tcp_protocol_router._http_fast_path == {}
+    return lambda: unregister_tcp_extension(extension.name)
+
+
+CONFIGURATIONS = {
+    "unpatched gateway": _unpatched_gateway,
+    "no TCP extensions": _no_extensions,
+    "ParadeDB, fast path": _paradedb_fast_path,
+    "ParadeDB, no fast path": _paradedb_no_fast_path,
+    "ParadeDB matcher function": _paradedb_matcher_function,
+}
+
+
+def _connect(site: Site):
+    protocol = site.buildProtocol(None)
+    transport = StringTransport()
+    protocol.makeConnection(transport)
+    return protocol, transport
+
+
+def _serve_requests(site: Site) -> float:
+    """Serve full requests, each on a new connection, and return the requests per second."""
+    start = time.perf_counter()
+    for _ in range(NUM_REQUESTS):
+        protocol, transport = _connect(site)
+        protocol.dataReceived(REQUEST)
+        protocol.connectionLost(None)
+    duration = time.perf_counter() - start
+    assert transport.value().startswith(b"HTTP/1.1 200")
+    return NUM_REQUESTS / duration
+
+
+def _first_reads(site: Site) -> float:
+    """Return the average time in seconds for the first read of new connections."""
+    protocols = [_connect(site)[0] for _ in range(NUM_CONNECTIONS)]
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for protocol in protocols:
+            protocol.dataReceived(FIRST_READ)
+        return (time.perf_counter() - start) / NUM_CONNECTIONS
+    finally:
+        gc.enable()
+
+
+@pytest.mark.benchmark
+def test_benchmark_gateway_throughput(tcp_registry):
+    site = Site(GatewayResource())
+    throughput = {}
+    first_read = {}
+
+    # interleave the configurations in each round, to reduce the effect of drifts
+    for _ in range(ROUNDS):
+        for name, configure in CONFIGURATIONS.items():
+            restore = configure()
+            try:
+                throughput[name] = max(throughput.get(name, 0), _serve_requests(site))
+                duration = _first_reads(site)
+                first_read[name] = min(first_read.get(name, duration), duration)
+            finally:
+                restore()
+                tcp_protocol_router._compile_tcp_extensions()
+
+    print()
+    for name in CONFIGURATIONS:
+        print(
+            f"{name:>26} | {throughput[name]:8.0f} req/s | "
+            f"first read {first_read[name] * 1e6:6.2f}us"
+        )
@@ -9,6 +9,26 @@ We use the Empty service which returns an empty response.
 """
 
 import grpc
+from localstack_extensions.utils.tcp_protocol_router import get_tcp_router_stats
+
+from .conftest import GRPCBIN_SIGNATURE_EXTENSION
+
+
+def _connections_claimed(extension_name: str) -> int:
+    return get_tcp_router_stats().get(extension_name, {}).get("connections_claimed", 0)
+
+
+def _index_call(gateway_port: int) -> bytes:
+    channel = grpc.insecure_channel(f"localhost:{gateway_port}")
+    try:
+        grpc.channel_ready_future(channel).result(timeout=5)
+        return channel.unary_unary(
+            "/grpcbin.GRPCBin/Index",
+            request_serializer=lambda x: x,
+            response_deserializer=lambda x: x,
+        )(b"", timeout=5)
+    finally:
+        channel.close()
 
 
 class TestGrpcEndToEnd:
@@ -130,3 +150,24 @@ class TestGrpcEndToEnd:
 
         finally:
             channel.close()
+
+
+class TestGrpcConnectionClassification:
+    """Tests for the ways TCP connections of the gateway are claimed for grpcbin."""
+
+    def test_connection_claimed_by_matcher(self, grpcbin_extension_server):
+        """Test that connections are claimed via the matcher function of the extension."""
+        extension_name = grpcbin_extension_server["extension"].name
+        claimed_before = _connections_claimed(extension_name)
+
+        assert len(_index_call(grpcbin_extension_server["port"])) > 0
+        assert _connections_claimed(extension_name) > claimed_before
+
+    def test_connection_claimed_by_signature(self, grpcbin_signature_extension_server):
+        """Test that connections are claimed via a signature, ahead of matcher functions."""
+        extension_name = grpcbin_signature_extension_server["extension"].name
+        matcher_claimed_before = _connections_claimed(extension_name)
+
+        assert len(_index_call(grpcbin_signature_extension_server["port"])) > 0
+        assert _connections_claimed(GRPCBIN_SIGNATURE_EXTENSION) > 0
+        assert _connections_claimed(extension_name) == matcher_claimed_before
@@ -0,0 +1,114 @@
+"""
+Benchmark of concurrent HTTP/2 forwarder connections against a live server.
+
+Compares the reactor-driven AsyncTcpForwarder with the blocking TcpForwarder whose `receive_loop`
+runs on the Twisted threadpool (the approach previously used for proxied HTTP/2 connections). For
+an increasing number of concurrent connections, we measure the latency from connection start until
+the first server frame (SETTINGS) is received in response to the HTTP/2 preface.
+"""
+
+import statistics
+import threading
+import time
+
+import pytest
+from localstack_extensions.utils.h2_proxy import AsyncTcpForwarder, TcpForwarder
+from twisted.internet import reactor
+
+from .conftest import HTTP2_PREFACE, SETTINGS_FRAME
+
+CONNECTION_COUNTS = [1, 10, 50, 100]
+TIMEOUT = 10.0
+
+
+def _summarize(name: str, count: int, latencies: list[float]) -> str:
+    if not latencies:
+        return f"{name:>8} | {count:>5} connections | 0/{count} served"
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    return (
+        f"{name:>8} | {count:>5} connections | {len(latencies)}/{count} served | "
+        f"p50 {p50 * 1000:8.2f}ms | p99 {p99 * 1000:8.2f}ms | max {latencies[-1] * 1000:8.2f}ms"
+    )
+
+
+def _measure_async_forwarder(port: int, count: int) -> list[float]:
+    latencies = []
+    forwarders = []
+    all_done = threading.Event()
+
+    def _start_connections():
+        for _ in range(count):
+            started = time.perf_counter()
+            first_data = []
+
+            def _on_data(data, _started=started, _first_data=first_data):
+                if _first_data:
+                    return
+                _first_data.append(data)
+                latencies.append(time.perf_counter() - _started)
+                if len(latencies) == count:
+                    all_done.set()
+
+            forwarder = AsyncTcpForwarder(port, host="localhost", on_data=_on_data)
+            forwarder.send(HTTP2_PREFACE + SETTINGS_FRAME)
+            forwarders.append(forwarder)
+
+    reactor.callFromThread(_start_connections)
+    all_done.wait(timeout=TIMEOUT)
+
+    def _close_connections():
+        for forwarder in forwarders:
+            forwarder.close()
+
+    reactor.callFromThread(_close_connections)
+    return list(latencies)
+
+
+def _measure_threadpool_forwarder(port: int, count: int) -> list[float]:
+    latencies = []
+    forwarders = []
+    lock = threading.Lock()
+    all_done = threading.Event()
+
+    for _ in range(count):
+        started = time.perf_counter()
+        forwarder = TcpForwarder(port, host="localhost")
+        forwarders.append(forwarder)
+        first_data = []
+
+        def _on_data(data, _started=started, _first_data=first_data):
+            if _first_data:
+                return
+            _first_data.append(data)
+            with lock:
+                latencies.append(time.perf_counter() - _started)
+                if len(latencies) == count:
+                    all_done.set()
+
+        reactor.getThreadPool().callInThread(forwarder.receive_loop, _on_data)
+        forwarder.send(HTTP2_PREFACE + SETTINGS_FRAME)
+
+    all_done.wait(timeout=TIMEOUT)
+    with lock:
+        result = list(latencies)
+    for forwarder in forwarders:
+        forwarder.close()
+    return result
+
+
+@pytest.mark.parametrize("count", CONNECTION_COUNTS)
+def test_benchmark_concurrent_connection_latency(grpcbin_extension_server, count):
+    """Report first-frame latency by number of concurrent connections, for both forwarders."""
+    gateway_port = grpcbin_extension_server["port"]
+
+    async_latencies = _measure_async_forwarder(gateway_port, count)
+    threadpool_latencies = _measure_threadpool_forwarder(gateway_port, count)
+
+    print()
+    print(_summarize("reactor", count, async_latencies))
+    print(_summarize("threads", count, threadpool_latencies))
+
+    # the reactor-driven forwarder must serve all connections, independent of the threadpool size
+    assert len(async_latencies) == count
@@ -0,0 +1,166 @@
+"""
+Load test of the ProxyResource with large (100 MB) request and response bodies.
+
+Compares the streaming ProxyResource (long-lived session with keep-alive connections) with the
+previous implementation, which created a new Proxy for every request and read the request body into
+memory. Each variant runs in a separate process against a local HTTP server, to report the peak RSS
+of the proxy process alongside the requests per second. No Docker or network access required. The
+load test transfers several hundred MB, hence it is not part of the unit tests, and can be
+deselected with `-m "not benchmark"`.
+"""
+
+import json
+import os
+import resource
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+BODY_SIZE = 100 * 1024 * 1024
+NUM_REQUESTS = 3
+CHUNK_SIZE = 1024 * 1024
+
+
+class _ZeroStream:
+    """Input stream of the given size, generated on the fly."""
+
+    def __init__(self, size: int):
+        self.remaining = size
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        self.remaining -= size
+        return b"\0" * size
+
+    def readline(self, size: int = -1) -> bytes:
+        return self.read(size)
+
+
+class BackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        remaining = int(self.headers["Content-Length"])
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, CHUNK_SIZE)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(BODY_SIZE))
+        self.end_headers()
+        chunk = b"\0" * CHUNK_SIZE
+        for _ in range(BODY_SIZE // CHUNK_SIZE):
+            self.wfile.write(chunk)
+
+
+def _baseline_proxy(host: str, port: int):
+    """The previous implementation of ProxyResource._proxy_request."""
+    from rolo.proxy import Proxy
+
+    def _proxy_request(request, forward_path: str):
+        proxy = Proxy(forward_base_url=f"http://{host}:{port}")
+        if request.method not in ("GET", "OPTIONS"):
+            request.headers["Content-Length"] = str(len(request.data))
+        request.headers["Host"] = f"localhost:{port}"
+        return proxy.forward(request, forward_path=forward_path)
+
+    return _proxy_request
+
+
+def _streaming_proxy(host: str, port: int):
+    from localstack_extensions.utils.docker import ProxyResource
+
+    return ProxyResource(host, port)._proxy_request
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is inherited from the parent process across fork/exec on Linux, hence prefer the
+    # high water mark of the process' own address space, if available
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _run_variant(variant: str) -> dict:
+    from localstack.http import Request
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BackendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    proxy_request = {"baseline": _baseline_proxy, "streaming": _streaming_proxy}[
+        variant
+    ]("127.0.0.1", port)
+
+    start = time.perf_counter()
+    for _ in range(NUM_REQUESTS):
+        upload = Request(
+            "POST",
+            "/upload",
+            body=_ZeroStream(BODY_SIZE),
+            headers={"Content-Length": str(BODY_SIZE)},
+        )
+        response = proxy_request(upload, forward_path="/upload")
+        assert response.status_code == 200
+        response.close()
+
+        response = proxy_request(Request("GET", "/download"), forward_path="/download")
+        size = sum(len(chunk) for chunk in response.response)
+        assert size == BODY_SIZE
+        response.close()
+    duration = time.perf_counter() - start
+
+    server.shutdown()
+    return {
+        "requests_per_second": 2 * NUM_REQUESTS / duration,
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def _run_in_subprocess(variant: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, variant],
+        capture_output=True,
+        check=True,
+        text=True,
+        # use the same import paths as the test process
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.benchmark
+def test_benchmark_large_bodies():
+    results = {
+        variant: _run_in_subprocess(variant) for variant in ("baseline", "streaming")
+    }
+
+    print()
+    for variant, result in results.items():
+        print(
+            f"{variant:>10} | {2 * NUM_REQUESTS} x {BODY_SIZE // 1024 // 1024} MB | "
+            f"{result['requests_per_second']:6.2f} req/s | "
+            f"peak RSS {result['peak_rss_mb']:8.1f} MB"
+        )
+
+    # the streaming proxy must not hold the request bodies in memory
+    assert results["streaming"]["peak_rss_mb"] < BODY_SIZE / 1024 / 1024
+
+
+if __name__ == "__main__":
+    print(json.dumps(_run_variant(sys.argv[1])))
@@ -0,0 +1,139 @@
+"""
+Throughput benchmark of TCP connections claimed by an extension, forwarded through the gateway.
+
+Compares direct connections to the backend with connections through a Twisted gateway (with the TCP
+routing patches applied), forwarded by the reactor or by the (zero-copy) TcpRelay. Each variant runs
+in a separate process, with the gateway reactor in a background thread. The backend is a local sink
+server, which reads the uploaded data and then sends the same amount of data back. No Docker or
+network access required. The benchmark transfers 512MB per direction, hence it is not part of the
+unit tests, and can be deselected with `-m "not benchmark"`.
+"""
+
+import json
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+TRANSFER_SIZE = 512 * 1024 * 1024
+CHUNK_SIZE = 1024 * 1024
+SIGNATURE = b"BENCH"
+
+
+def _serve_backend(server: socket.socket):
+    """Sink server: read a length-prefixed upload, then send the same number of bytes back."""
+    while True:
+        conn, _ = server.accept()
+        with conn:
+            header = conn.recv(len(SIGNATURE) + 8, socket.MSG_WAITALL)
+            (size,) = struct.unpack("!Q", header[len(SIGNATURE) :])
+            buffer = bytearray(CHUNK_SIZE)
+            remaining = size
+            while remaining:
+                remaining -= conn.recv_into(buffer, min(remaining, CHUNK_SIZE))
+            chunk = b"\0" * CHUNK_SIZE
+            for _ in range(size // CHUNK_SIZE):
+                conn.sendall(chunk)
+
+
+def _start_gateway(backend_port: int, relay: bool) -> int:
+    from localstack_extensions.utils.tcp_protocol_router import (
+        TcpSignature,
+        patch_gateway_for_tcp_routing,
+        register_tcp_extension,
+    )
+    from twisted.internet import reactor
+    from twisted.web.resource import Resource
+    from twisted.web.server import Site
+
+    patch_gateway_for_tcp_routing()
+    register_tcp_extension(
+        "bench",
+        None,
+        "127.0.0.1",
+        backend_port,
+        signatures=[TcpSignature(SIGNATURE)],
+        relay=relay,
+    )
+    port = reactor.listenTCP(0, Site(Resource()), interface="127.0.0.1")
+    threading.Thread(
+        target=reactor.run, kwargs={"installSignalHandlers": False}, daemon=True
+    ).start()
+    return port.getHost().port
+
+
+def _transfer(port: int) -> dict:
+    sock = socket.create_connection(("127.0.0.1", port))
+    chunk = b"\0" * CHUNK_SIZE
+    start = time.perf_counter()
+    sock.sendall(SIGNATURE + struct.pack("!Q", TRANSFER_SIZE))
+    for _ in range(TRANSFER_SIZE // CHUNK_SIZE):
+        sock.sendall(chunk)
+    uploaded = time.perf_counter()
+
+    buffer = bytearray(CHUNK_SIZE)
+    remaining = TRANSFER_SIZE
+    while remaining:
+        size = sock.recv_into(buffer)
+        assert size
+        remaining -= size
+    downloaded = time.perf_counter()
+    sock.close()
+
+    gigabytes = TRANSFER_SIZE / 1024**3
+    return {
+        "upload_gbps": gigabytes / (uploaded - start),
+        "download_gbps": gigabytes / (downloaded - uploaded),
+    }
+
+
+def _run_variant(variant: str) -> dict:
+    backend = socket.create_server(("127.0.0.1", 0))
+    threading.Thread(target=_serve_backend, args=(backend,), daemon=True).start()
+    backend_port = backend.getsockname()[1]
+
+    if variant == "direct":
+        port = backend_port
+    else:
+        port = _start_gateway(backend_port, relay=variant == "relay")
+    return _transfer(port)
+
+
+def _run_in_subprocess(variant: str) -> dict:
+    result = subprocess.run(
+        [sys.executable, __file__, variant],
+        capture_output=True,
+        check=True,
+        text=True,
+        # use the same import paths as the test process
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+@pytest.mark.benchmark
+def test_benchmark_tcp_relay_throughput():
+    variants = {
+        "direct": "direct to backend",
+        "reactor": "gateway (reactor)",
+        "relay": "gateway (relay)",
+    }
+    results = {variant: _run_in_subprocess(variant) for variant in variants}
+
+    print()
+    for variant, label in variants.items():
+        result = results[variant]
+        print(
+            f"{label:>18} | {TRANSFER_SIZE // 1024 // 1024} MB | "
+            f"upload {result['upload_gbps']:5.2f} GB/s | "
+            f"download {result['download_gbps']:5.2f} GB/s"
+        )
+
+
+if __name__ == "__main__":
+    print(json.dumps(_run_variant(sys.argv[1])))
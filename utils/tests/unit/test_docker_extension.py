@@ -0,0 +1,266 @@
+"""
+Unit tests for the ProxiedDockerContainerExtension, with the container replaced by a local HTTP server
+and the Docker client by an in-memory stand-in.
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from localstack.http import Request, Router
+from localstack.utils.container_utils.container_client import DockerContainerStatus
+from localstack.utils.sync import poll_condition
+from localstack_extensions.utils import docker
+from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+from localstack_extensions.utils.startup import (
+    STARTUP_COORDINATOR,
+    ContainerStartupCoordinator,
+)
+from rolo.dispatcher import handler_dispatcher
+
+
+class BackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = json.dumps({"path": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture(scope="module")
+def backend_port():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BackendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+class _TestExtension(ProxiedDockerContainerExtension):
+    name = "test-ext"
+
+    def __init__(self, port: int, fail_start: bool = False, started=None):
+        super().__init__(
+            image_name="test/image", container_ports=[port], host="test.localhost"
+        )
+        self.container_host = "127.0.0.1"
+        self.fail_start = fail_start
+        self.started = started
+        self.start_calls = 0
+
+    def start_container(self) -> None:
+        self.start_calls += 1
+        if self.started:
+            self.started.wait()
+        if self.fail_start:
+            raise Exception("failed to start container")
+
+
+class _ImmediateReactor:
+    """Reactor stand-in, which runs functions scheduled from other threads right away."""
+
+    def callFromThread(self, fn, *args, **kwargs):
+        fn(*args, **kwargs)
+
+
+def _dispatch(router: Router, path: str):
+    request = Request("GET", path, headers={"Host": "test.localhost"})
+    return router.dispatch(request)
+
+
+class TestLazyStart:
+    def test_container_started_at_startup(self, backend_port):
+        extension = _TestExtension(backend_port)
+        extension.update_gateway_routes(Router(dispatcher=handler_dispatcher()))
+        assert extension.start_calls == 1
+
+    def test_container_started_on_first_request(self, backend_port, monkeypatch):
+        monkeypatch.setenv("TEST_EXT_LAZY_START", "1")
+        extension = _TestExtension(backend_port)
+        router = Router(dispatcher=handler_dispatcher())
+        extension.update_gateway_routes(router)
+        assert extension.start_calls == 0
+
+        threads = [
+            threading.Thread(target=_dispatch, args=(router, f"/item/{i}"))
+            for i in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert extension.start_calls == 1
+
+        response = _dispatch(router, "/item/1")
+        assert json.loads(b"".join(response.response)) == {"path": "/item/1"}
+        assert extension.start_calls == 1
+        extension._proxy_resource.close()
+
+    def test_container_start_failure(self, backend_port):
+        extension = _TestExtension(backend_port, fail_start=True)
+        extension.lazy_start = True
+        router = Router(dispatcher=handler_dispatcher())
+        extension.update_gateway_routes(router)
+
+        response = _dispatch(router, "/health")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "5"
+        # requests within the backoff are rejected without restarting the container
+        assert _dispatch(router, "/health").status_code == 503
+        assert extension.start_calls == 1
+
+        # the start is retried with the next request after the backoff
+        extension._start_failed_at -= docker.CONTAINER_START_RETRY_BACKOFF
+        assert _dispatch(router, "/health").status_code == 503
+        assert extension.start_calls == 2
+        extension._proxy_resource.close()
+
+
+class TestBackgroundStart:
+    def test_requests_rejected_until_container_ready(self, backend_port):
+        started = threading.Event()
+        extension = _TestExtension(backend_port, started=started)
+        extension.background_start = True
+        router = Router(dispatcher=handler_dispatcher())
+        # the route setup does not block until the container is started
+        extension.update_gateway_routes(router)
+        future = STARTUP_COORDINATOR.get_future(extension.name)
+        assert not future.done()
+
+        response = _dispatch(router, "/item/1")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+
+        started.set()
+        future.result(timeout=10)
+        response = _dispatch(router, "/item/1")
+        assert json.loads(b"".join(response.response)) == {"path": "/item/1"}
+        assert extension.start_calls == 1
+        extension._proxy_resource.close()
+
+    def test_connect_hook_chained_onto_startup_future(self, backend_port, monkeypatch):
+        coordinator = ContainerStartupCoordinator()
+        monkeypatch.setattr(docker, "STARTUP_COORDINATOR", coordinator)
+        monkeypatch.setattr(docker, "reactor", _ImmediateReactor())
+        started = threading.Event()
+        extension = _TestExtension(backend_port, started=started)
+        extension.background_start = True
+        connect_hook = extension._get_connect_hook()
+
+        results = []
+        for _ in range(3):
+            connect_hook().addCallback(results.append)
+        # all waiters share the container start submitted to the coordinator
+        future = coordinator.get_future(extension.name)
+        assert not future.done()
+        assert results == []
+
+        started.set()
+        future.result(timeout=10)
+        # the done callbacks of the future may still be running in the startup thread
+        poll_condition(lambda: len(results) == 3, timeout=10)
+        assert results == [None, None, None]
+        assert extension.start_calls == 1
+        coordinator.shutdown()
+
+
+class _DockerClient:
+    """In-memory stand-in for the Docker client, holding the labels of the running containers."""
+
+    def __init__(self):
+        self.containers = {}
+        self.statuses = {}
+        self.run_calls = []
+        self.removed = []
+        self.inspect_error = None
+
+    def run_container(self, image_name: str, name: str, labels=None, **kwargs):
+        self.run_calls.append(name)
+        self.containers[name] = labels or {}
+
+    def get_container_status(self, container_name: str) -> DockerContainerStatus:
+        if container_name in self.containers:
+            return self.statuses.get(container_name, DockerContainerStatus.UP)
+        return DockerContainerStatus.NON_EXISTENT
+
+    def inspect_container(self, container_name: str) -> dict:
+        if self.inspect_error:
+            raise self.inspect_error
+        return {"Config": {"Labels": self.containers[container_name]}}
+
+    def remove_container(self, container_name: str, **kwargs):
+        self.removed.append(container_name)
+        self.containers.pop(container_name, None)
+
+
+@pytest.fixture
+def docker_client(monkeypatch):
+    docker_client = _DockerClient()
+    monkeypatch.setattr(docker, "DOCKER_CLIENT", docker_client)
+    return docker_client
+
+
+class _WarmTestExtension(ProxiedDockerContainerExtension):
+    name = "warm-ext"
+    keep_warm = True
+
+    def __init__(self, env_vars: dict | None = None):
+        super().__init__(
+            image_name="test/image",
+            container_ports=[8080],
+            env_vars=env_vars,
+            health_check_fn=lambda: None,
+        )
+
+
+class TestKeepWarm:
+    def test_warm_container_reused(self, docker_client):
+        extension = _WarmTestExtension()
+        extension.start_container()
+        assert docker_client.run_calls == ["ls-ext-warm-ext"]
+
+        # the container is kept running on shutdown, and reused on the next startup
+        extension.on_platform_shutdown()
+        _WarmTestExtension().start_container()
+        assert docker_client.run_calls == ["ls-ext-warm-ext"]
+        assert docker_client.removed == []
+
+    def test_container_with_changed_configuration_replaced(self, docker_client):
+        _WarmTestExtension().start_container()
+        _WarmTestExtension(env_vars={"FOO": "bar"}).start_container()
+
+        assert docker_client.run_calls == ["ls-ext-warm-ext", "ls-ext-warm-ext"]
+        assert docker_client.removed == ["ls-ext-warm-ext"]
+
+    def test_container_removed_without_keep_warm(self, docker_client):
+        extension = _WarmTestExtension()
+        extension.keep_warm = False
+        extension.start_container()
+        assert docker_client.containers == {"ls-ext-warm-ext": {}}
+
+        extension.on_platform_shutdown()
+        assert docker_client.removed == ["ls-ext-warm-ext"]
+
+    def test_stopped_container_replaced(self, docker_client):
+        _WarmTestExtension().start_container()
+        docker_client.statuses["ls-ext-warm-ext"] = DockerContainerStatus.DOWN
+
+        _WarmTestExtension().start_container()
+        assert docker_client.run_calls == ["ls-ext-warm-ext", "ls-ext-warm-ext"]
+        assert docker_client.removed == ["ls-ext-warm-ext"]
+
+    def test_container_not_removed_if_inspection_fails(self, docker_client):
+        extension = _WarmTestExtension()
+        extension.start_container()
+        docker_client.inspect_error = Exception("Docker daemon unavailable")
+
+        config_hash = extension._get_container_config_hash()
+        assert not extension._reuse_warm_container(config_hash)
+        assert docker_client.removed == []
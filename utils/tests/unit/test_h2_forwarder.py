@@ -0,0 +1,297 @@
+"""
+Unit tests for the reactor-driven AsyncTcpForwarder and the HTTP2 ForwardingBuffer.
+
+These tests use Twisted's in-memory reactor and transports, hence no network access is required.
+"""
+
+import pytest
+from hpack import Encoder
+from hyperframe.frame import HeadersFrame
+from localstack_extensions.utils import h2_proxy
+from localstack_extensions.utils.h2_proxy import (
+    HTTP2_PROXY_STATS,
+    AsyncTcpForwarder,
+    ForwardingBuffer,
+    ForwardingState,
+)
+from twisted.internet.defer import Deferred
+from twisted.internet.error import ConnectionDone, ConnectionRefusedError
+from twisted.internet.testing import MemoryReactorClock, StringTransport
+from twisted.python.failure import Failure
+from werkzeug.datastructures import Headers
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+SETTINGS_FRAME = b"\x00\x00\x00\x04\x00\x00\x00\x00\x00"
+
+
+@pytest.fixture
+def memory_reactor(monkeypatch):
+    """Replace the global reactor used by the h2_proxy module with an in-memory reactor."""
+    memory_reactor = MemoryReactorClock()
+    monkeypatch.setattr(h2_proxy, "reactor", memory_reactor)
+    return memory_reactor
+
+
+@pytest.fixture
+def proxy_stats():
+    HTTP2_PROXY_STATS.reset()
+    yield HTTP2_PROXY_STATS
+    HTTP2_PROXY_STATS.reset()
+
+
+def _headers_frame(path: str, stream_id: int = 1) -> bytes:
+    frame = HeadersFrame(stream_id)
+    frame.data = Encoder().encode(
+        [(":method", "POST"), (":path", path), ("content-type", "application/grpc")]
+    )
+    frame.flags.add("END_HEADERS")
+    return frame.serialize()
+
+
+def _connect_backend(memory_reactor) -> tuple:
+    """Simulate the establishment of the last requested backend connection."""
+    host, port, factory, _, _ = memory_reactor.tcpClients[-1]
+    protocol = factory.buildProtocol(None)
+    transport = StringTransport()
+    protocol.makeConnection(transport)
+    return protocol, transport
+
+
+class TestAsyncTcpForwarder:
+    def test_connects_via_reactor(self, memory_reactor):
+        forwarder = AsyncTcpForwarder(1729, host="backend")
+
+        assert len(memory_reactor.tcpClients) == 1
+        host, port, *_ = memory_reactor.tcpClients[0]
+        assert (host, port) == ("backend", 1729)
+        assert not forwarder.connected
+
+    def test_data_sent_before_connect_is_flushed(self, memory_reactor):
+        forwarder = AsyncTcpForwarder(1729)
+        forwarder.send(b"foo")
+        forwarder.send(b"bar")
+
+        _, transport = _connect_backend(memory_reactor)
+
+        assert forwarder.connected
+        assert transport.value() == b"foobar"
+
+        forwarder.send(b"baz")
+        assert transport.value() == b"foobarbaz"
+
+    def test_data_from_backend_is_passed_to_callback(self, memory_reactor):
+        received = []
+        AsyncTcpForwarder(1729, on_data=received.append)
+
+        protocol, _ = _connect_backend(memory_reactor)
+        protocol.dataReceived(b"\x00\x00\x00\x04\x00\x00\x00\x00\x00")
+
+        assert received == [b"\x00\x00\x00\x04\x00\x00\x00\x00\x00"]
+
+    def test_couple_pauses_peer_until_connected(self, memory_reactor):
+        forwarder = AsyncTcpForwarder(1729)
+        peer_transport = StringTransport()
+        peer_transport.registerProducer(object(), True)
+
+        forwarder.couple(peer_transport)
+        assert peer_transport.producerState == "paused"
+
+        _, backend_transport = _connect_backend(memory_reactor)
+
+        # producers are registered in both directions, replacing the previous peer producer
+        assert peer_transport.producerState == "producing"
+        assert peer_transport.producer is backend_transport
+        assert backend_transport.producer is peer_transport
+
+    def test_backend_close_invokes_callback(self, memory_reactor):
+        closed = []
+        forwarder = AsyncTcpForwarder(1729, on_close=closed.append)
+
+        protocol, _ = _connect_backend(memory_reactor)
+        protocol.connectionLost(Failure(ConnectionDone()))
+
+        assert len(closed) == 1
+        assert not forwarder.connected
+        # sending after the connection is lost is a no-op
+        forwarder.send(b"data")
+
+    def test_connection_failure_invokes_callback(self, memory_reactor):
+        closed = []
+        AsyncTcpForwarder(59999, on_close=closed.append)
+
+        _, _, factory, _, _ = memory_reactor.tcpClients[0]
+        factory.clientConnectionFailed(
+            memory_reactor.connectors[0], Failure(ConnectionRefusedError())
+        )
+
+        assert len(closed) == 1
+
+    def test_close_before_connect(self, memory_reactor):
+        closed = []
+        forwarder = AsyncTcpForwarder(1729, on_close=closed.append)
+        forwarder.send(b"data")
+        forwarder.close()
+
+        assert memory_reactor.connectors[0]._disconnected
+        # a connection established after close is dropped immediately
+        _, transport = _connect_backend(memory_reactor)
+        assert transport.disconnecting
+        assert transport.value() == b""
+        # closing explicitly does not trigger the close callback
+        assert closed == []
+        # closing twice is fine
+        forwarder.close()
+
+
+def _path_matcher(prefix: str):
+    return lambda headers: headers.get(":path", "").startswith(prefix)
+
+
+class TestForwardingBuffer:
+    BACKENDS = [("typedb", _path_matcher("/typedb."), "backend", 1729)]
+
+    def _create_buffer(
+        self,
+        client_transport,
+        passthrough_calls: list | None = None,
+        backends: list | None = None,
+    ):
+        passthrough_calls = [] if passthrough_calls is None else passthrough_calls
+        return ForwardingBuffer(
+            client_transport,
+            backends=self.BACKENDS if backends is None else backends,
+            on_passthrough=lambda: passthrough_calls.append(True),
+        )
+
+    def test_passthrough_does_not_dial_backend(self, memory_reactor, proxy_stats):
+        passthrough_calls = []
+        handled = []
+        buffer = self._create_buffer(StringTransport(), passthrough_calls)
+
+        buffer.received_from_http2_client(
+            HTTP2_PREFACE + SETTINGS_FRAME, handled.append
+        )
+        assert buffer.state == ForwardingState.UNDECIDED
+        assert handled == []
+
+        buffer.received_from_http2_client(_headers_frame("/sqs"), handled.append)
+        assert buffer.state == ForwardingState.PASSTHROUGH
+        assert passthrough_calls == [True]
+        assert b"".join(handled).startswith(HTTP2_PREFACE)
+
+        buffer.received_from_http2_client(b"more", handled.append)
+        assert handled[-1] == b"more"
+
+        buffer.close()
+        assert memory_reactor.tcpClients == []
+        assert proxy_stats.backend_dials == 0
+        assert proxy_stats.backend_dials_avoided == 1
+        assert proxy_stats.connections_passed_through == 1
+
+    def test_forwarding_dials_backend(self, memory_reactor, proxy_stats):
+        client_transport = StringTransport()
+        handled = []
+        buffer = self._create_buffer(client_transport)
+
+        buffer.received_from_http2_client(
+            HTTP2_PREFACE + SETTINGS_FRAME, handled.append
+        )
+        assert memory_reactor.tcpClients == []
+
+        buffer.received_from_http2_client(_headers_frame("/typedb.x/y"), handled.append)
+        assert buffer.state == ForwardingState.FORWARDING
+        assert handled == []
+        assert len(memory_reactor.tcpClients) == 1
+
+        protocol, backend_transport = _connect_backend(memory_reactor)
+        assert backend_transport.value().startswith(HTTP2_PREFACE)
+
+        protocol.dataReceived(SETTINGS_FRAME)
+        assert client_transport.value() == SETTINGS_FRAME
+
+        assert proxy_stats.backend_dials == 1
+        assert proxy_stats.backend_dials_avoided == 0
+        assert proxy_stats.connections_forwarded == 1
+        assert proxy_stats.backend_connections_active == {"typedb": 1}
+
+        buffer.close()
+        assert proxy_stats.backend_connections == {"typedb": 1}
+        assert proxy_stats.backend_connections_active == {"typedb": 0}
+
+    def test_dispatch_to_first_matching_backend(self, memory_reactor, proxy_stats):
+        def _failing_matcher(headers):
+            raise Exception("matcher error")
+
+        backends = [
+            ("failing", _failing_matcher, "host0", 1000),
+            ("ext1", _path_matcher("/ext1."), "host1", 1001),
+            ("ext2", _path_matcher("/ext2."), "host2", 1002),
+            ("catch-all", _path_matcher("/ext"), "host3", 1003),
+        ]
+        for path in ["/ext2.a", "/ext1.a", "/ext2.b", "/ext3.a"]:
+            buffer = self._create_buffer(StringTransport(), backends=backends)
+            buffer.received_from_http2_client(
+                HTTP2_PREFACE + SETTINGS_FRAME + _headers_frame(path), lambda d: None
+            )
+            assert buffer.state == ForwardingState.FORWARDING
+
+        targets = [(host, port) for host, port, *_ in memory_reactor.tcpClients]
+        assert targets == [
+            ("host2", 1002),
+            ("host1", 1001),
+            ("host2", 1002),
+            ("host3", 1003),
+        ]
+        assert proxy_stats.backend_connections == {
+            "ext1": 1,
+            "ext2": 2,
+            "catch-all": 1,
+        }
+
+    def test_close_while_undecided_avoids_dial(self, memory_reactor, proxy_stats):
+        buffer = self._create_buffer(StringTransport())
+        buffer.received_from_http2_client(HTTP2_PREFACE, lambda d: None)
+        buffer.close()
+
+        assert memory_reactor.tcpClients == []
+        assert proxy_stats.backend_dials_avoided == 1
+
+    def test_forwarding_held_until_backend_ready(
+        self, memory_reactor, proxy_stats, monkeypatch
+    ):
+        ready = Deferred()
+        monkeypatch.setattr(h2_proxy, "_http2_connect_hooks", {"typedb": lambda: ready})
+        client_transport = StringTransport()
+        buffer = self._create_buffer(client_transport)
+
+        buffer.received_from_http2_client(
+            HTTP2_PREFACE + SETTINGS_FRAME + _headers_frame("/typedb.x/y"),
+            lambda d: None,
+        )
+        buffer.received_from_http2_client(b"more", lambda d: None)
+        assert buffer.state == ForwardingState.FORWARDING
+        assert client_transport.producerState == "paused"
+        assert memory_reactor.tcpClients == []
+
+        ready.callback(None)
+        _, backend_transport = _connect_backend(memory_reactor)
+        assert backend_transport.value().startswith(HTTP2_PREFACE)
+        assert backend_transport.value().endswith(b"more")
+        assert client_transport.producerState == "producing"
+
+
+class TestHttp2BackendRegistry:
+    def test_register_and_unregister(self, monkeypatch):
+        monkeypatch.setattr(h2_proxy, "_http2_backends", [])
+
+        h2_proxy.register_http2_backend("ext1", _path_matcher("/a"), "host1", 1001)
+        h2_proxy.register_http2_backend("ext2", _path_matcher("/b"), "host2", 1002)
+        assert [backend[0] for backend in h2_proxy._http2_backends] == ["ext1", "ext2"]
+
+        # lookups without explicit backends use the global registry
+        headers = Headers({":path": "/b"})
+        assert h2_proxy.find_http2_backend(headers) == ("ext2", "host2", 1002)
+
+        h2_proxy.unregister_http2_backend("ext2")
+        assert [backend[0] for backend in h2_proxy._http2_backends] == ["ext1"]
+        assert h2_proxy.find_http2_backend(headers) is None
@@ -8,6 +8,7 @@ No Docker or network access required.
 
 from hyperframe.frame import HeadersFrame, SettingsFrame, WindowUpdateFrame
 from localstack_extensions.utils.h2_proxy import (
+    Http2HeadersParser,
     get_frames_from_http2_stream,
     get_headers_from_data_stream,
     get_headers_from_frames,
@@ -116,6 +117,39 @@ class TestExtractHeaders:
             assert headers.get("ORIGIN") == origin
 
 
+class TestIncrementalHeadersParser:
+    """Tests for the incremental Http2HeadersParser."""
+
+    SAMPLE_HTTP2_DATA = TestParseHttp2PrefaceAndFrames.SAMPLE_HTTP2_DATA
+
+    def test_parse_in_one_chunk(self):
+        """Test parsing the complete stream in a single chunk."""
+        headers = Http2HeadersParser().feed(self.SAMPLE_HTTP2_DATA)
+
+        assert headers.get(":method") == "OPTIONS"
+        assert headers.get(":path") == "/_localstack/health"
+
+    def test_parse_byte_by_byte(self):
+        """Test that headers are only returned once the HEADERS frame is complete."""
+        parser = Http2HeadersParser()
+        data = self.SAMPLE_HTTP2_DATA
+        results = [parser.feed(data[i : i + 1]) for i in range(len(data))]
+
+        # headers become available at some point, and stay available
+        first_match = next(i for i, headers in enumerate(results) if headers)
+        assert all(results[first_match:])
+        assert not any(results[:first_match])
+        assert results[-1] == get_headers_from_frames(
+            get_frames_from_http2_stream(data)
+        )
+
+    def test_invalid_preface(self):
+        """Test that parsing stops for streams that are not HTTP/2."""
+        parser = Http2HeadersParser()
+        assert not parser.feed(b"GET / HTTP/1.1\r\n")
+        assert not parser.feed(self.SAMPLE_HTTP2_DATA)
+
+
 class TestEmptyAndInvalidData:
     """Tests for edge cases with empty or invalid data."""
 
@@ -0,0 +1,112 @@
+"""
+Microbenchmark for HTTP/2 header detection on the client side of a proxied connection.
+
+Compares the previous approach (re-joining and re-parsing the entire buffered stream on every
+received chunk) with the incremental Http2HeadersParser, for both fragmented streams (clients
+dribbling their preface and SETTINGS in small chunks) and streams with large header blocks.
+No Docker or network access required.
+"""
+
+import time
+
+from hpack import Encoder
+from hyperframe.frame import ContinuationFrame, HeadersFrame, SettingsFrame
+from localstack_extensions.utils.h2_proxy import (
+    Http2HeadersParser,
+    get_frames_from_http2_stream,
+    get_headers_from_frames,
+)
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+ROUNDS = 5
+
+
+def _settings_frame(num_settings: int) -> bytes:
+    frame = SettingsFrame(0)
+    for i in range(num_settings):
+        frame.settings[i % 6 + 1] = 1024 + i
+    return frame.serialize()
+
+
+def _headers_frames(header_count: int, value_size: int, max_frame_size=16384) -> bytes:
+    """Serialize a header block, split into HEADERS and CONTINUATION frames where needed."""
+    headers = [
+        (":method", "POST"),
+        (":path", "/typedb.protocol.TypeDB/connection_open"),
+        ("content-type", "application/grpc"),
+    ]
+    headers += [(f"x-header-{i}", "v" * value_size) for i in range(header_count)]
+    block = Encoder().encode(headers)
+    chunks = [
+        block[i : i + max_frame_size] for i in range(0, len(block), max_frame_size)
+    ]
+    frames = []
+    for i, chunk in enumerate(chunks):
+        frame = HeadersFrame(1) if i == 0 else ContinuationFrame(1)
+        frame.data = chunk
+        if i == len(chunks) - 1:
+            frame.flags.add("END_HEADERS")
+        frames.append(frame.serialize())
+    return b"".join(frames)
+
+
+def _fragment(data: bytes, chunk_size: int) -> list[bytes]:
+    return [data[i : i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+
+def _detect_rejoining(chunks: list[bytes]):
+    """The previous approach: re-join and re-parse the entire buffer for every chunk."""
+    buffer = []
+    for chunk in chunks:
+        buffer.append(chunk)
+        stream = b"".join(buffer)
+        if headers := get_headers_from_frames(get_frames_from_http2_stream(stream)):
+            return headers
+
+
+def _detect_incremental(chunks: list[bytes]):
+    parser = Http2HeadersParser()
+    for chunk in chunks:
+        if headers := parser.feed(chunk):
+            return headers
+
+
+def _best_time(fn, chunks: list[bytes]) -> tuple[float, object]:
+    best = None
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = fn(chunks)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, result
+
+
+def _run_benchmark(name: str, chunks: list[bytes]) -> tuple[float, float]:
+    rejoining_time, rejoining_headers = _best_time(_detect_rejoining, chunks)
+    incremental_time, incremental_headers = _best_time(_detect_incremental, chunks)
+
+    assert incremental_headers == rejoining_headers
+    assert incremental_headers.get(":path") == "/typedb.protocol.TypeDB/connection_open"
+
+    print(
+        f"\n{name}: {len(chunks)} chunks, {sum(map(len, chunks))} bytes | "
+        f"re-joining {rejoining_time * 1000:.2f}ms | "
+        f"incremental {incremental_time * 1000:.2f}ms | "
+        f"speedup {rejoining_time / incremental_time:.1f}x"
+    )
+    return rejoining_time, incremental_time
+
+
+def test_benchmark_fragmented_stream():
+    """Client dribbling preface, SETTINGS and HEADERS in small chunks."""
+    data = HTTP2_PREFACE + _settings_frame(6) + _headers_frames(20, 200)
+    rejoining_time, incremental_time = _run_benchmark("fragmented", _fragment(data, 8))
+    # quadratic vs. linear - the incremental parser must be significantly faster here
+    assert incremental_time < rejoining_time
+
+
+def test_benchmark_large_headers_stream():
+    """Large header block, spread over HEADERS and CONTINUATION frames, in TCP-sized chunks."""
+    data = HTTP2_PREFACE + _settings_frame(6) + _headers_frames(50, 1000)
+    _run_benchmark("large headers", _fragment(data, 1460))
@@ -0,0 +1,330 @@
+"""
+Unit tests for stream-level multiplexing of proxied HTTP2 connections.
+
+An HTTP2 client and backend are simulated with h2 state machines, connected to the (patched)
+Twisted H2Connection of the gateway via in-memory transports. No network access required.
+"""
+
+import h2.config
+import h2.connection
+import h2.events
+import h2.settings
+import pytest
+from localstack_extensions.utils import h2_multiplexer, h2_proxy
+from localstack_extensions.utils.h2_proxy import HTTP2_PROXY_STATS
+from twisted.internet.testing import MemoryReactorClock, StringTransport
+from twisted.web._http2 import H2Connection
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+
+class HealthResource(Resource):
+    isLeaf = True
+
+    def render_GET(self, request):
+        return b"gateway"
+
+
+def _request_headers(path: str, method: str = "POST") -> list:
+    return [
+        (":method", method),
+        (":scheme", "http"),
+        (":authority", "localhost:4566"),
+        (":path", path),
+        ("content-type", "application/grpc"),
+    ]
+
+
+class Http2Peer:
+    """An h2 state machine connected to an in-memory transport."""
+
+    def __init__(self, client_side: bool, transport: StringTransport):
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(
+                client_side=client_side, header_encoding="utf-8"
+            )
+        )
+        self.conn.initiate_connection()
+        self.transport = transport
+        self.events = []
+
+    def receive(self) -> list:
+        """Process the data written to the transport since the last call."""
+        data = self.transport.value()
+        self.transport.clear()
+        events = self.conn.receive_data(data)
+        self.events.extend(events)
+        return events
+
+    def events_for_stream(self, stream_id: int, event_type: type) -> list:
+        return [
+            event
+            for event in self.events
+            if isinstance(event, event_type) and event.stream_id == stream_id
+        ]
+
+
+@pytest.fixture
+def memory_reactor(monkeypatch):
+    memory_reactor = MemoryReactorClock()
+    monkeypatch.setattr(h2_multiplexer, "reactor", memory_reactor)
+    monkeypatch.setattr(h2_multiplexer, "_upstream_connections", {})
+    return memory_reactor
+
+
+@pytest.fixture
+def multiplexing(monkeypatch, memory_reactor):
+    """Enable stream multiplexing with a single registered backend."""
+    monkeypatch.setattr(h2_proxy, "HTTP2_STREAM_MULTIPLEXING", True)
+    monkeypatch.setattr(
+        h2_proxy,
+        "_http2_backends",
+        [("typedb", lambda h: h.get(":path").startswith("/typedb."), "backend", 1729)],
+    )
+    h2_proxy.patch_h2_connection_for_proxying()
+    HTTP2_PROXY_STATS.reset()
+    yield
+    HTTP2_PROXY_STATS.reset()
+
+
+@pytest.fixture
+def gateway_connection(memory_reactor):
+    connection = H2Connection(reactor=memory_reactor)
+    connection.site = Site(HealthResource())
+    connection.requestFactory = connection.site.requestFactory
+    transport = StringTransport()
+    connection.makeConnection(transport)
+    return connection, transport
+
+
+def _send(client: Http2Peer, connection: H2Connection):
+    connection.dataReceived(client.conn.data_to_send())
+
+
+def _connect_backend(memory_reactor) -> Http2Peer:
+    _, _, factory, _, _ = memory_reactor.tcpClients[-1]
+    protocol = factory.buildProtocol(None)
+    backend = Http2Peer(client_side=False, transport=StringTransport())
+    protocol.makeConnection(backend.transport)
+    backend.protocol = protocol
+    return backend
+
+
+def _respond(backend: Http2Peer, stream_id: int, body: bytes):
+    backend.conn.send_headers(
+        stream_id, [(":status", "200"), ("content-type", "application/grpc")]
+    )
+    backend.conn.send_data(stream_id, body)
+    backend.conn.send_headers(stream_id, [("grpc-status", "0")], end_stream=True)
+    backend.protocol.dataReceived(backend.conn.data_to_send())
+
+
+class TestHttp2StreamMultiplexing:
+    def test_streams_routed_individually(
+        self, multiplexing, memory_reactor, gateway_connection
+    ):
+        connection, client_transport = gateway_connection
+        client = Http2Peer(client_side=True, transport=client_transport)
+
+        # stream 1 targets the backend, stream 3 is served by the gateway itself
+        client.conn.send_headers(1, _request_headers("/typedb.TypeDB/open"))
+        client.conn.send_data(1, b"request-1", end_stream=True)
+        client.conn.send_headers(
+            3, _request_headers("/_localstack/health", method="GET"), end_stream=True
+        )
+        _send(client, connection)
+        memory_reactor.advance(0)
+
+        # a single upstream connection is opened, carrying only the matching stream
+        assert len(memory_reactor.tcpClients) == 1
+        backend = _connect_backend(memory_reactor)
+        backend.receive()
+        requests = [
+            e for e in backend.events if isinstance(e, h2.events.RequestReceived)
+        ]
+        assert len(requests) == 1
+        assert dict(requests[0].headers)[":path"] == "/typedb.TypeDB/open"
+        upstream_stream_id = requests[0].stream_id
+        data = backend.events_for_stream(upstream_stream_id, h2.events.DataReceived)
+        assert b"".join(e.data for e in data) == b"request-1"
+
+        _respond(backend, upstream_stream_id, b"response-1")
+        for _ in range(5):
+            memory_reactor.advance(0)
+        client.receive()
+
+        # the proxied response, including trailers, is returned on the client's stream ID
+        response = client.events_for_stream(1, h2.events.ResponseReceived)[0]
+        assert dict(response.headers)[":status"] == "200"
+        data = client.events_for_stream(1, h2.events.DataReceived)
+        assert b"".join(e.data for e in data) == b"response-1"
+        trailers = client.events_for_stream(1, h2.events.TrailersReceived)[0]
+        assert dict(trailers.headers)["grpc-status"] == "0"
+        assert client.events_for_stream(1, h2.events.StreamEnded)
+
+        # the other stream is served by the gateway
+        data = client.events_for_stream(3, h2.events.DataReceived)
+        assert b"".join(e.data for e in data) == b"gateway"
+
+        assert HTTP2_PROXY_STATS.backend_streams == {"typedb": 1}
+        assert 1 not in connection.streams
+
+    def test_upstream_connection_shared_across_clients(
+        self, multiplexing, memory_reactor
+    ):
+        clients = []
+        for _ in range(2):
+            connection = H2Connection(reactor=memory_reactor)
+            transport = StringTransport()
+            connection.makeConnection(transport)
+            client = Http2Peer(client_side=True, transport=transport)
+            client.conn.send_headers(
+                1, _request_headers("/typedb.TypeDB/open"), end_stream=True
+            )
+            _send(client, connection)
+            clients.append(client)
+
+        assert len(memory_reactor.tcpClients) == 1
+        backend = _connect_backend(memory_reactor)
+        backend.receive()
+        requests = [
+            e for e in backend.events if isinstance(e, h2.events.RequestReceived)
+        ]
+        # both client streams (each with client stream ID 1) use distinct upstream stream IDs
+        assert [e.stream_id for e in requests] == [1, 3]
+
+        _respond(backend, 3, b"second")
+        _respond(backend, 1, b"first")
+        for client, expected in zip(clients, [b"first", b"second"], strict=True):
+            client.receive()
+            data = client.events_for_stream(1, h2.events.DataReceived)
+            assert b"".join(e.data for e in data) == expected
+
+    def test_response_flow_control(
+        self, multiplexing, memory_reactor, gateway_connection
+    ):
+        connection, client_transport = gateway_connection
+        client = Http2Peer(client_side=True, transport=client_transport)
+        # the client only accepts small amounts of data per stream at a time
+        client.conn.update_settings(
+            {h2.settings.SettingCodes.INITIAL_WINDOW_SIZE: 8192}
+        )
+        client.conn.send_headers(
+            1, _request_headers("/typedb.TypeDB/open"), end_stream=True
+        )
+        _send(client, connection)
+        client.receive()
+        _send(client, connection)
+
+        backend = _connect_backend(memory_reactor)
+        backend.receive()
+        body = b"x" * 50_000
+        backend.conn.send_headers(1, [(":status", "200")])
+        for i in range(0, len(body), 16384):
+            backend.conn.send_data(1, body[i : i + 16384])
+        backend.conn.end_stream(1)
+        backend.protocol.dataReceived(backend.conn.data_to_send())
+
+        received = 0
+        for _ in range(20):
+            events = client.receive()
+            chunks = [e for e in events if isinstance(e, h2.events.DataReceived)]
+            received_now = sum(e.flow_controlled_length for e in chunks)
+            # the gateway never exceeds the client's stream window
+            assert received_now <= 8192
+            received += received_now
+            for chunk in chunks:
+                client.conn.acknowledge_received_data(
+                    chunk.flow_controlled_length, chunk.stream_id
+                )
+            _send(client, connection)
+            backend.receive()
+            backend.protocol.dataReceived(backend.conn.data_to_send())
+            if client.events_for_stream(1, h2.events.StreamEnded):
+                break
+
+        assert received == len(body)
+        # the data was acknowledged towards the backend, once passed on to the client
+        assert backend.conn.inbound_flow_control_window > 65535 - 8192
+
+    def test_client_reset_cancels_upstream_stream(
+        self, multiplexing, memory_reactor, gateway_connection
+    ):
+        connection, client_transport = gateway_connection
+        client = Http2Peer(client_side=True, transport=client_transport)
+        client.conn.send_headers(1, _request_headers("/typedb.TypeDB/stream"))
+        _send(client, connection)
+
+        backend = _connect_backend(memory_reactor)
+        backend.receive()
+
+        client.conn.reset_stream(1)
+        _send(client, connection)
+        backend.receive()
+
+        resets = backend.events_for_stream(1, h2.events.StreamReset)
+        assert len(resets) == 1
+
+    def test_upstream_connection_lost_resets_client_streams(
+        self, multiplexing, memory_reactor, gateway_connection
+    ):
+        connection, client_transport = gateway_connection
+        client = Http2Peer(client_side=True, transport=client_transport)
+        client.conn.send_headers(1, _request_headers("/typedb.TypeDB/open"))
+        _send(client, connection)
+
+        backend = _connect_backend(memory_reactor)
+        backend.protocol.connectionLost(None)
+        client.receive()
+
+        assert client.events_for_stream(1, h2.events.StreamReset)
+        assert h2_multiplexer._upstream_connections == {}
+
+    def test_unregister_backend_closes_upstream_connection(
+        self, multiplexing, memory_reactor, gateway_connection, monkeypatch
+    ):
+        monkeypatch.setattr(h2_proxy.reactor, "callFromThread", lambda fn, *a: fn(*a))
+        connection, client_transport = gateway_connection
+        client = Http2Peer(client_side=True, transport=client_transport)
+        client.conn.send_headers(1, _request_headers("/typedb.TypeDB/open"))
+        _send(client, connection)
+        backend = _connect_backend(memory_reactor)
+        backend.receive()
+
+        h2_proxy.unregister_http2_backend("typedb")
+        backend.receive()
+        client.receive()
+
+        # the backend is notified via GOAWAY, and the pending client stream is reset
+        assert any(
+            isinstance(e, h2.events.ConnectionTerminated) for e in backend.events
+        )
+        assert backend.transport.disconnecting
+        assert client.events_for_stream(1, h2.events.StreamReset)
+        assert h2_multiplexer._upstream_connections == {}
+
+    def test_close_pending_upstream_connection(self, multiplexing, memory_reactor):
+        upstream = h2_multiplexer.get_upstream_connection("backend", 1729)
+        connector = memory_reactor.connectors[-1]
+
+        h2_multiplexer.close_upstream_connections()
+
+        assert upstream.closed
+        assert connector._disconnected
+        assert h2_multiplexer._upstream_connections == {}
+
+    def test_fallback_without_h2_connection_internals(
+        self, multiplexing, memory_reactor, monkeypatch
+    ):
+        monkeypatch.setattr(h2_multiplexer, "_stream_multiplexing_supported", None)
+        monkeypatch.setattr(
+            h2_multiplexer,
+            "H2_CONNECTION_INTERNALS",
+            (*h2_multiplexer.H2_CONNECTION_INTERNALS, "_removedInternal"),
+        )
+        connection = H2Connection(reactor=memory_reactor)
+        connection.makeConnection(StringTransport())
+
+        # the connection is forwarded as a whole, instead of proxying individual streams
+        assert not connection._ls_stream_multiplexing
+        assert connection._ls_forwarding_buffer is not None
@@ -0,0 +1,89 @@
+"""
+Unit tests for the image pre-pull command, with an in-memory stand-in for the Docker client.
+"""
+
+import io
+import threading
+import time
+
+import pytest
+from localstack_extensions.utils import prepull
+from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+from localstack_extensions.utils.prepull import get_extension_images, pull_images
+
+PULL_TIME = 0.2
+
+
+class _DockerClient:
+    def __init__(self, present: list[str] | None = None):
+        self.present = set(present or [])
+        self.pulled = []
+        self.active_pulls = 0
+        self.max_active_pulls = 0
+        self.mutex = threading.Lock()
+
+    def inspect_image(self, image_name: str, pull: bool = True) -> dict:
+        if image_name not in self.present:
+            raise Exception(f"image {image_name} not found")
+        return {}
+
+    def pull_image(self, docker_image: str, log_handler=None):
+        if "invalid" in docker_image:
+            raise Exception("pull access denied")
+        with self.mutex:
+            self.active_pulls += 1
+            self.max_active_pulls = max(self.max_active_pulls, self.active_pulls)
+        time.sleep(PULL_TIME)
+        with self.mutex:
+            self.active_pulls -= 1
+            self.pulled.append(docker_image)
+
+
+@pytest.fixture
+def docker_client(monkeypatch):
+    docker_client = _DockerClient(present=["wiremock/wiremock"])
+    monkeypatch.setattr(prepull, "DOCKER_CLIENT", docker_client)
+    return docker_client
+
+
+def _extension(name: str, image_name: str) -> ProxiedDockerContainerExtension:
+    extension_class = type(name, (ProxiedDockerContainerExtension,), {"name": name})
+    return extension_class(image_name=image_name, container_ports=[8080])
+
+
+class TestPrepull:
+    def test_images_of_extensions(self):
+        extensions = [
+            _extension("keycloak", "quay.io/keycloak/keycloak:26.0"),
+            _extension("paradedb", "paradedb/paradedb"),
+            _extension("paradedb-dev", "paradedb/paradedb"),
+        ]
+        assert get_extension_images(extensions) == {
+            "quay.io/keycloak/keycloak:26.0": ["keycloak"],
+            "paradedb/paradedb": ["paradedb", "paradedb-dev"],
+        }
+
+    def test_images_pulled_concurrently(self, docker_client):
+        out = io.StringIO()
+        images = ["quay.io/keycloak/keycloak", "paradedb/paradedb", "typedb/typedb"]
+
+        start = time.perf_counter()
+        results = pull_images(images + ["wiremock/wiremock"], out=out)
+
+        assert time.perf_counter() - start < 2 * PULL_TIME
+        assert results == dict.fromkeys(images + ["wiremock/wiremock"])
+        assert sorted(docker_client.pulled) == sorted(images)
+        assert docker_client.max_active_pulls == 3
+        assert "[4/4]" in out.getvalue()
+        assert "wiremock/wiremock: already present" in out.getvalue()
+
+    def test_force_and_failed_pulls(self, docker_client):
+        out = io.StringIO()
+        results = pull_images(
+            ["wiremock/wiremock", "invalid/image"], force=True, out=out
+        )
+
+        assert results["wiremock/wiremock"] is None
+        assert "pull access denied" in str(results["invalid/image"])
+        assert docker_client.pulled == ["wiremock/wiremock"]
+        assert "invalid/image: failed (pull access denied)" in out.getvalue()
@@ -0,0 +1,291 @@
+"""
+Unit tests for the streaming ProxyResource, against a local HTTP server as the proxy target.
+"""
+
+import gzip
+import io
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from localstack.http import Request
+from localstack_extensions.utils.docker import PortRoutingProxyResource, ProxyResource
+
+
+class BackendHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._send_json(
+            {
+                "path": self.path,
+                "length": len(body),
+                "body": body[:64].decode("latin-1"),
+                "content_length": self.headers.get("Content-Length"),
+                "host": self.headers.get("Host"),
+                "client_port": self.client_address[1],
+            }
+        )
+
+    def do_GET(self):
+        if self.path.startswith("/chunked"):
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.send_header("Set-Cookie", "a=1")
+            self.send_header("Set-Cookie", "b=2")
+            self.end_headers()
+            for chunk in (b"hello ", b"world"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        if self.path.startswith("/hop-by-hop"):
+            self.send_response(200)
+            self.send_header("Connection", "keep-alive, X-Backend-Hop")
+            self.send_header("Keep-Alive", "timeout=5")
+            self.send_header("Proxy-Authenticate", "Basic")
+            self.send_header("X-Backend-Hop", "1")
+            self.send_header("X-Backend-Header", "1")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self._send_json(
+            {
+                "path": self.path,
+                "client_port": self.client_address[1],
+                "headers": dict(self.headers.items()),
+            }
+        )
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "1234")
+        self.end_headers()
+
+    def _send_json(self, data: dict):
+        body = json.dumps(data).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _start_backend():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), BackendHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(scope="module")
+def backend_port():
+    server = _start_backend()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(scope="module")
+def other_backend_port():
+    server = _start_backend()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def proxy_resource(backend_port):
+    resource = ProxyResource("127.0.0.1", backend_port)
+    yield resource
+    resource.close()
+
+
+def _proxy(resource: ProxyResource, request: Request) -> tuple:
+    response = resource._proxy_request(request, forward_path=request.path)
+    body = b"".join(response.response)
+    response.close()
+    return response, body
+
+
+def _post(path: str, body: bytes, **kwargs) -> Request:
+    return Request(
+        "POST",
+        path,
+        body=io.BytesIO(body),
+        headers={"Content-Length": str(len(body)), **kwargs.pop("headers", {})},
+        **kwargs,
+    )
+
+
+class TestProxyResource:
+    def test_request_body_is_streamed(self, proxy_resource, backend_port):
+        request = _post("/upload", b"x" * 100_000)
+
+        response, body = _proxy(proxy_resource, request)
+
+        result = json.loads(body)
+        assert result["length"] == 100_000
+        assert result["content_length"] == "100000"
+        assert result["host"] == f"localhost:{backend_port}"
+        # the body was streamed, without being read into memory by the request
+        assert getattr(request, "_cached_data", None) is None
+
+    def test_decoded_request_body(self, proxy_resource):
+        request = _post(
+            "/upload",
+            gzip.compress(b"decoded body"),
+            headers={"Content-Encoding": "gzip"},
+        )
+        # simulates the content decoding of the LocalStack handler chain
+        request.stream = gzip.GzipFile(fileobj=request.stream)
+        request.headers["Content-Encoding"] = "identity"
+
+        _, body = _proxy(proxy_resource, request)
+
+        result = json.loads(body)
+        assert result["body"] == "decoded body"
+        assert result["content_length"] == str(len(b"decoded body"))
+
+    def test_request_body_with_identity_encoding_is_streamed(self, proxy_resource):
+        request = _post("/upload", b"plain", headers={"Content-Encoding": "identity"})
+
+        _, body = _proxy(proxy_resource, request)
+
+        assert json.loads(body)["body"] == "plain"
+        assert getattr(request, "_cached_data", None) is None
+
+    def test_consumed_request_body(self, proxy_resource):
+        request = _post("/upload", b"consumed")
+        assert request.data == b"consumed"
+
+        _, body = _proxy(proxy_resource, request)
+
+        assert json.loads(body)["body"] == "consumed"
+
+    def test_chunked_response_is_streamed(self, proxy_resource):
+        response, body = _proxy(proxy_resource, Request("GET", "/chunked"))
+
+        assert body == b"hello world"
+        assert "Transfer-Encoding" not in response.headers
+        assert response.headers.getlist("Set-Cookie") == ["a=1", "b=2"]
+
+    def test_hop_by_hop_headers_are_removed(self, proxy_resource):
+        request = Request(
+            "GET",
+            "/headers",
+            headers={
+                "Connection": "close, X-Client-Hop",
+                "Proxy-Authorization": "Basic abc",
+                "X-Client-Hop": "1",
+                "X-Client-Header": "1",
+            },
+        )
+        _, body = _proxy(proxy_resource, request)
+        forwarded = {key.lower() for key in json.loads(body)["headers"]}
+        assert "x-client-header" in forwarded
+        assert not {"proxy-authorization", "x-client-hop"} & forwarded
+        # the pooled connection to the container is kept alive
+        assert "close" not in json.loads(body)["headers"].get("Connection", "")
+
+        response, _ = _proxy(proxy_resource, Request("GET", "/hop-by-hop"))
+        assert response.headers["X-Backend-Header"] == "1"
+        for name in ["Connection", "Keep-Alive", "Proxy-Authenticate", "X-Backend-Hop"]:
+            assert name not in response.headers
+
+    def test_head_response(self, proxy_resource):
+        response, body = _proxy(proxy_resource, Request("HEAD", "/"))
+
+        assert body == b""
+        assert response.headers["Content-Length"] == "1234"
+
+    def test_connections_are_reused(self, proxy_resource):
+        client_ports = set()
+        for i in range(3):
+            _, body = _proxy(proxy_resource, Request("GET", f"/item/{i}"))
+            result = json.loads(body)
+            assert result["path"] == f"/item/{i}"
+            client_ports.add(result["client_port"])
+            _, body = _proxy(proxy_resource, _post("/upload", b"data"))
+            client_ports.add(json.loads(body)["client_port"])
+
+        assert len(client_ports) == 1
+
+    def test_query_parameters_are_forwarded(self, proxy_resource):
+        request = Request("GET", "/search", query_string="q=a+b&tag=1&tag=2")
+
+        _, body = _proxy(proxy_resource, request)
+
+        assert json.loads(body)["path"] == "/search?q=a+b&tag=1&tag=2"
+
+
+class TestPortRoutingProxyResource:
+    def _proxy(self, resource, path: str, host: str = "typedb.localhost") -> dict:
+        request = Request("GET", path, headers={"Host": host})
+        response = resource.index(request, path=path.lstrip("/"))
+        body = b"".join(response.response)
+        response.close()
+        return json.loads(body)
+
+    def test_requests_routed_by_port_router(self, backend_port, other_backend_port):
+        calls = []
+
+        def _port_router(request):
+            calls.append(request.path)
+            return other_backend_port if request.path.startswith("/v1") else None
+
+        resource = PortRoutingProxyResource("127.0.0.1", backend_port, _port_router)
+        try:
+            results = [
+                self._proxy(resource, path)
+                for path in ["/v1/databases", "/v1/users", "/health", "/health"]
+            ]
+            assert [result["path"] for result in results] == [
+                "/v1/databases",
+                "/v1/users",
+                "/health",
+                "/health",
+            ]
+            # requests are routed to the port of the router, or the default port
+            assert results[0]["client_port"] == results[1]["client_port"]
+            assert results[2]["client_port"] == results[3]["client_port"]
+            assert results[0]["client_port"] != results[2]["client_port"]
+            # routing decisions are cached by path prefix
+            assert calls == ["/v1/databases", "/health"]
+
+            # ... and host
+            self._proxy(resource, "/v1/databases", host="other.localhost")
+            assert calls[-1] == "/v1/databases"
+            assert len(calls) == 3
+        finally:
+            resource.close()
+
+    def test_route_cache_disabled(self, backend_port):
+        calls = []
+
+        def _port_router(request):
+            calls.append(request.path)
+            return backend_port
+
+        resource = PortRoutingProxyResource(
+            "127.0.0.1", backend_port, _port_router, cache_segments=None
+        )
+        try:
+            self._proxy(resource, "/v1/databases")
+            self._proxy(resource, "/v1/databases")
+            assert len(calls) == 2
+        finally:
+            resource.close()
+
+    def test_router_error_uses_default_port(self, backend_port):
+        def _port_router(request):
+            raise Exception("routing error")
+
+        resource = PortRoutingProxyResource("127.0.0.1", backend_port, _port_router)
+        try:
+            assert self._proxy(resource, "/v1/databases")["path"] == "/v1/databases"
+        finally:
+            resource.close()
@@ -0,0 +1,130 @@
+"""
+Unit tests for the ContainerReadinessProbe, with an in-memory stand-in for the Docker client.
+"""
+
+import queue
+import time
+
+import pytest
+from localstack.utils.container_utils.container_client import DockerContainerStatus
+from localstack_extensions.utils import readiness
+from localstack_extensions.utils.readiness import (
+    ContainerReadinessProbe,
+    get_container_readiness_stats,
+)
+
+
+class _LogStream:
+    def __init__(self):
+        self.chunks = queue.Queue()
+        self.closed = False
+
+    def __iter__(self):
+        while (chunk := self.chunks.get()) is not None:
+            yield chunk
+
+    def close(self):
+        self.closed = True
+        self.chunks.put(None)
+
+
+class _DockerClient:
+    def __init__(self):
+        self.status = DockerContainerStatus.UP
+        self.log_stream = _LogStream()
+
+    def get_container_status(self, container_name: str) -> DockerContainerStatus:
+        return self.status
+
+    def stream_container_logs(self, container_name: str) -> _LogStream:
+        return self.log_stream
+
+
+@pytest.fixture
+def docker_client(monkeypatch):
+    docker_client = _DockerClient()
+    monkeypatch.setattr(readiness, "DOCKER_CLIENT", docker_client)
+    return docker_client
+
+
+class _HealthCheck:
+    """Health check which fails `ready_after` times, and records the times of all checks."""
+
+    def __init__(self, ready_after: int | None = None):
+        self.ready_after = ready_after
+        self.times = []
+
+    def __call__(self):
+        self.times.append(time.perf_counter())
+        if self.ready_after is None or len(self.times) <= self.ready_after:
+            raise Exception("not ready")
+
+
+class TestContainerReadinessProbe:
+    def test_health_check_backoff(self, docker_client):
+        health_check = _HealthCheck(ready_after=4)
+        probe = ContainerReadinessProbe(
+            "test-ext",
+            "ls-ext-test-ext",
+            health_check,
+            timeout=10,
+            max_interval=0.2,
+            initial_interval=0.05,
+        )
+
+        time_to_ready = probe.wait()
+
+        intervals = [
+            b - a
+            for a, b in zip(health_check.times, health_check.times[1:], strict=False)
+        ]
+        assert len(intervals) == 4
+        # the intervals are doubled after each failed check, up to the maximum interval
+        for interval, expected in zip(intervals, [0.05, 0.1, 0.2, 0.2], strict=True):
+            assert expected <= interval < expected + 0.1
+        assert 0.55 <= time_to_ready < 1
+        stats = get_container_readiness_stats()["test-ext"]
+        assert stats["health_checks"] == 5
+        assert stats["signal"] == "poll"
+
+    def test_timeout(self, docker_client):
+        health_check = _HealthCheck()
+        probe = ContainerReadinessProbe(
+            "test-ext", "ls-ext-test-ext", health_check, timeout=0.3, max_interval=0.1
+        )
+
+        with pytest.raises(Exception, match="not ready"):
+            probe.wait()
+        assert 3 <= len(health_check.times) <= 6
+
+    def test_container_exited(self, docker_client):
+        docker_client.status = DockerContainerStatus.NON_EXISTENT
+        health_check = _HealthCheck()
+        probe = ContainerReadinessProbe(
+            "test-ext", "ls-ext-test-ext", health_check, timeout=10, max_interval=1
+        )
+
+        with pytest.raises(Exception, match="exited before becoming ready"):
+            probe.wait()
+        assert len(health_check.times) == 1
+
+    def test_log_pattern_triggers_health_check(self, docker_client):
+        health_check = _HealthCheck(ready_after=1)
+        probe = ContainerReadinessProbe(
+            "test-ext",
+            "ls-ext-test-ext",
+            health_check,
+            timeout=30,
+            max_interval=10,
+            initial_interval=10,
+            log_patterns=["database system is ready", "Listening on"],
+        )
+        docker_client.log_stream.chunks.put(b"starting\nLOG:  database system ")
+        docker_client.log_stream.chunks.put(b"is ready to accept connections\n")
+
+        time_to_ready = probe.wait()
+
+        assert time_to_ready < 5
+        assert len(health_check.times) == 2
+        assert get_container_readiness_stats()["test-ext"]["signal"] == "log"
+        assert docker_client.log_stream.closed
@@ -0,0 +1,70 @@
+"""
+Unit tests for the ContainerStartupCoordinator, with the container startups simulated by sleeps.
+"""
+
+import threading
+import time
+
+import pytest
+from localstack_extensions.utils.startup import ContainerStartupCoordinator
+
+STARTUP_TIME = 0.3
+
+
+@pytest.fixture
+def coordinator():
+    coordinator = ContainerStartupCoordinator()
+    yield coordinator
+    coordinator.shutdown()
+
+
+class TestContainerStartupCoordinator:
+    def test_extensions_started_concurrently(self, coordinator):
+        start = time.perf_counter()
+        futures = [
+            coordinator.submit(name, lambda: time.sleep(STARTUP_TIME))
+            for name in ("keycloak", "paradedb", "wiremock")
+        ]
+        # submitting does not block
+        assert time.perf_counter() - start < STARTUP_TIME
+
+        assert coordinator.wait(timeout=10)
+        duration = time.perf_counter() - start
+        assert all(future.result() is None for future in futures)
+        # the overall startup time is determined by the slowest extension, not the sum
+        assert duration < 2 * STARTUP_TIME
+
+        stats = coordinator.stats()
+        assert set(stats) == {"keycloak", "paradedb", "wiremock"}
+        assert all(stat["state"] == "ready" for stat in stats.values())
+        assert all(stat["startup_time"] >= STARTUP_TIME for stat in stats.values())
+
+    def test_readiness_future(self, coordinator):
+        started = threading.Event()
+        future = coordinator.submit("keycloak", started.wait)
+        assert coordinator.get_future("keycloak") is future
+        assert coordinator.get_future("paradedb") is None
+
+        # extensions are only started once
+        assert coordinator.submit("keycloak", started.wait) is future
+        assert not coordinator.is_ready("keycloak")
+        assert coordinator.stats()["keycloak"]["state"] == "starting"
+
+        started.set()
+        future.result(timeout=10)
+        assert coordinator.is_ready("keycloak")
+        assert coordinator.submit("keycloak", started.wait) is future
+
+    def test_failed_startup_is_resubmitted(self, coordinator):
+        def _fail():
+            raise Exception("failed to start")
+
+        future = coordinator.submit("keycloak", _fail)
+        with pytest.raises(Exception, match="failed to start"):
+            future.result(timeout=10)
+        assert not coordinator.is_ready("keycloak")
+        assert coordinator.stats()["keycloak"]["state"] == "failed"
+
+        future = coordinator.submit("keycloak", lambda: None)
+        future.result(timeout=10)
+        assert coordinator.is_ready("keycloak")
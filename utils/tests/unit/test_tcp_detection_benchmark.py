@@ -0,0 +1,162 @@
+"""
+Microbenchmark for the protocol detection of connections in the TCP protocol router.
+
+Classifies 10k synthetic connection prefaces (a mix of HTTP/1.1, HTTP/2 and several binary
+protocols), with an increasing number of registered TCP extensions. Compares the previous approach
+(re-joining the buffered chunks and calling every matcher function in order) with the compiled
+signature dispatch table. No Docker or network access required.
+"""
+
+import random
+import struct
+import time
+
+import pytest
+from localstack_extensions.utils.tcp_protocol_router import SignatureTable, TcpSignature
+
+NUM_PREFACES = 10_000
+ROUNDS = 3
+
+# (name, signatures) of the simulated TCP extensions, extended by synthetic extensions below
+EXTENSIONS = [
+    ("paradedb", [(b"\x04\xd2\x16\x2f", 4), (b"\x00\x03\x00\x00", 4)]),
+    ("grpcbin", [(b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n", 0)]),
+    ("redis", [(b"*1\r\n", 0), (b"*2\r\n", 0), (b"*3\r\n", 0)]),
+    ("mongodb", [(b"\xd4\x07\x00\x00", 12), (b"\xdd\x07\x00\x00", 12)]),
+    ("mysql-proxy", [(b"PROXY TCP4 ", 0)]),
+    ("amqp", [(b"AMQP\x00\x00\x09\x01", 0)]),
+    ("mqtt", [(b"\x00\x04MQTT", 2)]),
+    ("kafka", [(b"\x00\x12\x00\x00", 4)]),
+]
+
+HTTP_PREFACES = [
+    b"GET /_localstack/health HTTP/1.1\r\nHost: localhost:4566\r\n\r\n",
+    b"POST / HTTP/1.1\r\nHost: sqs.localhost:4566\r\nContent-Length: 0\r\n\r\n",
+    b"PUT /bucket/key HTTP/1.1\r\nHost: s3.localhost:4566\r\n\r\n",
+]
+
+
+def _extensions(count: int) -> list[tuple[str, list[tuple[bytes, int]]]]:
+    """Return the given number of extensions, adding ones with synthetic 4-byte magic numbers."""
+    rnd = random.Random(count)
+    extensions = list(EXTENSIONS[:count])
+    for i in range(len(extensions), count):
+        magic = bytes([0xF0 | rnd.randrange(16)]) + rnd.randbytes(3)
+        extensions.append((f"ext-{i}", [(magic, rnd.choice([0, 4]))]))
+    return extensions
+
+
+def _signature_matcher(signatures: list[tuple[bytes, int]]):
+    """Create an equivalent matcher function, as previously implemented by extensions."""
+
+    def _matcher(data: bytes) -> bool:
+        for pattern, offset in signatures:
+            if data[offset : offset + len(pattern)] == pattern:
+                return True
+        return False
+
+    return _matcher
+
+
+def _synthetic_prefaces(count: int, extensions: list) -> list[list[bytes]]:
+    """Create connection prefaces, each split into one or two received chunks."""
+    rnd = random.Random(42)
+    candidates = list(HTTP_PREFACES)
+    for _, signatures in extensions:
+        for pattern, offset in signatures:
+            header = struct.pack(">I", 64) + b"\x00" * 12
+            candidates.append(header[:offset] + pattern + b"\x00" * 16)
+    prefaces = []
+    for _ in range(count):
+        data = rnd.choice(candidates)
+        split = rnd.choice([len(data), 8, 16])
+        prefaces.append([data[:split], data[split:]] if split < len(data) else [data])
+    return prefaces
+
+
+def _classify_linear(prefaces: list[list[bytes]], matchers: list) -> list:
+    """The previous approach: re-join the buffer and scan all matchers per chunk."""
+    results = []
+    for chunks in prefaces:
+        buffer = []
+        result = None
+        for chunk in chunks:
+            buffer.append(chunk)
+            buffered_data = b"".join(buffer)
+            if len(buffered_data) < 8:
+                continue
+            result = "http"
+            for name, matcher in matchers:
+                try:
+                    if matcher(buffered_data):
+                        result = name
+                        break
+                except Exception:
+                    continue
+            break
+        results.append(result)
+    return results
+
+
+def _classify_table(prefaces: list[list[bytes]], table: SignatureTable) -> list:
+    results = []
+    for chunks in prefaces:
+        buffer = b""
+        result = None
+        for chunk in chunks:
+            buffer += chunk
+            name, incomplete = table.match(buffer)
+            if name:
+                result = name
+                break
+            if len(buffer) >= 8 and not incomplete:
+                result = "http"
+                break
+        results.append(result)
+    return results
+
+
+def _best_time(fn, *args) -> tuple[float, list]:
+    best = None
+    result = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        result = fn(*args)
+        duration = time.perf_counter() - start
+        best = duration if best is None else min(best, duration)
+    return best, result
+
+
+@pytest.mark.parametrize("num_extensions", [8, 32, 128])
+def test_benchmark_connection_classification(num_extensions):
+    extensions = _extensions(num_extensions)
+    prefaces = _synthetic_prefaces(NUM_PREFACES, extensions)
+
+    matchers = [(name, _signature_matcher(sigs)) for name, sigs in extensions]
+    table = SignatureTable()
+    for priority, (name, signatures) in enumerate(extensions):
+        for pattern, offset in signatures:
+            table.add(TcpSignature(pattern, offset), name, priority)
+
+    linear_time, linear_results = _best_time(_classify_linear, prefaces, matchers)
+    table_time, table_results = _best_time(_classify_table, prefaces, table)
+
+    assert all(result is not None for result in table_results)
+    assert set(table_results) == {"http"} | {name for name, _ in extensions}
+    # prefaces split before a (longer) signature is complete are classified as HTTP by the
+    # linear scan, whereas the dispatch table waits for the rest of the signature
+    mismatches = [
+        (a, b) for a, b in zip(linear_results, table_results, strict=True) if a != b
+    ]
+    assert all(linear == "http" for linear, _ in mismatches)
+
+    print(
+        f"\n{NUM_PREFACES} prefaces, {num_extensions} extensions | "
+        f"linear matchers {linear_time * 1000:.2f}ms | "
+        f"dispatch table {table_time * 1000:.2f}ms | "
+        f"per connection {table_time / NUM_PREFACES * 1e6:.2f}us | "
+        f"speedup {linear_time / table_time:.1f}x"
+    )
+    if num_extensions >= 32:
+        # the cost of the linear scan grows with the number of extensions
+        assert table_time < linear_time
@@ -0,0 +1,598 @@
+"""
+Unit tests for the protocol detection of the TCP protocol router.
+
+Gateway connections are simulated via Twisted's in-memory reactor and transports, hence no
+network access is required.
+"""
+
+import pytest
+from localstack_extensions.utils import tcp_protocol_router
+from localstack_extensions.utils.docker import ProxiedDockerContainerExtension
+from localstack_extensions.utils.tcp_protocol_router import (
+    MAX_DETECTION_BYTES,
+    TCP_DETECTION_TIMEOUT,
+    TCP_LATENCY_BUCKETS,
+    LatencyHistogram,
+    SignatureTable,
+    TcpRouterStats,
+    TcpSignature,
+    configure_tcp_backend,
+    get_tcp_router_stats,
+    listen_tcp_extension,
+    patch_gateway_for_tcp_routing,
+    register_tcp_extension,
+)
+from twisted.internet.defer import Deferred, fail, succeed
+from twisted.internet.error import ConnectionDone, ConnectionRefusedError
+from twisted.internet.testing import MemoryReactorClock, StringTransport
+from twisted.python.failure import Failure
+from twisted.web.resource import Resource
+from twisted.web.server import Site
+
+HTTP2_PREFACE = b"PRI * HTTP/2.0\r\n\r\nSM\r\n\r\n"
+POSTGRES_SSL_REQUEST = b"\x00\x00\x00\x08\x04\xd2\x16\x2f"
+POSTGRES_STARTUP = b"\x00\x00\x00\x29\x00\x03\x00\x00user\x00test\x00"
+
+POSTGRES_SIGNATURES = [
+    TcpSignature(b"\x04\xd2\x16\x2f", offset=4),
+    TcpSignature(b"\x00\x03\x00\x00", offset=4),
+]
+
+
+class GatewayResource(Resource):
+    isLeaf = True
+
+    def render_GET(self, request):
+        return b"gateway"
+
+
+@pytest.fixture
+def memory_reactor(monkeypatch):
+    memory_reactor = MemoryReactorClock()
+    # the tests run in the reactor thread
+    memory_reactor.callFromThread = lambda fn, *args, **kwargs: fn(*args, **kwargs)
+    monkeypatch.setattr(tcp_protocol_router, "reactor", memory_reactor)
+    return memory_reactor
+
+
+@pytest.fixture
+def tcp_registry(monkeypatch):
+    """Provide an empty registry of TCP extensions, restored after the test."""
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_extensions", [])
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_signature_table", SignatureTable())
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_matchers", [])
+    monkeypatch.setattr(tcp_protocol_router, "_http_fast_path", {})
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_backend_pools", {})
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_connect_hooks", {})
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_relay_extensions", set())
+    monkeypatch.setattr(tcp_protocol_router, "_tcp_default_backend", None)
+    monkeypatch.setattr(tcp_protocol_router, "TCP_ROUTER_STATS", TcpRouterStats())
+    tcp_protocol_router._compile_tcp_extensions()
+    patch_gateway_for_tcp_routing()
+
+
+def _gateway_connection():
+    protocol = Site(GatewayResource()).buildProtocol(None)
+    transport = StringTransport()
+    protocol.makeConnection(transport)
+    return protocol, transport
+
+
+def _backend_targets(memory_reactor) -> list:
+    return [(host, port) for host, port, *_ in memory_reactor.tcpClients]
+
+
+def _connect_backends(memory_reactor, start: int = 0) -> list:
+    """Simulate the establishment of the requested backend connections, from the given index."""
+    protocols = []
+    for _, _, factory, _, _ in memory_reactor.tcpClients[start:]:
+        protocol = factory.buildProtocol(None)
+        protocol.makeConnection(StringTransport())
+        protocols.append(protocol)
+    return protocols
+
+
+class TestSignatureTable:
+    def test_prefix_and_offset_signatures(self):
+        table = SignatureTable()
+        table.add(TcpSignature(HTTP2_PREFACE), "http2")
+        for signature in POSTGRES_SIGNATURES:
+            table.add(signature, "postgres")
+
+        assert table.match(HTTP2_PREFACE + b"\x00\x00") == ("http2", False)
+        assert table.match(POSTGRES_SSL_REQUEST) == ("postgres", False)
+        assert table.match(POSTGRES_STARTUP) == ("postgres", False)
+        assert table.match(b"GET / HTTP/1.1\r\n") == (None, False)
+
+    def test_incomplete_data(self):
+        table = SignatureTable()
+        table.add(TcpSignature(HTTP2_PREFACE), "http2")
+        table.add(TcpSignature(b"\x00\x03\x00\x00", offset=4), "postgres")
+
+        # a partial preface may still become a match
+        assert table.match(b"PRI * HT") == (None, True)
+        # data ending before the offset of a signature
+        assert table.match(b"GET") == (None, True)
+        assert table.match(b"GET / HTTP/1.1") == (None, False)
+
+    def test_priority_of_overlapping_signatures(self):
+        table = SignatureTable()
+        table.add(TcpSignature(b"PRI * HTTP/2.0"), "first", priority=0)
+        table.add(TcpSignature(HTTP2_PREFACE), "second", priority=1)
+        table.add(TcpSignature(b"PRI"), "third", priority=2)
+
+        assert table.match(HTTP2_PREFACE) == ("first", False)
+
+    def test_signature_matches(self):
+        ssl_request, startup = POSTGRES_SIGNATURES
+        assert ssl_request.matches(POSTGRES_SSL_REQUEST)
+        assert not startup.matches(POSTGRES_SSL_REQUEST)
+        assert TcpSignature(HTTP2_PREFACE).matches(HTTP2_PREFACE + b"\x00")
+        assert not TcpSignature(HTTP2_PREFACE).matches(b"PRI * HT")
+
+    def test_invalid_signatures(self):
+        with pytest.raises(ValueError):
+            TcpSignature(b"")
+        with pytest.raises(ValueError):
+            TcpSignature(b"abc", offset=-1)
+
+
+class TestTcpProtocolDetection:
+    def test_connection_claimed_by_signature(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+        register_tcp_extension(
+            "grpcbin", None, "grpcbin", 9000, signatures=[TcpSignature(HTTP2_PREFACE)]
+        )
+
+        protocol, transport = _gateway_connection()
+        protocol.dataReceived(HTTP2_PREFACE[:10])
+        assert memory_reactor.tcpClients == []
+        protocol.dataReceived(HTTP2_PREFACE[10:])
+        assert _backend_targets(memory_reactor) == [("grpcbin", 9000)]
+        _, _, factory, _, _ = memory_reactor.tcpClients[0]
+        assert factory.initial_data == HTTP2_PREFACE
+
+        # signatures shorter than the minimum detection length are matched as well
+        protocol, transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_SSL_REQUEST)
+        assert _backend_targets(memory_reactor)[-1] == ("postgres", 5432)
+
+    def test_matcher_functions_as_fallback(self, tcp_registry, memory_reactor):
+        def _failing_matcher(data):
+            raise Exception("matcher error")
+
+        register_tcp_extension("failing", _failing_matcher, "host0", 1000)
+        register_tcp_extension(
+            "redis", lambda data: data.startswith(b"*1\r\n"), "redis", 6379
+        )
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(b"*1\r\n$4\r\nPING\r\n")
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+
+        assert _backend_targets(memory_reactor) == [("redis", 6379), ("postgres", 5432)]
+
+    def test_unclaimed_connection_served_as_http(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, transport = _gateway_connection()
+        protocol.dataReceived(b"GET / HTTP/1.1\r\n")
+        protocol.dataReceived(b"Host: localhost\r\n\r\n")
+
+        assert memory_reactor.tcpClients == []
+        assert transport.value().startswith(b"HTTP/1.1 200")
+        assert transport.value().endswith(b"gateway")
+
+    def test_unregister_extension(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+        tcp_protocol_router.unregister_tcp_extension("paradedb")
+
+        assert tcp_protocol_router._tcp_signature_table.match(POSTGRES_STARTUP) == (
+            None,
+            False,
+        )
+
+    def test_register_requires_matcher_or_signatures(self, tcp_registry):
+        with pytest.raises(ValueError):
+            register_tcp_extension("invalid", None, "host", 1234)
+
+
+class TestHttpFastPath:
+    def test_http_connections_skip_matching(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+        fast_path = tcp_protocol_router._http_fast_path
+        assert fast_path[b"GET "] == b"GET "
+        assert fast_path[b"PRI "] == HTTP2_PREFACE
+
+        # the signature table is not consulted for requests starting with a method token
+        tcp_protocol_router._tcp_signature_table = None
+        protocol, transport = _gateway_connection()
+        protocol.dataReceived(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+
+        assert transport.value().endswith(b"gateway")
+
+    def test_prefixes_claimed_by_signatures_are_excluded(self, tcp_registry):
+        register_tcp_extension(
+            "grpcbin", None, "grpcbin", 9000, signatures=[TcpSignature(HTTP2_PREFACE)]
+        )
+        register_tcp_extension(
+            "custom", None, "custom", 1234, signatures=[TcpSignature(b"GET /custom")]
+        )
+        register_tcp_extension(
+            "text", None, "text", 1235, signatures=[TcpSignature(b"HTTP", offset=12)]
+        )
+
+        fast_path = tcp_protocol_router._http_fast_path
+        assert b"PRI " not in fast_path
+        assert b"GET " not in fast_path
+        # a textual signature beyond the method token could match any HTTP/1.x request
+        assert b"POST" not in fast_path
+
+        tcp_protocol_router.unregister_tcp_extension("text")
+        assert tcp_protocol_router._http_fast_path[b"POST"] == b"POST"
+
+    def test_matcher_functions_disable_fast_path(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "http-like", lambda data: data.startswith(b"GET /ext"), "ext", 1234
+        )
+        assert tcp_protocol_router._http_fast_path == {}
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(b"GET /ext HTTP/1.1\r\n\r\n")
+        assert _backend_targets(memory_reactor) == [("ext", 1234)]
+
+    def test_extension_matcher_not_registered_with_signatures(self, tcp_registry):
+        class _SignatureExtension(ProxiedDockerContainerExtension):
+            name = "signature-ext"
+            tcp_connection_signatures = POSTGRES_SIGNATURES
+
+            def tcp_connection_matcher(self, data: bytes) -> bool:
+                return any(signature.matches(data) for signature in POSTGRES_SIGNATURES)
+
+        extension = _SignatureExtension(
+            image_name="test/image", container_ports=[5432], tcp_ports=[5432]
+        )
+        extension.container_host = "postgres"
+        extension._setup_tcp_protocol_routing()
+
+        # the connections are classified via the signatures only, keeping the HTTP fast path
+        assert tcp_protocol_router._tcp_matchers == []
+        assert tcp_protocol_router._http_fast_path[b"GET "] == b"GET "
+        assert tcp_protocol_router._tcp_signature_table.match(POSTGRES_STARTUP) == (
+            ("signature-ext", "postgres", 5432),
+            False,
+        )
+
+
+class TestDetectionLimits:
+    def test_detection_timeout_falls_back_to_http(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, transport = _gateway_connection()
+        protocol.dataReceived(b"GE")
+        assert protocol._channel._detecting
+        memory_reactor.advance(TCP_DETECTION_TIMEOUT)
+
+        assert not protocol._channel._detecting
+        assert memory_reactor.tcpClients == []
+        # the buffered bytes were passed on to the HTTP handler
+        protocol.dataReceived(b"T / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        assert transport.value().startswith(b"HTTP/1.1 200")
+        stats = tcp_protocol_router.TCP_ROUTER_STATS
+        assert stats.detection_timeouts == 1
+        assert stats.connections_passed_to_http == 1
+
+    def test_detection_timeout_cancelled_once_claimed(
+        self, tcp_registry, memory_reactor
+    ):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP[:4])
+        assert memory_reactor.getDelayedCalls()
+        protocol.dataReceived(POSTGRES_STARTUP[4:])
+
+        assert _backend_targets(memory_reactor) == [("postgres", 5432)]
+        assert not memory_reactor.getDelayedCalls()
+
+    def test_detection_buffer_is_bounded(self, tcp_registry, memory_reactor):
+        received = []
+
+        def _matcher(data):
+            received.append(len(data))
+            return False
+
+        register_tcp_extension(
+            "custom", _matcher, "host0", 1000, signatures=[TcpSignature(b"X", 1000)]
+        )
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(b"a" * 300)
+        assert protocol._channel._detecting
+        protocol.dataReceived(b"a" * 300)
+
+        # the signature may still match, but the detection buffer is full
+        assert not protocol._channel._detecting
+        assert received == [300, MAX_DETECTION_BYTES]
+        assert memory_reactor.tcpClients == []
+
+    def test_unidentified_connections_routed_to_default_backend(
+        self, tcp_registry, memory_reactor
+    ):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+        register_tcp_extension("mailhog", None, "mailhog", 1025, default=True)
+
+        # the client waits for the greeting of the server
+        protocol, _ = _gateway_connection()
+        memory_reactor.advance(TCP_DETECTION_TIMEOUT)
+        assert _backend_targets(memory_reactor) == [("mailhog", 1025)]
+
+        # identified connections are not affected
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        memory_reactor.advance(TCP_DETECTION_TIMEOUT)
+        assert _backend_targets(memory_reactor)[1:] == [("postgres", 5432)]
+
+
+class TestBackendConnectionPool:
+    def _register_paradedb(self, pool_size=2, on_connect=None):
+        register_tcp_extension(
+            "paradedb",
+            None,
+            "postgres",
+            5432,
+            signatures=POSTGRES_SIGNATURES,
+            pool_size=pool_size,
+            pool_idle_timeout=30,
+            on_connect=on_connect,
+        )
+        return tcp_protocol_router._tcp_backend_pools["paradedb"]
+
+    def test_claimed_connections_use_pooled_backends(
+        self, tcp_registry, memory_reactor
+    ):
+        pool = self._register_paradedb()
+
+        # the pool is pre-connected on registration, as the backend is ready
+        assert len(memory_reactor.tcpClients) == 2
+        _connect_backends(memory_reactor)
+        assert len(pool.idle) == 2
+
+        protocol, client_transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_SSL_REQUEST)
+        # the pooled connection is handed out and refilled, without waiting for a connection
+        backend = protocol._channel._tcp_peer
+        assert backend.transport.value() == POSTGRES_SSL_REQUEST
+        assert len(memory_reactor.tcpClients) == 3
+        backend.dataReceived(b"N")
+        assert client_transport.value() == b"N"
+
+        stats = tcp_protocol_router.get_tcp_backend_pool_stats()["paradedb"]
+        assert stats["hits"] == 1
+        assert stats["misses"] == 0
+        assert stats["idle"] == 1
+
+        # closing the backend connection closes the client connection
+        backend.connectionLost(Failure(ConnectionDone()))
+        assert client_transport.disconnecting
+
+    def test_data_received_while_idle_is_forwarded(self, tcp_registry, memory_reactor):
+        self._register_paradedb(pool_size=1)
+        (idle_backend,) = _connect_backends(memory_reactor)
+        idle_backend.dataReceived(b"greeting")
+
+        protocol, client_transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        assert client_transport.value() == b"greeting"
+
+    def test_idle_eviction(self, tcp_registry, memory_reactor):
+        pool = self._register_paradedb(pool_size=1)
+        (idle_backend,) = _connect_backends(memory_reactor)
+
+        memory_reactor.advance(30)
+        assert idle_backend.transport.disconnecting
+        assert pool.evictions == 1
+        # evicted connections are replaced
+        assert len(memory_reactor.tcpClients) == 2
+        idle_backend.connectionLost(Failure(ConnectionDone()))
+        _connect_backends(memory_reactor, start=1)
+        assert len(pool.idle) == 1
+
+    def test_backend_unavailable(self, tcp_registry, memory_reactor):
+        pool = self._register_paradedb(pool_size=1)
+        _, _, factory, _, _ = memory_reactor.tcpClients[0]
+        factory.clientConnectionFailed(None, Failure(ConnectionRefusedError()))
+        assert len(memory_reactor.tcpClients) == 1
+
+        # connections are retried after a delay
+        memory_reactor.advance(pool.retry_delay)
+        assert len(memory_reactor.tcpClients) == 2
+
+    def test_pool_started_once_backend_ready(self, tcp_registry, memory_reactor):
+        pool = self._register_paradedb(pool_size=1, on_connect=lambda: succeed(None))
+        # the backend is not known to be ready yet
+        assert memory_reactor.tcpClients == []
+
+        tcp_protocol_router.start_tcp_backend_pool("paradedb")
+        _connect_backends(memory_reactor)
+        assert len(pool.idle) == 1
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        assert pool.stats()["hits"] == 1
+
+    def test_unregister_closes_pool(self, tcp_registry, memory_reactor):
+        self._register_paradedb(pool_size=1)
+        (idle_backend,) = _connect_backends(memory_reactor)
+
+        tcp_protocol_router.unregister_tcp_extension("paradedb")
+        assert idle_backend.transport.disconnecting
+        assert tcp_protocol_router.get_tcp_backend_pool_stats() == {}
+        assert memory_reactor.getDelayedCalls() == []
+
+
+class TestBackendConnectHook:
+    def test_connection_held_until_backend_ready(self, tcp_registry, memory_reactor):
+        ready = Deferred()
+        register_tcp_extension(
+            "paradedb",
+            None,
+            "postgres",
+            5432,
+            signatures=POSTGRES_SIGNATURES,
+            on_connect=lambda: ready,
+        )
+
+        protocol, client_transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        assert memory_reactor.tcpClients == []
+        assert client_transport.producerState == "paused"
+
+        ready.callback(None)
+        (backend,) = _connect_backends(memory_reactor)
+        assert backend.transport.value() == POSTGRES_STARTUP
+
+    def test_backend_failed_to_start(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb",
+            None,
+            "postgres",
+            5432,
+            signatures=POSTGRES_SIGNATURES,
+            on_connect=lambda: fail(Exception("container failed to start")),
+        )
+
+        protocol, client_transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        assert memory_reactor.tcpClients == []
+        assert client_transport.disconnecting
+
+
+class TestTcpRouterStats:
+    def test_latency_histogram(self):
+        histogram = LatencyHistogram()
+        for value in (0.00005, 0.0001, 0.002, 10.0):
+            histogram.observe(value)
+
+        snapshot = histogram.snapshot()
+        assert snapshot["count"] == 4
+        assert snapshot["sum"] == pytest.approx(10.00215)
+        assert snapshot["buckets"][0.0001] == 2
+        assert snapshot["buckets"][0.001] == 2
+        assert snapshot["buckets"][0.005] == 3
+        assert snapshot["buckets"][TCP_LATENCY_BUCKETS[-1]] == 3
+        assert snapshot["buckets"][float("inf")] == 4
+
+    def test_claimed_connection_stats(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        (backend,) = _connect_backends(memory_reactor)
+        backend.dataReceived(b"R" * 10)
+        protocol._channel.dataReceived(b"Q" * 20)
+
+        stats = get_tcp_router_stats()["paradedb"]
+        assert stats["connections_claimed"] == 1
+        assert stats["connections_active"] == 1
+        assert stats["bytes_to_backend"] == len(POSTGRES_STARTUP) + 20
+        assert stats["bytes_to_client"] == 10
+        assert stats["detection_time"]["count"] == 1
+        assert stats["backend_connect_time"]["count"] == 1
+
+        protocol.connectionLost(Failure(ConnectionDone()))
+        backend.connectionLost(Failure(ConnectionDone()))
+        assert get_tcp_router_stats()["paradedb"]["connections_active"] == 0
+
+    def test_matcher_errors_and_unclaimed_connections(
+        self, tcp_registry, memory_reactor
+    ):
+        def _failing_matcher(data):
+            raise Exception("matcher error")
+
+        register_tcp_extension("failing", _failing_matcher, "host0", 1000)
+
+        protocol, _ = _gateway_connection()
+        protocol.dataReceived(b"GET / HTTP/1.1\r\n\r\n")
+
+        assert get_tcp_router_stats()["failing"]["matcher_errors"] == 1
+        assert tcp_protocol_router.TCP_ROUTER_STATS.connections_passed_to_http == 1
+
+    def test_backend_connect_failures(self, tcp_registry, memory_reactor):
+        register_tcp_extension(
+            "paradedb", None, "postgres", 5432, signatures=POSTGRES_SIGNATURES
+        )
+
+        protocol, client_transport = _gateway_connection()
+        protocol.dataReceived(POSTGRES_STARTUP)
+        _, _, factory, _, _ = memory_reactor.tcpClients[0]
+        factory.clientConnectionFailed(None, Failure(ConnectionRefusedError()))
+
+        stats = get_tcp_router_stats()["paradedb"]
+        assert stats["backend_connect_failures"] == 1
+        assert stats["connections_active"] == 0
+        assert client_transport.disconnecting
+
+
+class TestDedicatedListeners:
+    def _connect_client(self, memory_reactor):
+        _, factory, _, _ = memory_reactor.tcpServers[0]
+        protocol = factory.buildProtocol(None)
+        transport = StringTransport()
+        protocol.makeConnection(transport)
+        return protocol, transport
+
+    def test_server_speaks_first(self, tcp_registry, memory_reactor):
+        listen_tcp_extension("mysql", 3306, "mysql", 3306)
+        assert [port for port, *_ in memory_reactor.tcpServers] == [3306]
+
+        # the connection is forwarded without waiting for any data from the client
+        protocol, client_transport = self._connect_client(memory_reactor)
+        assert _backend_targets(memory_reactor) == [("mysql", 3306)]
+        (backend,) = _connect_backends(memory_reactor)
+        backend.dataReceived(b"greeting")
+        assert client_transport.value() == b"greeting"
+        protocol.dataReceived(b"login")
+        assert backend.transport.value() == b"login"
+
+        stats = get_tcp_router_stats()["mysql"]
+        assert stats["connections_claimed"] == 1
+        assert stats["detection_time"]["count"] == 0
+        assert stats["bytes_to_backend"] == 5
+        assert stats["bytes_to_client"] == 8
+
+        protocol.connectionLost(Failure(ConnectionDone()))
+        assert backend.transport.disconnecting
+
+    def test_connection_held_until_backend_ready(self, tcp_registry, memory_reactor):
+        ready = Deferred()
+        configure_tcp_backend("mysql", "mysql", 3306, on_connect=lambda: ready)
+        listen_tcp_extension("mysql", 3306, "mysql", 3306)
+
+        _, client_transport = self._connect_client(memory_reactor)
+        assert memory_reactor.tcpClients == []
+        assert client_transport.producerState == "paused"
+
+        ready.callback(None)
+        _connect_backends(memory_reactor)
+        assert client_transport.producerState == "producing"
@@ -0,0 +1,123 @@
+"""
+Unit tests for the TcpRelay, with local sockets as client and backend.
+"""
+
+import socket
+import threading
+
+import pytest
+from localstack_extensions.utils import tcp_relay
+from localstack_extensions.utils.tcp_relay import TcpRelay, detach_socket
+from twisted.internet import tcp
+from twisted.internet.protocol import Protocol
+from twisted.internet.testing import MemoryReactorClock, StringTransport
+
+
+def _echo(conn: socket.socket):
+    with conn:
+        while data := conn.recv(65536):
+            conn.sendall(data)
+
+
+@pytest.fixture
+def echo_port():
+    server = socket.create_server(("127.0.0.1", 0))
+    stopped = False
+
+    def _serve():
+        while not stopped:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            threading.Thread(target=_echo, args=(conn,), daemon=True).start()
+
+    threading.Thread(target=_serve, daemon=True).start()
+    yield server.getsockname()[1]
+    stopped = True
+    server.close()
+
+
+def _receive(sock: socket.socket, size: int) -> bytes:
+    data = b""
+    while len(data) < size and (chunk := sock.recv(size - len(data))):
+        data += chunk
+    return data
+
+
+class _RecordingProtocol(Protocol):
+    lost_reason = None
+
+    def connectionLost(self, reason=None):
+        self.lost_reason = reason
+
+
+class TestDetachSocket:
+    def test_detach_socket_of_transport(self):
+        with socket.create_server(("127.0.0.1", 0)) as listener:
+            client_sock = socket.create_connection(listener.getsockname())
+            server_sock, _ = listener.accept()
+        reactor = MemoryReactorClock()
+        protocol = _RecordingProtocol()
+        transport = tcp.Server(
+            server_sock, protocol, ("127.0.0.1", 1), None, 1, reactor
+        )
+        protocol.makeConnection(transport)
+
+        sock = detach_socket(transport)
+        reactor.advance(0)
+
+        # the transport is closed, but the connection is kept open for the detached socket
+        assert protocol.lost_reason is not None
+        assert server_sock.fileno() == -1
+        client_sock.sendall(b"ping")
+        assert sock.recv(4) == b"ping"
+        # the detached socket is closed gracefully (instead of resetting the connection)
+        sock.close()
+        assert client_sock.recv(1) == b""
+        client_sock.close()
+
+    def test_transports_without_socket(self):
+        class _TlsTransport(StringTransport):
+            _tlsConnection = object()
+
+        assert detach_socket(StringTransport()) is None
+        assert detach_socket(_TlsTransport()) is None
+
+
+@pytest.mark.parametrize("splice", [True, False])
+def test_relay_forwards_both_directions(echo_port, monkeypatch, splice):
+    if splice and not tcp_relay.SPLICE_SUPPORTED:
+        pytest.skip("os.splice is not supported on this platform")
+    monkeypatch.setattr(tcp_relay, "SPLICE_SUPPORTED", splice)
+    client, relay_sock = socket.socketpair()
+    relay = TcpRelay(relay_sock, "127.0.0.1", echo_port, initial_data=b"hello ")
+    relay.start()
+
+    payload = bytes(range(256)) * 4096
+    sender = threading.Thread(target=client.sendall, args=(payload,))
+    sender.start()
+    assert _receive(client, 6 + len(payload)) == b"hello " + payload
+    sender.join()
+
+    # closing the client is propagated to the backend, and back
+    client.shutdown(socket.SHUT_WR)
+    assert client.recv(1) == b""
+    client.close()
+    assert relay.bytes_to_backend == relay.bytes_to_client == 6 + len(payload)
+
+
+def test_relay_backend_unavailable():
+    port_sock = socket.create_server(("127.0.0.1", 0))
+    port = port_sock.getsockname()[1]
+    port_sock.close()
+    client, relay_sock = socket.socketpair()
+
+    closed = threading.Event()
+    relay = TcpRelay(relay_sock, "127.0.0.1", port, on_close=lambda _: closed.set())
+    relay.start()
+
+    client.settimeout(5)
+    assert client.recv(1) == b""
+    assert closed.wait(5)
+    assert relay.connect_time is None